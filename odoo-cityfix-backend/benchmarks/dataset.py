@@ -0,0 +1,198 @@
+"""Deterministic synthetic CityFix data.
+
+Issues, their photos and their status logs are generated from the issue id
+on demand, so a 1M-issue dataset costs no memory until rows are changed;
+ids and ``created_at`` increase together, which lets the fake server walk
+the feed in order without sorting. Users are materialized (one per
+ISSUES_PER_USER issues). Every user signs in with PASSWORD.
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+PASSWORD = "bench-password"
+ISSUES_PER_USER = 20
+MIN_USERS = 100
+
+CATEGORIES = ("Roads", "Lighting", "Water Supply", "Cleanliness", "Public Safety", "Obstructions")
+STATUSES = ("Reported", "In Progress", "Resolved", "Rejected")
+PRIORITIES = ("Low", "Medium", "High", "Critical")
+
+# Mohali, where the issues are scattered within a few kilometres
+CENTER = (30.7046, 76.7179)
+SPREAD_DEGREES = 0.05
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+SPAN = timedelta(days=730)
+
+PROBLEMS = {
+    "Roads": ("pothole", "cracked asphalt", "sunken manhole", "broken speed breaker", "road cave-in"),
+    "Lighting": ("streetlight out", "flickering lamp", "fallen light pole", "exposed wiring", "dark underpass"),
+    "Water Supply": ("burst pipe", "leaking valve", "no water supply", "contaminated tap water", "overflowing tank"),
+    "Cleanliness": ("overflowing bin", "garbage dump", "blocked drain", "dead animal", "open sewage"),
+    "Public Safety": ("broken railing", "missing manhole cover", "unsafe crossing", "stray dogs", "open trench"),
+    "Obstructions": ("fallen tree", "illegal parking", "construction debris", "encroached footpath", "abandoned vehicle"),
+}
+PLACES = (
+    "near the bus stop", "outside the market", "opposite the school", "at the main crossing",
+    "behind the hospital", "next to the park gate", "in front of the temple", "along the service lane",
+)
+STREETS = (
+    "Phase 7", "Sector 70", "Airport Road", "Madanpura Chowk", "Kharar Road", "Sector 62",
+    "Phase 3B2", "Landran Road", "Sector 82", "Industrial Area",
+)
+DETAILS = (
+    "It has been like this for over a week.",
+    "Two-wheelers keep skidding here at night.",
+    "Residents have complained several times already.",
+    "It gets much worse whenever it rains.",
+    "Children pass this spot on their way to school.",
+    "The smell is unbearable in the afternoon.",
+    "Traffic backs up all the way to the signal.",
+    "Please send someone before somebody gets hurt.",
+)
+FIRST_NAMES = ("Aarav", "Ishita", "Kabir", "Meera", "Rohan", "Simran", "Vikram", "Ananya", "Arjun", "Priya")
+LAST_NAMES = ("Sharma", "Gill", "Singh", "Verma", "Kaur", "Mehta", "Bansal", "Sandhu", "Kapoor", "Joshi")
+
+_AUTH_NAMESPACE = uuid.UUID("5f0b7d1e-3c2a-4e57-9a8b-2f6c1d0e9b44")
+
+
+def timestamp(value):
+    # Always with microseconds, so timestamps also sort as strings
+    return value.isoformat(timespec="microseconds")
+
+
+def user_email(user_id):
+    return f"user{user_id}@bench.cityfix.test"
+
+
+def auth_user_id(email):
+    """The auth (GoTrue) user id for an email, stable across runs."""
+    return str(uuid.uuid5(_AUTH_NAMESPACE, email))
+
+
+def user_count(size):
+    return max(MIN_USERS, size // ISSUES_PER_USER)
+
+
+def make_user(user_id):
+    rng = random.Random(f"user:{user_id}")
+    email = user_email(user_id)
+    created_at = START + timedelta(seconds=rng.randrange(int(SPAN.total_seconds())))
+    return {
+        "id": user_id,
+        "email": email,
+        "first_name": rng.choice(FIRST_NAMES),
+        "last_name": rng.choice(LAST_NAMES),
+        "role": "admin" if user_id == 1 else "user",
+        "is_verified": True,
+        "created_at": timestamp(created_at),
+        "updated_at": timestamp(created_at),
+    }
+
+
+def issue_text(rng, category):
+    problem = rng.choice(PROBLEMS[category])
+    title = f"{problem.capitalize()} {rng.choice(PLACES)}"
+    description = f"{title}, {rng.choice(STREETS)}. {rng.choice(DETAILS)}"
+    return title[:30], description
+
+
+def random_location(rng):
+    return (
+        round(rng.gauss(CENTER[0], SPREAD_DEGREES), 6),
+        round(rng.gauss(CENTER[1], SPREAD_DEGREES), 6),
+    )
+
+
+class Dataset:
+    """``size`` issues created evenly over SPAN, ids 1..size in creation order."""
+
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.seed = seed
+        self.users = user_count(size)
+        self.step = SPAN / size
+
+    def category_id(self, name):
+        return CATEGORIES.index(name) + 1
+
+    def categories(self):
+        return [{"id": index + 1, "name": name} for index, name in enumerate(CATEGORIES)]
+
+    def created_at(self, issue_id):
+        return START + self.step * (issue_id - 1)
+
+    def _rng(self, issue_id):
+        return random.Random(self.seed * 10_000_019 + issue_id)
+
+    def issue(self, issue_id):
+        rng = self._rng(issue_id)
+        category = rng.choice(CATEGORIES)
+        title, description = issue_text(rng, category)
+        latitude, longitude = random_location(rng)
+        created_at = self.created_at(issue_id)
+        # Older issues are more likely to have been worked on
+        age = 1 - issue_id / self.size
+        status = rng.choices(STATUSES, weights=(1, age + 0.2, 2 * age + 0.1, 0.1))[0]
+        updated_at = created_at + timedelta(hours=rng.randrange(1, 24 * 30))
+        return {
+            "id": issue_id,
+            "title": title,
+            "description": description,
+            "category_id": self.category_id(category),
+            "user_id": rng.randrange(1, self.users + 1),
+            "latitude": latitude,
+            "longitude": longitude,
+            "address": f"{rng.choice(STREETS)}, Sahibzada Ajit Singh Nagar, Punjab, India",
+            "status": status,
+            "priority": rng.choice(PRIORITIES),
+            "is_anonymous": rng.random() < 0.1,
+            "report_count": 1 + int(rng.expovariate(2)),
+            "flag_count": 0,
+            "is_hidden": False,
+            "created_at": timestamp(created_at),
+            "updated_at": timestamp(updated_at if status != "Reported" else created_at),
+        }
+
+    def status_logs(self, issue):
+        """Logs leading up to the issue's generated status."""
+        path = {
+            "Reported": ("Reported",),
+            "In Progress": ("Reported", "In Progress"),
+            "Resolved": ("Reported", "In Progress", "Resolved"),
+            "Rejected": ("Reported", "Rejected"),
+        }[issue["status"]]
+        created_at = datetime.fromisoformat(issue["created_at"])
+        updated_at = datetime.fromisoformat(issue["updated_at"])
+        logs = []
+        for index, status in enumerate(path):
+            changed_at = created_at + (updated_at - created_at) * index / max(1, len(path) - 1)
+            logs.append(
+                {
+                    "id": issue["id"] * 4 + index,
+                    "issue_id": issue["id"],
+                    "status": status,
+                    "changed_at": timestamp(changed_at),
+                }
+            )
+        return logs
+
+    def photos(self, issue, base_url):
+        rng = random.Random(f"photos:{self.seed}:{issue['id']}")
+        photos = []
+        for index in range(rng.choice((0, 1, 1, 2, 3))):
+            name = f"bench/{issue['id']}-{index}"
+            photos.append(
+                {
+                    "id": issue["id"] * 4 + index,
+                    "issue_id": issue["id"],
+                    "image_url": f"{base_url}/storage/v1/object/public/issue-photos/{name}.jpg",
+                    "thumbnail_url": f"{base_url}/storage/v1/object/public/issue-photos/{name}.thumb.webp",
+                    "uploaded_at": issue["created_at"],
+                }
+            )
+        return photos
@@ -0,0 +1,942 @@
+"""A local stand-in for the Supabase APIs the backend calls.
+
+Serves the subset of PostgREST (filters, ``or``/``and`` trees, ordering,
+limits, resource embedding, inserts, upserts, updates and the ``rpc/``
+functions in sql/) and of the GoTrue auth API (password and refresh-token
+sign-in, ``/user``) that CityFix uses, over a ``dataset.Dataset``. Every
+API request is delayed by the configured latency and counted, so a run can
+report upstream calls per request.
+
+    python -m benchmarks.fake_supabase --size 100k --latency-ms 20
+
+Access tokens are HS256 JWTs signed with --jwt-secret; give the backend the
+same JWT_SECRET and it verifies them locally, as it does against Supabase.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import jwt
+
+from hackthon_Demo_backend.geocoding import geocode_key
+
+from .dataset import (
+    PASSWORD,
+    SIZES,
+    Dataset,
+    auth_user_id,
+    make_user,
+    timestamp,
+)
+
+ACCESS_TOKEN_TTL = 3600
+# Query parameters that are not column filters
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+class APIError(Exception):
+    def __init__(self, status, body):
+        super().__init__(body.get("message") or body.get("msg"))
+        self.status = status
+        self.body = body
+
+
+def now():
+    return timestamp(datetime.now(timezone.utc))
+
+
+def _as_datetime(value):
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+# --- filters -----------------------------------------------------------------
+
+
+def _split_top(text):
+    """Split on commas outside parentheses and double quotes."""
+    parts, depth, quoted, start = [], 0, False, 0
+    for index, char in enumerate(text):
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(text[start:index])
+            start = index + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def parse_condition(column, expression):
+    """``("cond", column, negated, op, value)`` from e.g. ``not.in.(1,2)``."""
+    negated = expression.startswith("not.")
+    if negated:
+        expression = expression[len("not.") :]
+    op, _, value = expression.partition(".")
+    if op == "in":
+        value = [_unquote(item) for item in _split_top(value.strip()[1:-1])]
+    elif op == "is":
+        value = {"null": None, "true": True, "false": False}.get(value, value)
+    else:
+        value = _unquote(value)
+    return ("cond", column, negated, op, value)
+
+
+def parse_logic(text):
+    """Conditions of an ``or=(...)``/``and=(...)`` value, without the outer parentheses."""
+    conditions = []
+    for part in _split_top(text):
+        match = re.match(r"(not\.)?(and|or)\((.*)\)$", part, re.S)
+        if match:
+            group = (match.group(2), parse_logic(match.group(3)))
+            conditions.append(("not", group) if match.group(1) else group)
+        else:
+            column, _, expression = part.partition(".")
+            conditions.append(parse_condition(column, expression))
+    return conditions
+
+
+def parse_filters(params):
+    filters = []
+    for key, value in params:
+        if key in RESERVED_PARAMS:
+            continue
+        if key in ("or", "and"):
+            filters.append((key, parse_logic(value.strip()[1:-1])))
+        else:
+            filters.append(parse_condition(key, value))
+    return filters
+
+
+def _coerce(column, current, literal):
+    if isinstance(current, bool):
+        return literal in (True, "true")
+    if isinstance(current, int):
+        return float(literal) if "." in str(literal) else int(literal)
+    if isinstance(current, float):
+        return float(literal)
+    if column.endswith("_at"):
+        return _as_datetime(literal)
+    return literal
+
+
+def _compare(column, current, op, value):
+    if op == "is":
+        return current is value if value in (None, True, False) else False
+    if current is None:
+        return False
+    if column.endswith("_at") and isinstance(current, str):
+        current = _as_datetime(current)
+    if op == "in":
+        return current in {_coerce(column, current, item) for item in value}
+    if op in ("like", "ilike"):
+        pattern = re.escape(value).replace(r"\*", ".*").replace("%", ".*")
+        flags = re.I if op == "ilike" else 0
+        return re.fullmatch(pattern, str(current), flags) is not None
+    value = _coerce(column, current, value)
+    return {
+        "eq": current == value,
+        "neq": current != value,
+        "gt": current > value,
+        "gte": current >= value,
+        "lt": current < value,
+        "lte": current <= value,
+    }[op]
+
+
+def matches(row, condition):
+    kind = condition[0]
+    if kind == "cond":
+        _, column, negated, op, value = condition
+        return _compare(column, row.get(column), op, value) != negated
+    if kind == "and":
+        return all(matches(row, item) for item in condition[1])
+    if kind == "or":
+        return any(matches(row, item) for item in condition[1])
+    return not matches(row, condition[1])
+
+
+def parse_order(value):
+    order = []
+    for part in _split_top(value or ""):
+        column, *modifiers = part.split(".")
+        order.append((column, "desc" in modifiers))
+    return order
+
+
+def sort_rows(rows, order):
+    for column, desc in reversed(order):
+        # Nulls sort as the largest value: last ascending, first descending, as in Postgres
+        rows.sort(key=lambda row: _null_last(row.get(column)), reverse=desc)
+    return rows
+
+
+def _null_last(value):
+    return (True, 0) if value is None else (False, value)
+
+
+def _column_bound(filters, column, ops, lower=False):
+    """The tightest bound ``ops`` filters put on ``column`` (upper unless ``lower``), or None."""
+    key = _as_datetime if column.endswith("_at") else float
+    tightest, loosest = (max, min) if lower else (min, max)
+    bounds = []
+    for condition in filters:
+        if condition[0] == "cond" and condition[1] == column and condition[3] in ops:
+            if not condition[2]:
+                bounds.append(condition[4])
+        elif condition[0] == "or":
+            branch_bounds = [_column_bound([item], column, ops, lower) for item in condition[1]]
+            if branch_bounds and None not in branch_bounds:
+                bounds.append(loosest(branch_bounds, key=key))
+        elif condition[0] == "and":
+            bound = _column_bound(condition[1], column, ops, lower)
+            if bound is not None:
+                bounds.append(bound)
+    if not bounds:
+        return None
+    return tightest(bounds, key=key)
+
+
+# --- tables ------------------------------------------------------------------
+
+
+class Table:
+    """Rows kept in memory by id, with optional lookups on ``indexed`` columns."""
+
+    def __init__(self, rows=(), indexed=(), unique=None):
+        self.rows = {}
+        self.indexed = indexed
+        self.unique = unique
+        self._indexes = {column: {} for column in indexed}
+        self._unique_index = {}
+        self._next_id = 1
+        for row in rows:
+            self.insert(row)
+
+    def get(self, row_id):
+        return self.rows.get(row_id)
+
+    def _index(self, row, add=True):
+        for column in self.indexed:
+            ids = self._indexes[column].setdefault(row.get(column), set())
+            (ids.add if add else ids.discard)(row["id"])
+        if self.unique:
+            key = tuple(row.get(column) for column in self.unique)
+            if add:
+                self._unique_index[key] = row["id"]
+            else:
+                self._unique_index.pop(key, None)
+
+    def insert(self, row):
+        row = dict(row)
+        if row.get("id") is None:
+            row["id"] = self._next_id
+        self._next_id = max(self._next_id, row["id"] + 1)
+        self.rows[row["id"]] = row
+        self._index(row)
+        return row
+
+    def find(self, **values):
+        """Rows whose columns equal ``values``, looked up by index where possible."""
+        if self.unique and set(values) == set(self.unique):
+            row_id = self._unique_index.get(tuple(values[column] for column in self.unique))
+            return [self.rows[row_id]] if row_id is not None else []
+        candidates = self.rows.values()
+        for column in self.indexed:
+            if column in values:
+                candidates = [self.rows[row_id] for row_id in self._indexes[column].get(values[column], ())]
+                break
+        return [row for row in candidates if all(row.get(k) == v for k, v in values.items())]
+
+    def update(self, row, changes):
+        self._index(row, add=False)
+        row.update(changes)
+        self._index(row)
+        return row
+
+    def scan(self, filters, order):
+        for condition in filters:
+            if condition[0] == "cond" and condition[1] in self.indexed and not condition[2]:
+                if condition[3] == "eq":
+                    # Literals are strings; indexed columns hold strings
+                    ids = self._indexes[condition[1]].get(condition[4], ())
+                    return [self.rows[row_id] for row_id in ids]
+        return list(self.rows.values())
+
+
+class IssueTable(Table):
+    """The generated issues, with inserted and changed rows kept on top."""
+
+    def __init__(self, dataset):
+        super().__init__()
+        self.dataset = dataset
+        self._next_id = dataset.size + 1
+
+    def get(self, row_id):
+        try:
+            row_id = int(row_id)
+        except (TypeError, ValueError):
+            return None
+        row = self.rows.get(row_id)
+        if row is None and 1 <= row_id <= self.dataset.size:
+            row = self.dataset.issue(row_id)
+        return row
+
+    def update(self, row, changes):
+        # Generated rows become overlay rows the first time they change
+        row = self.rows.setdefault(row["id"], row)
+        row.update(changes)
+        return row
+
+    def _last_id_before(self, bound, inclusive):
+        """The highest generated id whose created_at is below (or at) ``bound``."""
+        bound = _as_datetime(bound)
+        low, high = 0, self.dataset.size
+        while low < high:
+            middle = (low + high + 1) // 2
+            created_at = self.dataset.created_at(middle)
+            if created_at < bound or (inclusive and created_at == bound):
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def _ids(self, filters, order):
+        """Candidate ids, and whether they are already in ``order``."""
+        for condition in filters:
+            if condition[0] == "cond" and condition[1] == "id" and not condition[2]:
+                if condition[3] == "eq":
+                    return [condition[4]], True
+                if condition[3] == "in":
+                    return condition[4], not order
+
+        top = self.dataset.size
+        extra = sorted(row_id for row_id in self.rows if row_id > top)
+        keys = [column for column, _ in order]
+        directions = {desc for _, desc in order}
+
+        # ids and created_at grow together, so both orders are one walk
+        if keys and set(keys) <= {"id", "created_at"} and len(directions) == 1:
+            if directions == {True}:
+                bound = _column_bound(filters, "created_at", ("lt", "lte", "eq"))
+                if bound is not None:
+                    top = self._last_id_before(bound, inclusive=True)
+                return (*reversed(extra), *range(top, 0, -1)), True
+            start = 1
+            bound = _column_bound(filters, "id", ("gt", "gte"), lower=True)
+            if bound is not None:
+                start = int(float(bound))
+            return (*range(max(1, start), top + 1), *extra), True
+        return (*range(1, top + 1), *extra), not order
+
+    def iter_ordered(self, filters, order):
+        ids, ordered = self._ids(filters, order)
+        rows = (self.get(row_id) for row_id in ids)
+        return (row for row in rows if row is not None), ordered
+
+
+class ChildTable(Table):
+    """Photos or status logs: generated per issue, replaced per issue once written."""
+
+    def __init__(self, issues, generate):
+        super().__init__()
+        self.issues = issues
+        self.generate = generate
+        self.by_issue = {}
+        self._next_id = (issues.dataset.size + 1) * 4
+
+    def for_issue(self, issue_id):
+        rows = self.by_issue.get(issue_id)
+        if rows is None:
+            issue = self.issues.get(issue_id)
+            if issue is None or issue["id"] > self.issues.dataset.size:
+                return []
+            rows = self.generate(self.issues.dataset.issue(issue["id"]))
+        return rows
+
+    def _owned(self, issue_id):
+        rows = self.by_issue.get(issue_id)
+        if rows is None:
+            rows = self.by_issue[issue_id] = [dict(row) for row in self.for_issue(issue_id)]
+        return rows
+
+    def insert(self, row):
+        row = dict(row)
+        row["id"] = self._next_id
+        self._next_id += 1
+        self._owned(row["issue_id"]).append(row)
+        return row
+
+    def update(self, row, changes):
+        for owned in self._owned(row["issue_id"]):
+            if owned["id"] == row["id"]:
+                owned.update(changes)
+                return owned
+        return row
+
+    def scan(self, filters, order):
+        for condition in filters:
+            if condition[0] == "cond" and condition[1] == "issue_id" and not condition[2]:
+                if condition[3] in ("eq", "in"):
+                    values = condition[4] if condition[3] == "in" else [condition[4]]
+                    return [row for value in values for row in self.for_issue(int(value))]
+        ids, _ = self.issues._ids([], [])
+        return [row for issue_id in ids for row in self.for_issue(issue_id)]
+
+
+class Database:
+    def __init__(self, dataset, base_url):
+        self.dataset = dataset
+        self.lock = threading.RLock()
+        self.issues = IssueTable(dataset)
+        self.tables = {
+            "issues": self.issues,
+            "issue_photos": ChildTable(self.issues, lambda issue: dataset.photos(issue, base_url)),
+            "issue_status_logs": ChildTable(self.issues, dataset.status_logs),
+            "categories": Table(dataset.categories(), indexed=("name",)),
+            "users_table": Table(
+                (make_user(user_id) for user_id in range(1, dataset.users + 1)),
+                indexed=("email",),
+            ),
+            "geocode_cache": Table(indexed=("lat_key",), unique=("lat_key", "lng_key")),
+            "flags": Table(unique=("issue_id", "flagged_by")),
+            "issue_reports": Table(unique=("issue_id", "user_id")),
+            "issue_tombstones": Table(),
+            "issue_stat_counts": Table(),
+            "issue_resolution_histogram": Table(),
+        }
+        # (parent table, embedded table) -> (cardinality, foreign key)
+        self.relations = {
+            ("issues", "users_table"): ("one", "user_id"),
+            ("issues", "categories"): ("one", "category_id"),
+            ("issues", "issue_photos"): ("many", "issue_id"),
+            ("issues", "issue_status_logs"): ("many", "issue_id"),
+        }
+
+    def table(self, name):
+        try:
+            return self.tables[name]
+        except KeyError:
+            raise APIError(404, {"code": "42P01", "message": f'relation "{name}" does not exist'})
+
+    # --- reads
+
+    def _project(self, table_name, row, columns):
+        if not columns or columns == ["*"]:
+            return dict(row)
+        result = {}
+        for column in columns:
+            match = re.match(r"(?:(\w+):)?(\w+)\((.*)\)$", column, re.S)
+            if not match:
+                if column == "*":
+                    result.update(row)
+                else:
+                    result[column] = row.get(column)
+                continue
+            alias, embedded, inner = match.groups()
+            cardinality, key = self.relations[(table_name, embedded)]
+            inner_columns = _split_top(inner)
+            if cardinality == "one":
+                parent = self.table(embedded).get(row.get(key))
+                value = self._project(embedded, parent, inner_columns) if parent else None
+            else:
+                value = [
+                    self._project(embedded, child, inner_columns)
+                    for child in self.table(embedded).for_issue(row["id"])
+                ]
+            result[alias or embedded] = value
+        return result
+
+    def select(self, table_name, params):
+        table = self.table(table_name)
+        query = dict(params)
+        filters = parse_filters(params)
+        order = parse_order(query.get("order"))
+        limit = int(query["limit"]) if "limit" in query else None
+        offset = int(query.get("offset", 0))
+
+        if isinstance(table, IssueTable):
+            candidates, ordered = table.iter_ordered(filters, order)
+        else:
+            candidates, ordered = table.scan(filters, order), not order
+        found = (row for row in candidates if all(matches(row, f) for f in filters))
+        if ordered:
+            rows = []
+            for row in found:
+                rows.append(row)
+                if limit is not None and len(rows) >= offset + limit:
+                    break
+        else:
+            rows = sort_rows(list(found), order)
+        rows = rows[offset : None if limit is None else offset + limit]
+        columns = _split_top(query.get("select", "*"))
+        return [self._project(table_name, row, columns) for row in rows]
+
+    # --- writes
+
+    @staticmethod
+    def _values(row):
+        return {key: now() if value == "now()" else value for key, value in row.items()}
+
+    def insert(self, table_name, rows, on_conflict=None, merge=False):
+        table = self.table(table_name)
+        written = []
+        for row in rows if isinstance(rows, list) else [rows]:
+            row = self._values(row)
+            keys = on_conflict or table.unique
+            existing = (
+                table.find(**{key: row.get(key) for key in keys}) if keys else []
+            )
+            if existing:
+                if not merge:
+                    raise APIError(409, {"code": "23505", "message": "duplicate key value"})
+                written.append(table.update(existing[0], row))
+            else:
+                written.append(table.insert(row))
+        return written
+
+    def update(self, table_name, params, changes):
+        table = self.table(table_name)
+        changes = self._values(changes)
+        rows = self.select(table_name, [*params, ("select", "*")])
+        written = []
+        for row in rows:
+            original = table.get(row["id"]) if not isinstance(table, ChildTable) else row
+            written.append(table.update(original, changes))
+        return written
+
+    # --- rpc (sql/)
+
+    def _issue_json(self, issue):
+        return self._project(
+            "issues",
+            issue,
+            [
+                "*",
+                "categories(name)",
+                "users_table(first_name,last_name)",
+                "issue_photos(image_url)",
+                "issue_status_logs(status,changed_at)",
+            ],
+        )
+
+    def create_issue(self, p_title, p_description, p_category, p_user_id, p_latitude,
+                     p_longitude, p_image_urls=()):
+        categories = self.tables["categories"].find(name=p_category)
+        if not categories:
+            raise APIError(400, {"code": "P0001", "message": f"Category '{p_category}' not found"})
+        created_at = now()
+        lat_key, lng_key = geocode_key(p_latitude, p_longitude)
+        cached = self.tables["geocode_cache"].find(lat_key=lat_key, lng_key=lng_key)
+        issue = self.issues.insert(
+            {
+                "title": p_title,
+                "description": p_description,
+                "category_id": categories[0]["id"],
+                "user_id": p_user_id,
+                "latitude": p_latitude,
+                "longitude": p_longitude,
+                "address": cached[0]["address"] if cached else None,
+                "status": "Reported",
+                "priority": "Medium",
+                "is_anonymous": False,
+                "report_count": 1,
+                "flag_count": 0,
+                "is_hidden": False,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+        )
+        self.tables["issue_status_logs"].insert(
+            {"issue_id": issue["id"], "status": "Reported", "changed_at": created_at}
+        )
+        for url in p_image_urls or ():
+            self.tables["issue_photos"].insert(
+                {"issue_id": issue["id"], "image_url": url, "uploaded_at": created_at}
+            )
+        return self._issue_json(issue)
+
+    def import_issues(self, p_issues):
+        # One transaction: a bad row fails the whole call, as in sql/013
+        users = self.tables["users_table"]
+        for item in p_issues:
+            if users.get(item["user_id"]) is None:
+                raise APIError(409, {"code": "23503", "message": "insert or update on table "
+                                     "\"issues\" violates foreign key constraint"})
+        for item in p_issues:
+            created_at = item.get("created_at") or now()
+            issue = self.issues.insert(
+                {
+                    **{key: item[key] for key in ("title", "description", "category_id",
+                                                  "user_id", "latitude", "longitude",
+                                                  "is_anonymous", "status")},
+                    "address": None,
+                    "priority": "Medium",
+                    "report_count": 1,
+                    "flag_count": 0,
+                    "is_hidden": False,
+                    "created_at": created_at,
+                    "updated_at": item.get("updated_at") or created_at,
+                }
+            )
+            for log in item.get("status_logs") or ():
+                self.tables["issue_status_logs"].insert(
+                    {"issue_id": issue["id"], "status": log["status"],
+                     "changed_at": log.get("changed_at") or now()}
+                )
+            for url in item.get("image_urls") or ():
+                self.tables["issue_photos"].insert(
+                    {"issue_id": issue["id"], "image_url": url, "uploaded_at": now()}
+                )
+        return len(p_issues)
+
+    def add_issue_report(self, p_issue_id, p_user_id, p_image_urls=()):
+        issue = self.issues.get(p_issue_id)
+        if issue is None:
+            raise APIError(400, {"code": "P0001", "message": f"Issue {p_issue_id} not found"})
+        counted = False
+        reports = self.tables["issue_reports"]
+        if issue["user_id"] != p_user_id and not reports.find(issue_id=issue["id"], user_id=p_user_id):
+            reports.insert({"issue_id": issue["id"], "user_id": p_user_id, "reported_at": now()})
+            issue = self.issues.update(issue, {"report_count": issue["report_count"] + 1})
+            for url in p_image_urls or ():
+                self.tables["issue_photos"].insert(
+                    {"issue_id": issue["id"], "image_url": url, "uploaded_at": now()}
+                )
+            counted = True
+        return {
+            **{key: issue[key] for key in ("id", "title", "status", "category_id", "latitude",
+                                           "longitude", "report_count")},
+            "counted": counted,
+        }
+
+    def flag_issue(self, p_issue_id, p_user_id, p_hide_threshold):
+        issue = self.issues.get(p_issue_id)
+        if issue is None:
+            return None
+        flags = self.tables["flags"]
+        flagged = not flags.find(issue_id=issue["id"], flagged_by=p_user_id)
+        if flagged:
+            flags.insert({"issue_id": issue["id"], "flagged_by": p_user_id, "flagged_at": now()})
+            count = issue["flag_count"] + 1
+            issue = self.issues.update(
+                issue, {"flag_count": count, "is_hidden": issue["is_hidden"] or count >= p_hide_threshold}
+            )
+        return {
+            **{key: issue[key] for key in ("id", "category_id", "latitude", "longitude",
+                                           "flag_count", "is_hidden")},
+            "flagged": flagged,
+        }
+
+    def update_issues(self, p_changes):
+        updated = {}
+        for change in p_changes:
+            issue = self.issues.get(change["id"])
+            if issue is None:
+                continue
+            old_status = issue["status"]
+            issue = self.issues.update(
+                issue,
+                {
+                    "status": change.get("status") or issue["status"],
+                    "priority": change.get("priority") or issue["priority"],
+                    "updated_at": now(),
+                },
+            )
+            if issue["status"] != old_status:
+                self.tables["issue_status_logs"].insert(
+                    {"issue_id": issue["id"], "status": issue["status"], "changed_at": now()}
+                )
+            updated[issue["id"]] = dict(issue)
+        return list(updated.values())
+
+    def fill_issue_addresses(self):
+        cache = self.tables["geocode_cache"]
+        filled = 0
+        issues, _ = self.issues.iter_ordered([], [])
+        for issue in issues:
+            if issue.get("address") is not None or issue.get("latitude") is None:
+                continue
+            lat_key, lng_key = geocode_key(issue["latitude"], issue["longitude"])
+            cached = cache.find(lat_key=lat_key, lng_key=lng_key)
+            if cached and cached[0]["address"] is not None:
+                self.issues.update(issue, {"address": cached[0]["address"]})
+                filled += 1
+        return filled
+
+    def rpc(self, name, params):
+        functions = {
+            "create_issue": self.create_issue,
+            "add_issue_report": self.add_issue_report,
+            "import_issues": self.import_issues,
+            "fill_issue_addresses": self.fill_issue_addresses,
+            "flag_issue": self.flag_issue,
+            "update_issues": self.update_issues,
+        }
+        if name not in functions:
+            raise APIError(404, {"code": "PGRST202", "message": f"Could not find the function {name}"})
+        return functions[name](**params)
+
+
+class Auth:
+    """Password and refresh-token sessions for the users in ``users_table``."""
+
+    def __init__(self, database, secret):
+        self.users = database.tables["users_table"]
+        self.secret = secret
+        self.refresh_tokens = {}
+        self._lock = threading.Lock()
+
+    def user_json(self, row):
+        return {
+            "id": auth_user_id(row["email"]),
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": row["email"],
+            "app_metadata": {"provider": "email", "providers": ["email"]},
+            "user_metadata": {},
+            "created_at": row["created_at"],
+            "email_confirmed_at": row["created_at"],
+        }
+
+    def access_token(self, row):
+        issued_at = int(time.time())
+        return jwt.encode(
+            {
+                "sub": auth_user_id(row["email"]),
+                "email": row["email"],
+                "aud": "authenticated",
+                "role": "authenticated",
+                "iat": issued_at,
+                "exp": issued_at + ACCESS_TOKEN_TTL,
+                "app_metadata": {"provider": "email"},
+                "user_metadata": {},
+            },
+            self.secret,
+            algorithm="HS256",
+        )
+
+    def session(self, row):
+        refresh_token = f"{random.getrandbits(96):024x}"
+        with self._lock:
+            self.refresh_tokens[refresh_token] = row["email"]
+        return {
+            "access_token": self.access_token(row),
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": ACCESS_TOKEN_TTL,
+            "expires_at": int(time.time()) + ACCESS_TOKEN_TTL,
+            "user": self.user_json(row),
+        }
+
+    def _invalid(self):
+        return APIError(400, {"code": 400, "error_code": "invalid_credentials",
+                              "msg": "Invalid login credentials"})
+
+    def token(self, grant_type, body):
+        if grant_type == "password":
+            rows = self.users.find(email=(body.get("email") or "").lower())
+            if not rows or body.get("password") != PASSWORD:
+                raise self._invalid()
+            return self.session(rows[0])
+        if grant_type == "refresh_token":
+            with self._lock:
+                email = self.refresh_tokens.pop(body.get("refresh_token"), None)
+            if email is None:
+                raise APIError(400, {"code": 400, "error_code": "refresh_token_not_found",
+                                     "msg": "Invalid Refresh Token: Refresh Token Not Found"})
+            return self.session(self.users.find(email=email)[0])
+        raise APIError(400, {"code": 400, "msg": f"Unsupported grant type {grant_type}"})
+
+    def user(self, authorization):
+        try:
+            claims = jwt.decode(
+                authorization.removeprefix("Bearer "), self.secret,
+                algorithms=["HS256"], audience="authenticated",
+            )
+            return self.user_json(self.users.find(email=claims["email"])[0])
+        except (jwt.PyJWTError, KeyError, IndexError):
+            raise APIError(401, {"code": 401, "error_code": "bad_jwt", "msg": "invalid JWT"})
+
+
+class FakeSupabase(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, dataset, jwt_secret, latency_ms=0.0, jitter_ms=0.0):
+        super().__init__(address, Handler)
+        self.base_url = f"http://{address[0]}:{self.server_address[1]}"
+        self.database = Database(dataset, self.base_url)
+        self.auth = Auth(self.database, jwt_secret)
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.calls = Counter()
+        self._calls_lock = threading.Lock()
+
+    def count(self, route):
+        with self._calls_lock:
+            self.calls[route] += 1
+
+    def stats(self):
+        with self._calls_lock:
+            return {"total": sum(self.calls.values()), "calls": dict(self.calls)}
+
+    def reset(self):
+        with self._calls_lock:
+            self.calls.clear()
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=()):
+        payload = b"" if body is None and status == 204 else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def _handle(self, method):
+        url = urlsplit(self.path)
+        params = parse_qsl(url.query, keep_blank_values=True)
+        server = self.server
+        try:
+            if url.path.startswith("/__bench__/"):
+                return self._send(200, self._bench(method, url.path))
+
+            parts = url.path.strip("/").split("/")
+            route = "/".join(parts[:4] if parts[2:3] == ["rpc"] else parts[:3])
+            server.count(f"{method} /{route}")
+            server.delay()
+            body = self._body() if method != "GET" else None
+
+            if parts[:2] == ["auth", "v1"]:
+                return self._send(200, self._auth(method, parts[2:], dict(params), body))
+            if parts[:2] != ["rest", "v1"] or len(parts) < 3:
+                raise APIError(404, {"message": f"No route for {url.path}"})
+
+            database = server.database
+            prefer = self.headers.get("Prefer", "")
+            with database.lock:
+                if parts[2] == "rpc":
+                    result = database.rpc(parts[3], body or {})
+                elif method == "GET":
+                    result = database.select(parts[2], params)
+                elif method == "POST":
+                    on_conflict = dict(params).get("on_conflict")
+                    result = database.insert(
+                        parts[2],
+                        body,
+                        on_conflict=on_conflict.split(",") if on_conflict else None,
+                        merge="merge-duplicates" in prefer,
+                    )
+                else:
+                    result = database.update(parts[2], params, body)
+
+            if "return=minimal" in prefer:
+                return self._send(201 if method == "POST" else 204)
+            if "vnd.pgrst.object" in self.headers.get("Accept", ""):
+                if len(result) != 1:
+                    raise APIError(406, {
+                        "code": "PGRST116",
+                        "details": f"The result contains {len(result)} rows",
+                        "hint": None,
+                        "message": "JSON object requested, multiple (or no) rows returned",
+                    })
+                result = result[0]
+            self._send(201 if method == "POST" and parts[2] != "rpc" else 200, result)
+        except APIError as e:
+            self._send(e.status, e.body)
+        except (TypeError, ValueError, KeyError) as e:
+            self._send(400, {"code": "PGRST100", "message": f"{type(e).__name__}: {e}"})
+
+    def _auth(self, method, parts, params, body):
+        auth = self.server.auth
+        if parts == ["token"] and method == "POST":
+            return auth.token(params.get("grant_type"), body or {})
+        if parts == ["user"] and method == "GET":
+            return auth.user(self.headers.get("Authorization", ""))
+        if parts == ["logout"]:
+            return {}
+        if parts == ["health"] and method == "GET":
+            return {"name": "GoTrue", "description": "benchmark stand-in"}
+        raise APIError(404, {"code": 404, "msg": f"Unsupported auth endpoint {'/'.join(parts)}"})
+
+    def _bench(self, method, path):
+        if path == "/__bench__/stats":
+            return self.server.stats()
+        if path == "/__bench__/reset" and method == "POST":
+            self.server.reset()
+            return {}
+        return {"ok": True, "size": self.server.database.dataset.size}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--size", choices=SIZES, default="1k")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every API call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="+/- random spread of the latency")
+    parser.add_argument("--jwt-secret", required=True)
+    args = parser.parse_args(argv)
+
+    server = FakeSupabase(
+        (args.host, args.port),
+        Dataset(SIZES[args.size], seed=args.seed),
+        args.jwt_secret,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+    )
+    print(f"Fake Supabase with {args.size} issues on {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
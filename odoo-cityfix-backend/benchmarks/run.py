@@ -0,0 +1,359 @@
+"""Load-test the backend against the fake Supabase and compare with a baseline.
+
+    python -m benchmarks.run --size 100k --concurrency 32 --duration 30 --save main
+    python -m benchmarks.run --size 100k --concurrency 32 --duration 30 --compare main
+
+Starts ``fake_supabase`` and the backend (``runserver`` by default, or any
+``--app-command``), primes each scenario once (lazy indexes load on first
+use), then drives it from ``--concurrency`` clients for ``--duration``
+seconds. For each scenario it reports throughput, p50/p95/p99 latency,
+upstream API calls per request (counted by the fake server) and the
+backend's peak RSS so far. A request counts as successful only with a 200
+status, since the views report their errors with 201.
+
+``--save NAME`` writes the results to baselines/NAME.json; ``--compare
+NAME`` exits with status 1 when a scenario's p95 or throughput is more than
+``--max-regression`` worse than the baseline, or it makes more upstream
+calls per request.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import jwt
+
+from .dataset import CATEGORIES, PASSWORD, SIZES, Dataset, auth_user_id, issue_text, random_location, user_email
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BASELINES_DIR = Path(__file__).resolve().parent / "baselines"
+
+JWT_SECRET = "benchmark-secret-benchmark-secret-0123"
+FEED_MAX_DEPTH = 5
+STARTUP_TIMEOUT = 60
+# The first request of a scenario may load an index over the whole dataset
+PRIME_TIMEOUT = 600
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def peak_rss_mb(pid):
+    """High-water RSS of a process from /proc, or None off Linux."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, timeout, process=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"{process.args[0]} exited with {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+class Scenarios:
+    """One request per call, as a (path, JSON body) pair, for a random user."""
+
+    names = ("login", "feed", "details", "report", "spam")
+
+    def __init__(self, dataset, rng):
+        self.dataset = dataset
+        self.rng = rng
+
+    def user(self):
+        return self.rng.randrange(1, self.dataset.users + 1)
+
+    def issue(self):
+        return self.rng.randrange(1, self.dataset.size + 1)
+
+    def login(self, state):
+        return "/login/", {"email": user_email(self.user()), "password": PASSWORD}
+
+    def feed(self, state):
+        # Most visits read the first page, some scroll a few pages down
+        cursor = state.get("cursor")
+        if not cursor or state.get("depth", 0) >= FEED_MAX_DEPTH or self.rng.random() < 0.5:
+            cursor, state["depth"] = None, 0
+        state["depth"] = state.get("depth", 0) + 1
+        return "/issues/", {"limit": 20, "cursor": cursor}
+
+    def details(self, state):
+        return "/get-issue-details/", {"issue": self.issue()}
+
+    def report(self, state):
+        category = self.rng.choice(CATEGORIES)
+        _, description = issue_text(self.rng, category)
+        lat, lng = random_location(self.rng)
+        form = {"description": description, "category": category,
+                "location": {"lat": lat, "lng": lng}, "images": []}
+        return "/report-new-issue/", {"formData": form}
+
+    def spam(self, state):
+        return "/report-spam/", {"issue": self.issue()}
+
+    @staticmethod
+    def observe(name, state, response):
+        if name == "feed" and response.status_code == 200:
+            state["cursor"] = response.json().get("next_cursor")
+
+
+def access_token(user_id):
+    email = user_email(user_id)
+    now = int(time.time())
+    return jwt.encode(
+        {"sub": auth_user_id(email), "email": email, "aud": "authenticated",
+         "role": "authenticated", "iat": now, "exp": now + 6 * 3600},
+        JWT_SECRET,
+        algorithm="HS256",
+    )
+
+
+async def drive(base_url, scenarios, name, concurrency, duration, seed):
+    """Run ``name`` from ``concurrency`` clients; return ``(latencies, errors)``."""
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async def client(index, http):
+        nonlocal errors
+        rng = random.Random(seed * 1000 + index)
+        worker = Scenarios(scenarios.dataset, rng)
+        headers = {"Authorization": f"Bearer {access_token(worker.user())}"}
+        state = {}
+        while time.monotonic() < deadline:
+            path, body = getattr(worker, name)(state)
+            started = time.perf_counter()
+            try:
+                response = await http.post(path, json=body, headers=headers)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+            Scenarios.observe(name, state, response)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as http:
+        await asyncio.gather(*(client(index, http) for index in range(concurrency)))
+    return latencies, errors
+
+
+def run_scenario(args, app, fake_url, base_url, name):
+    scenarios = Scenarios(Dataset(SIZES[args.size], seed=args.seed), random.Random(args.seed))
+    headers = {"Authorization": f"Bearer {access_token(1)}"}
+    path, body = getattr(scenarios, name)({})
+    httpx.post(base_url + path, json=body, headers=headers, timeout=PRIME_TIMEOUT)
+
+    httpx.post(f"{fake_url}/__bench__/reset")
+    started = time.perf_counter()
+    latencies, errors = asyncio.run(
+        drive(base_url, scenarios, name, args.concurrency, args.duration, args.seed)
+    )
+    elapsed = time.perf_counter() - started
+    upstream = httpx.get(f"{fake_url}/__bench__/stats").json()
+
+    latencies.sort()
+    count = len(latencies)
+    milliseconds = lambda value: None if value is None else round(value * 1000, 2)  # noqa: E731
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / elapsed, 1),
+        "p50_ms": milliseconds(percentile(latencies, 0.50)),
+        "p95_ms": milliseconds(percentile(latencies, 0.95)),
+        "p99_ms": milliseconds(percentile(latencies, 0.99)),
+        "mean_ms": milliseconds(sum(latencies) / count if count else None),
+        "upstream_calls_per_request": round(upstream["total"] / count, 2) if count else None,
+        "upstream_calls": upstream["calls"],
+        "peak_rss_mb": peak_rss_mb(app.pid),
+    }
+
+
+def start_servers(args, log):
+    fake_port, app_port = free_port(), free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    base_url = f"http://127.0.0.1:{app_port}"
+
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_supabase", "--port", str(fake_port),
+         "--size", args.size, "--seed", str(args.seed), "--jwt-secret", JWT_SECRET,
+         "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms)],
+        cwd=BACKEND_DIR, stdout=log, stderr=log,
+    )
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "benchmarks.settings",
+        "SECRET_KEY": "benchmark",
+        "DEBUG": "",
+        "SUPABASE_URL": fake_url,
+        "SUPABASE_KEY": jwt.encode({"role": "anon"}, JWT_SECRET, algorithm="HS256"),
+        "JWT_SECRET": JWT_SECRET,
+        "JWT_ALGORITHM": "HS256",
+        "PYTHONPATH": str(BACKEND_DIR),
+    }
+    command = args.app_command.format(python=sys.executable, port=app_port).split()
+    app = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=log)
+    try:
+        wait_for(f"{fake_url}/__bench__/health", STARTUP_TIMEOUT, fake)
+        wait_for(f"{base_url}/metrics/", STARTUP_TIMEOUT, app)
+    except Exception:
+        stop(app, fake)
+        raise
+    return fake, app, fake_url, base_url
+
+
+def stop(*processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, max_regression):
+    """Human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before or not current["requests"] or not before["requests"]:
+            continue
+        if current["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {current['p95_ms']} ms")
+        if current["throughput_rps"] < before["throughput_rps"] * (1 - max_regression):
+            regressions.append(
+                f"{name}: throughput {before['throughput_rps']} -> {current['throughput_rps']} req/s"
+            )
+        if current["upstream_calls_per_request"] > before["upstream_calls_per_request"] + 0.05:
+            regressions.append(
+                f"{name}: upstream calls/request {before['upstream_calls_per_request']}"
+                f" -> {current['upstream_calls_per_request']}"
+            )
+    return regressions
+
+
+def print_table(results):
+    columns = ("requests", "errors", "throughput_rps", "p50_ms", "p95_ms", "p99_ms",
+               "upstream_calls_per_request", "peak_rss_mb")
+    headers = ("scenario", "reqs", "errors", "req/s", "p50 ms", "p95 ms", "p99 ms", "upstream/req", "rss MB")
+    rows = [headers] + [
+        (name, *(str(stats[column]) for column in columns))
+        for name, stats in results["scenarios"].items()
+    ]
+    widths = [max(len(row[index]) for row in rows) for index in range(len(headers))]
+    for row in rows:
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", choices=SIZES, default="1k")
+    parser.add_argument("--scenarios", default=",".join(Scenarios.names))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20, help="seconds per scenario")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="per upstream API call")
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--app-command",
+        default="{python} manage.py runserver --noreload 127.0.0.1:{port}",
+        help="how to start the backend; {python} and {port} are filled in",
+    )
+    parser.add_argument("--log", default="benchmark.log", help="server output")
+    parser.add_argument("--save", metavar="NAME", help="write the results to baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare with baselines/NAME.json")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(Scenarios.names)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {
+        "meta": {
+            "size": args.size,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "app_command": args.app_command,
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "run_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "scenarios": {},
+    }
+    with open(args.log, "a") as log:
+        fake, app, fake_url, base_url = start_servers(args, log)
+        try:
+            for name in names:
+                print(f"{name}...", file=sys.stderr, flush=True)
+                results["scenarios"][name] = run_scenario(args, app, fake_url, base_url, name)
+        finally:
+            stop(app, fake)
+
+    print_table(results)
+    if args.save:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        path = BASELINES_DIR / f"{args.save}.json"
+        path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Saved {path}")
+    if args.compare:
+        baseline = json.loads((BASELINES_DIR / f"{args.compare}.json").read_text())
+        if baseline["meta"]["size"] != args.size:
+            print(f"Warning: the baseline was run with --size {baseline['meta']['size']}")
+        regressions = compare(results, baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
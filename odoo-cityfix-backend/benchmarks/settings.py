@@ -0,0 +1,9 @@
+"""Backend settings for benchmark runs: the app as deployed, minus what would skew it."""
+
+from hackthon_Demo_backend.settings import *  # noqa: F401,F403
+
+# Load tests come from one address and a handful of users
+RATE_LIMITS = {}
+
+# No third-party geocoder; addresses are still cached the usual way
+GEOCODER = "hackthon_Demo_backend.geocoding.StubGeocoder"
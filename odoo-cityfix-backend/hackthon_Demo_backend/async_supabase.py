@@ -0,0 +1,98 @@
+import asyncio
+import weakref
+
+import httpx
+from django.conf import settings
+from supabase import AsyncClientOptions, ClientOptions, acreate_client, create_client
+
+from .metrics import AsyncTimedTransport, TimedTransport
+
+
+def connection_limits():
+    """Keep-alive pool limits shared by every client, sized by SUPABASE_MAX_CONNECTIONS."""
+    return httpx.Limits(
+        max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.SUPABASE_MAX_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def create_http_client():
+    """A sync httpx client over a keep-alive pool; every request through it is timed."""
+    return httpx.Client(
+        transport=TimedTransport(httpx.HTTPTransport(limits=connection_limits())),
+        timeout=httpx.Timeout(60.0, connect=5.0),
+    )
+
+
+# httpx async clients are bound to the event loop that created them
+_http_clients = weakref.WeakKeyDictionary()
+_clients = weakref.WeakKeyDictionary()
+_auth_clients = weakref.WeakKeyDictionary()
+
+
+def _loop_http_client(loop):
+    http_client = _http_clients.get(loop)
+    if http_client is None:
+        # Every call is timed for Server-Timing and /metrics/
+        http_client = httpx.AsyncClient(
+            transport=AsyncTimedTransport(httpx.AsyncHTTPTransport(limits=connection_limits())),
+            timeout=httpx.Timeout(10.0, connect=5.0),
+        )
+        _http_clients[loop] = http_client
+    return http_client
+
+
+async def _loop_client(clients):
+    loop = asyncio.get_running_loop()
+    client = clients.get(loop)
+    if client is None:
+        client = await acreate_client(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_KEY,
+            options=AsyncClientOptions(
+                httpx_client=_loop_http_client(loop),
+                auto_refresh_token=False,
+                persist_session=False,
+            ),
+        )
+        client = clients.setdefault(loop, client)
+    return client
+
+
+async def get_async_supabase():
+    """Return this event loop's Supabase client, for data and storage calls.
+
+    Every sub-client (PostgREST, auth, storage) shares one keep-alive httpx
+    connection pool, sized by SUPABASE_MAX_CONNECTIONS.
+    """
+    return await _loop_client(_clients)
+
+
+async def get_async_auth():
+    """Return this event loop's auth client, for sign-in, refresh and token checks.
+
+    It belongs to a Supabase client of its own, on the same connection pool:
+    supabase-py puts a signed-in or refreshed user's token on its client's
+    PostgREST and storage calls, which the shared client must never carry.
+    """
+    return (await _loop_client(_auth_clients)).auth
+
+
+def create_supabase_client(http_client=None):
+    """A sync Supabase client whose calls are timed like the async one's.
+
+    Most code should use ``clients.supabase``, the process-wide instance,
+    rather than building its own.
+    """
+    if http_client is None:
+        http_client = create_http_client()
+    return create_client(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_KEY,
+        options=ClientOptions(
+            httpx_client=http_client,
+            auto_refresh_token=False,
+            persist_session=False,
+        ),
+    )
@@ -0,0 +1,532 @@
+"""Async versions of the Supabase-bound views, served when ASYNC_VIEWS is on.
+
+They share one pooled async client per event loop, so an in-flight
+PostgREST round-trip no longer holds a worker thread, and independent
+queries run concurrently. With DATA_BACKEND=postgres, the queries the sync
+views send over the direct connections (``repository``) go there too, run
+in a worker thread since psycopg's pool is synchronous.
+"""
+
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from . import repository
+from .async_supabase import get_async_supabase
+from .events import (
+    ISSUE_CREATED,
+    ISSUE_FLAGGED,
+    get_broker,
+    parse_bbox,
+    parse_sequence,
+    publish_issue_event,
+    sse_stream,
+    sse_stream_blocking,
+)
+from .geo_index import parse_nearby_params
+from .permissions import aget_admin, aget_user_id
+from .responses import JsonResponse
+from .projections import (
+    ISSUE_DETAIL_SELECT,
+    STATUS_LOG_SELECT,
+    parse_fields,
+    select_for,
+    wants,
+)
+from .issue_feed import InvalidCursor, issue_page_query, split_page
+from .issue_writes import add_report_params, create_issue_params, flag_issue_params
+from .stats import (
+    build_stats,
+    resolution_histogram_query,
+    stat_counts_query,
+    stats_cutoffs,
+)
+from .dedup import (
+    candidates_query,
+    find_duplicates,
+    is_open_issue,
+    open_issue_query,
+    parse_duplicate_of,
+    with_scores,
+)
+from .search import parse_search_params, with_search_scores
+from .views import (
+    category_registry,
+    geocode_cache,
+    issue_cache,
+    issue_locations,
+    issue_texts,
+    search_index,
+    thumbnail_worker,
+    use_direct_db,
+)
+
+logger = logging.getLogger(__name__)
+
+# The registry loads from the database on a miss, so keep it off the event loop
+resolve_category = sync_to_async(category_registry.resolve, thread_sensitive=False)
+attach_category_names = sync_to_async(
+    category_registry.attach_names, thread_sensitive=False
+)
+# Cache misses go to the geocoder and the geocode_cache table
+resolve_address = sync_to_async(geocode_cache.resolve, thread_sensitive=False)
+# Some brokers publish over the database
+publish_event = sync_to_async(publish_issue_event, thread_sensitive=False)
+
+
+async def _in_db(function, *args):
+    """Run a ``repository`` function off the event loop."""
+    return await sync_to_async(function, thread_sensitive=False)(*args)
+
+
+def _with_tokens(request, data):
+    access = getattr(request, "access", None)
+    refresh = getattr(request, "refresh", None)
+    if access and refresh:
+        data["access"] = access
+        data["refresh"] = refresh
+    return data
+
+
+@csrf_exempt
+async def list_issues(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        data = json.loads(request.body)
+        supabase = await get_async_supabase()
+        # Only admins see issues hidden by spam flags
+        include_hidden = bool(data.get("include_hidden")) and bool(
+            await aget_admin(supabase, request)
+        )
+        try:
+            fields = parse_fields(data.get("fields"))
+            query, limit = issue_page_query(
+                supabase,
+                cursor=data.get("cursor"),
+                limit=data.get("limit"),
+                category_id=await resolve_category(data.get("category")),
+                status=data.get("status"),
+                since=data.get("since"),
+                until=data.get("until"),
+                include_hidden=include_hidden,
+                fields=fields,
+            )
+        except InvalidCursor as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=201)
+
+        issues, next_cursor = split_page((await query.execute()).data, limit)
+        if wants(fields, "categories"):
+            await attach_category_names(issues)
+        data = {"issues": issues, "next_cursor": next_cursor}
+        return JsonResponse(_with_tokens(request, data), status=200)
+
+    except Exception:
+        logger.exception("list_issues failed")
+        return JsonResponse({"error": "Failed to fetch issues"}, status=201)
+
+
+@csrf_exempt
+async def nearby_issues(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        data = json.loads(request.body)
+        try:
+            params = await sync_to_async(parse_nearby_params, thread_sensitive=False)(
+                data, category_registry
+            )
+            fields = parse_fields(data.get("fields"))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=201)
+
+        # A stale index is rebuilt synchronously, so keep that off the event loop
+        matches = await sync_to_async(issue_locations.query, thread_sensitive=False)(
+            **params
+        )
+        issues = []
+        if matches:
+            supabase = await get_async_supabase()
+            rows = (
+                await supabase.table("issues")
+                .select(select_for(fields))
+                .in_("id", [issue_id for _, issue_id in matches])
+                .execute()
+            ).data
+            by_id = {row["id"]: row for row in rows}
+            for distance, issue_id in matches:
+                issue = by_id.get(issue_id)
+                if issue:
+                    issue["distance_km"] = round(distance, 3)
+                    issues.append(issue)
+            if wants(fields, "categories"):
+                await attach_category_names(issues)
+
+        return JsonResponse(_with_tokens(request, {"issues": issues}), status=200)
+
+    except Exception:
+        logger.exception("nearby_issues failed")
+        return JsonResponse({"error": "Failed to fetch nearby issues"}, status=201)
+
+
+@csrf_exempt
+async def search_issues(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        data = json.loads(request.body)
+        try:
+            params = await sync_to_async(parse_search_params, thread_sensitive=False)(
+                data, category_registry
+            )
+            fields = parse_fields(data.get("fields"))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=201)
+
+        # Ranking and a stale-index rebuild are CPU bound; keep them off the event loop
+        total, matches = await sync_to_async(search_index.search, thread_sensitive=False)(
+            **params
+        )
+        issues = []
+        if matches:
+            supabase = await get_async_supabase()
+            rows = (
+                await supabase.table("issues")
+                .select(select_for(fields))
+                .in_("id", [issue_id for _, issue_id in matches])
+                .execute()
+            ).data
+            issues = with_search_scores(rows, matches)
+            if wants(fields, "categories"):
+                await attach_category_names(issues)
+
+        next_offset = params["offset"] + len(matches)
+        data = {
+            "issues": issues,
+            "total": total,
+            "next_offset": next_offset if next_offset < total else None,
+        }
+        return JsonResponse(_with_tokens(request, data), status=200)
+
+    except Exception:
+        logger.exception("search_issues failed")
+        return JsonResponse({"error": "Failed to search issues"}, status=201)
+
+
+@csrf_exempt
+async def issue_stats(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        if use_direct_db:
+            count_rows, histogram = await _in_db(repository.get_stat_rows, *stats_cutoffs())
+        else:
+            supabase = await get_async_supabase()
+            counts_resp, histogram_resp = await asyncio.gather(
+                stat_counts_query(supabase, *stats_cutoffs()).execute(),
+                resolution_histogram_query(supabase).execute(),
+            )
+            count_rows, histogram = counts_resp.data, histogram_resp.data
+        stats = await sync_to_async(build_stats, thread_sensitive=False)(
+            count_rows, histogram, category_registry
+        )
+        return JsonResponse(_with_tokens(request, {"stats": stats}), status=200)
+
+    except Exception:
+        logger.exception("issue_stats failed")
+        return JsonResponse({"error": "Failed to fetch statistics"}, status=201)
+
+
+def _status_logs_query(supabase, issue_id):
+    return (
+        supabase.table("issue_status_logs")
+        .select(STATUS_LOG_SELECT)
+        .eq("issue_id", issue_id)
+        .order("changed_at", desc=False)
+    )
+
+
+async def _load_issue_details(issue_id):
+    if use_direct_db:
+        issue, logs = await _in_db(repository.get_issue_with_logs, issue_id)
+        return {"issue": issue, "logs": logs} if issue else None
+
+    supabase = await get_async_supabase()
+    issue_resp, logs_resp = await asyncio.gather(
+        supabase.table("issues")
+        .select(ISSUE_DETAIL_SELECT)
+        .eq("id", issue_id)
+        .single()
+        .execute(),
+        _status_logs_query(supabase, issue_id).execute(),
+    )
+
+    issue = issue_resp.data
+    if not issue:
+        return None
+    await attach_category_names([issue])
+    return {"issue": issue, "logs": logs_resp.data}
+
+
+@csrf_exempt
+async def get_issue_details(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        data = json.loads(request.body)
+        issue_id = data.get("issue")
+
+        if not issue_id:
+            return JsonResponse({"error": "Missing issue ID"}, status=201)
+
+        # Served from the cache until a write to the issue invalidates it
+        doc = await issue_cache.afetch(issue_id, lambda: _load_issue_details(issue_id))
+        if not doc:
+            return JsonResponse({"error": "Issue not found"}, status=201)
+        return JsonResponse(_with_tokens(request, dict(doc)), status=200)
+
+    except Exception:
+        logger.exception("get_issue_details failed")
+        return JsonResponse(
+            {"error": "Authentication check failed", "authenticated": False}, status=201
+        )
+
+
+@csrf_exempt
+async def report_spam(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        data = json.loads(request.body)
+        issue_id = data.get("issue")
+
+        if not issue_id:
+            return JsonResponse({"error": "Missing issue ID"}, status=201)
+
+        supabase = await get_async_supabase()
+        user_id = await aget_user_id(supabase, request)
+        if not user_id:
+            return JsonResponse({"error": "Unknown user"}, status=201)
+        params = flag_issue_params(issue_id, user_id, settings.FLAG_HIDE_THRESHOLD)
+        if use_direct_db:
+            issue = await _in_db(repository.flag_issue, params)
+        else:
+            issue = (await supabase.rpc("flag_issue", params).execute()).data
+        if not issue:
+            return JsonResponse({"error": "Issue not found"}, status=201)
+
+        await issue_cache.ainvalidate(issue["id"])
+        if issue["flagged"]:
+            await publish_event(ISSUE_FLAGGED, issue)
+        if issue["is_hidden"]:
+            issue_locations.remove(issue["id"])
+            issue_texts.remove(issue["id"])
+            search_index.remove(issue["id"])
+
+        data = {"issue": issue}
+        return JsonResponse(_with_tokens(request, data), status=200)
+
+    except Exception:
+        logger.exception("report_spam failed")
+        return JsonResponse(
+            {"error": "Authentication check failed", "authenticated": False}, status=201
+        )
+
+
+@csrf_exempt
+async def report_new_issue(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        data = json.loads(request.body)
+        formData_raw = data.get("formData")
+        formData = (
+            json.loads(formData_raw) if isinstance(formData_raw, str) else formData_raw
+        )
+        if not formData:
+            return JsonResponse({"error": "Missing issue data"}, status=201)
+
+        # Unknown categories are rejected from memory, before any write
+        try:
+            category_id = await resolve_category(formData.get("category"))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=201)
+        supabase = await get_async_supabase()
+        user_id = await aget_user_id(supabase, request)
+        if not user_id:
+            return JsonResponse({"error": "Unknown user"}, status=201)
+        params = create_issue_params(formData, user_id)
+
+        duplicate_of = formData.get("duplicate_of")
+        if duplicate_of:
+            try:
+                duplicate_of = parse_duplicate_of(duplicate_of)
+            except ValueError as e:
+                return JsonResponse({"error": str(e)}, status=201)
+            if use_direct_db:
+                target = await _in_db(repository.get_issue, duplicate_of)
+            else:
+                rows = (await open_issue_query(supabase, duplicate_of).execute()).data
+                target = next(iter(rows), None)
+            if not is_open_issue(target):
+                return JsonResponse({"error": "No open issue to merge into"}, status=201)
+        elif not formData.get("force"):
+            # The indexes rebuild from the database when stale
+            matches = await sync_to_async(find_duplicates, thread_sensitive=False)(
+                issue_locations,
+                issue_texts,
+                params["p_latitude"],
+                params["p_longitude"],
+                category_id,
+                params["p_description"],
+                radius_km=settings.DEDUP_RADIUS_M / 1000,
+                min_score=settings.DEDUP_CANDIDATE_SCORE,
+            )
+            if matches and matches[0]["score"] >= settings.DEDUP_MERGE_SCORE:
+                duplicate_of = matches[0]["id"]
+            elif matches:
+                rows = (await candidates_query(supabase, matches).execute()).data
+                data = {
+                    "message": "Similar issues were already reported nearby",
+                    "duplicates": with_scores(rows, matches),
+                }
+                return JsonResponse(_with_tokens(request, data), status=200)
+
+        if duplicate_of:
+            # A "+1" on the existing issue instead of a new row
+            merge = add_report_params(formData, duplicate_of, user_id)
+            if use_direct_db:
+                issue = await _in_db(repository.add_issue_report, merge)
+            else:
+                issue = (await supabase.rpc("add_issue_report", merge).execute()).data
+            await issue_cache.ainvalidate(duplicate_of)
+            thumbnail_worker.submit(merge["p_image_urls"])
+            data = {"message": "merged", "merged": True, "issue": issue}
+            return JsonResponse(_with_tokens(request, data), status=200)
+
+        # create_issue fills the address from geocode_cache (sql/009)
+        try:
+            await resolve_address(params["p_latitude"], params["p_longitude"])
+        except Exception:
+            logger.exception("Reverse geocoding failed; backfill_addresses will retry")
+
+        # Category lookup, issue, status log and photos are written atomically
+        if use_direct_db:
+            new_issue = await _in_db(repository.create_issue, params)
+        else:
+            new_issue = (await supabase.rpc("create_issue", params).execute()).data
+        if not new_issue:
+            raise Exception("Failed to insert issue")
+        issue_locations.add(new_issue)
+        issue_texts.add(new_issue)
+        search_index.add(new_issue)
+        await publish_event(ISSUE_CREATED, new_issue)
+        thumbnail_worker.submit(params["p_image_urls"])
+
+        data = {"message": "success", "issue": new_issue}
+        return JsonResponse(_with_tokens(request, data), status=200)
+
+    except Exception:
+        logger.exception("report_new_issue failed")
+        return JsonResponse(
+            {"error": "Authentication check failed", "authenticated": False}, status=201
+        )
+
+
+@csrf_exempt
+async def issue_events(request):
+    """Server-Sent Events stream of issue created, status changed and flagged deltas.
+
+    Query parameters: ``category`` and ``bbox`` (``south,west,north,east``)
+    narrow the stream; ``after`` or the ``Last-Event-ID`` header resume it.
+    The access token is passed as the ``access_token`` query parameter. It
+    is not refreshed here: once it expires the stream is refused, and the
+    client refreshes its session and reopens it.
+
+    Under WSGI the stream is a sync iterator read by the worker thread, and
+    is cut after EVENT_WSGI_STREAM_SECONDS so it can't hold the thread for
+    good; the browser reconnects and resumes where it left off.
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Only GET method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        try:
+            category_id = await resolve_category(request.GET.get("category"))
+            bbox = parse_bbox(request.GET.get("bbox"))
+            after = parse_sequence(
+                request.headers.get("Last-Event-ID") or request.GET.get("after")
+            )
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=201)
+
+        if isinstance(request, ASGIRequest):
+            subscription = get_broker().subscribe(
+                after=after, category_id=category_id, bbox=bbox
+            )
+            content = sse_stream(subscription, heartbeat=settings.EVENT_HEARTBEAT)
+        else:
+            # WSGI would read an async generator into a list before sending it
+            subscription = get_broker().subscribe(
+                after=after, category_id=category_id, bbox=bbox, blocking=True
+            )
+            content = sse_stream_blocking(
+                subscription,
+                heartbeat=settings.EVENT_HEARTBEAT,
+                max_seconds=settings.EVENT_WSGI_STREAM_SECONDS,
+            )
+        response = StreamingHttpResponse(content, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    except Exception:
+        logger.exception("issue_events failed")
+        return JsonResponse({"error": "Failed to open event stream"}, status=201)
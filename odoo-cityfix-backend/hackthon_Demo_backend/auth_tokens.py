@@ -0,0 +1,205 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from django.conf import settings
+
+
+class UndecidedToken(Exception):
+    """Raised when a token can't be verified locally and the auth server must decide."""
+
+
+class TokenUser:
+    """User built from verified access-token claims.
+
+    Mirrors the parts of supabase's ``UserResponse`` the views rely on, so
+    ``request.user.user.email`` works whichever way the token was checked.
+    """
+
+    def __init__(self, claims):
+        self.claims = claims
+        self.id = claims.get("sub")
+        self.email = claims.get("email")
+        self.role = claims.get("role")
+        self.app_metadata = claims.get("app_metadata") or {}
+        self.user_metadata = claims.get("user_metadata") or {}
+
+    @property
+    def user(self):
+        return self
+
+
+class TokenCache:
+    """Bounded LRU of validated access tokens, each kept until it or the TTL expires."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user
+
+    def put(self, token, user, expires_at=None):
+        expires_at = min(expires_at or float("inf"), time.time() + self.ttl)
+        with self._lock:
+            self._entries[token] = (user, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, token):
+        with self._lock:
+            self._entries.pop(token, None)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run ``fn`` once per key for concurrent callers and share its result for ``ttl`` seconds.
+
+    Failures are handed to every caller waiting on the flight but are not
+    cached, so the next call tries again.
+    """
+
+    def __init__(self, ttl=30, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._flights = {}
+        self._async_flights = {}
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    _MISSING = object()
+
+    def _cached(self, key):
+        cached = self._results.get(key)
+        if cached is None:
+            return self._MISSING
+        result, expires_at = cached
+        if expires_at > time.time():
+            return result
+        del self._results[key]
+        return self._MISSING
+
+    def _remember(self, key, result):
+        self._results[key] = (result, time.time() + self.ttl)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    def do(self, key, fn):
+        with self._lock:
+            cached = self._cached(key)
+            if cached is not self._MISSING:
+                return cached
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None:
+                    self._remember(key, flight.result)
+            flight.done.set()
+        return flight.result
+
+    async def ado(self, key, fn):
+        """Async counterpart of ``do``; ``fn`` returns an awaitable."""
+        with self._lock:
+            cached = self._cached(key)
+            if cached is not self._MISSING:
+                return cached
+            flight = self._async_flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._async_flights[key] = asyncio.get_running_loop().create_future()
+
+        if not leader:
+            return await asyncio.shield(flight)
+
+        try:
+            result = await fn()
+        except Exception as e:
+            flight.set_exception(e)
+            # Retrieve it so an unawaited failure isn't reported as never retrieved
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            with self._lock:
+                self._remember(key, result)
+            return result
+        finally:
+            if not flight.done():
+                # The leader was cancelled; let the waiters fail rather than hang
+                flight.cancel()
+            with self._lock:
+                del self._async_flights[key]
+
+
+def token_expiry(token):
+    """Return the unverified ``exp`` claim of a token, or None."""
+    try:
+        return jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        return None
+
+
+def verify_access_token(token):
+    """Verify a Supabase access token with the project's JWT secret.
+
+    Returns ``(TokenUser, exp)``. Raises ``jwt.ExpiredSignatureError`` for
+    expired tokens and ``jwt.InvalidTokenError`` for tokens that are definitely
+    bad, and ``UndecidedToken`` when only the auth server can tell (no secret
+    configured, asymmetric signing keys, or a signature from a rotated key).
+    """
+    if not settings.JWT_SECRET:
+        raise UndecidedToken("JWT_SECRET is not configured")
+
+    algorithm = settings.JWT_ALGORITHM or "HS256"
+    if jwt.get_unverified_header(token).get("alg") != algorithm:
+        raise UndecidedToken("Token is not signed with the shared secret")
+
+    try:
+        claims = jwt.decode(
+            token,
+            settings.JWT_SECRET,
+            algorithms=[algorithm],
+            audience=settings.JWT_AUDIENCE,
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.InvalidSignatureError:
+        raise UndecidedToken("Signature does not match the configured secret")
+
+    return TokenUser(claims), claims["exp"]
@@ -0,0 +1,67 @@
+from .reloading import ReloadingIndex
+
+
+def load_categories(supabase):
+    return supabase.table("categories").select("id, name").execute().data
+
+
+class CategoryRegistry(ReloadingIndex):
+    """Process-wide copy of the ``categories`` table.
+
+    Loaded on first use (or by ``warm`` at startup) and reloaded every ``ttl``
+    seconds or after ``invalidate``, in the background like the other
+    indexes (see ``ReloadingIndex``). An unknown name triggers an early
+    reload, at most once per ``miss_reload_interval`` seconds, so categories
+    added in the database show up without waiting for the TTL.
+    """
+
+    thread_name = "category-registry"
+
+    def __init__(self, loader, ttl=3600, miss_reload_interval=60):
+        super().__init__(loader, ttl)
+        self.miss_reload_interval = miss_reload_interval
+        self._by_name = {}
+        self._by_id = {}
+
+    def _build(self):
+        rows = self.loader()
+        by_name = {row["name"]: row["id"] for row in rows}
+        by_id = {row["id"]: row["name"] for row in rows}
+        return by_name, by_id
+
+    def _install(self, index):
+        self._by_name, self._by_id = index
+
+    def _lookup(self, table, key):
+        self._ensure_fresh()
+        value = getattr(self, table).get(key)
+        if value is None:
+            # Waits for a concurrent reload instead of starting another
+            self._rebuild(max_age=self.miss_reload_interval)
+            value = getattr(self, table).get(key)
+        return value
+
+    def id_for(self, name):
+        return self._lookup("_by_name", name)
+
+    def name_for(self, category_id):
+        return self._lookup("_by_id", category_id)
+
+    def resolve(self, name):
+        """Return the id for an optional category filter; raise ValueError if unknown."""
+        if not name:
+            return None
+        category_id = self.id_for(name)
+        if category_id is None:
+            raise ValueError(f"Category '{name}' not found")
+        return category_id
+
+    def names(self):
+        self._ensure_fresh()
+        return sorted(self._by_name)
+
+    def attach_names(self, issues):
+        """Fill ``issue["categories"]`` from memory instead of a PostgREST embed."""
+        for issue in issues:
+            issue["categories"] = {"name": self.name_for(issue.get("category_id"))}
+        return issues
@@ -0,0 +1,164 @@
+"""The process-wide clients for upstream services, created on first use.
+
+Importing a module connects to nothing. The Supabase client and the shared
+httpx client are built the first time something needs them. After that,
+every module reuses them, so all outbound HTTP goes through one pool of
+keep-alive connections. Direct Postgres and Mongo connections stay in
+``db_clients``.
+
+Auth calls go through ``auth``, which belongs to a second Supabase client
+on the same pool. supabase-py reacts to a sign-in or refresh by putting
+that user's token on its client's PostgREST and storage calls. On the
+shared client, that would hand one user's token to every concurrent
+request.
+
+A forked child (a gunicorn worker started with ``--preload``) forgets the
+clients it inherited, because it can't share the parent's sockets. It then
+builds its own, and warms them again if the parent had been warmed.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+import httpx
+from django.conf import settings
+
+from .async_supabase import create_http_client, create_supabase_client
+from .db_clients import close_db_clients, get_pg_pool
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_http = None
+_supabase = None
+_auth_client = None
+# What start_warm_up() was asked to run, so forked workers can repeat it
+_warm_up_tasks = None
+
+
+def get_http_client():
+    """The shared httpx client, for calls the Supabase client doesn't cover."""
+    global _http
+    if _http is None:
+        with _lock:
+            if _http is None:
+                _http = create_http_client()
+    return _http
+
+
+def get_supabase():
+    """The shared sync Supabase client, built over the shared httpx client."""
+    global _supabase
+    if _supabase is None:
+        http_client = get_http_client()
+        with _lock:
+            if _supabase is None:
+                _supabase = create_supabase_client(http_client)
+    return _supabase
+
+
+def get_auth():
+    """The GoTrue client for sign-up, sign-in, refresh and token checks."""
+    global _auth_client
+    if _auth_client is None:
+        http_client = get_http_client()
+        with _lock:
+            if _auth_client is None:
+                _auth_client = create_supabase_client(http_client).auth
+    return _auth_client
+
+
+class _LazySupabase:
+    """Stands in for the Supabase client in modules that hold it as a global."""
+
+    def __getattr__(self, name):
+        if name == "auth":
+            raise AttributeError("Use clients.auth, the shared client must not hold sessions")
+        return getattr(get_supabase(), name)
+
+
+class _LazyAuth:
+    def __getattr__(self, name):
+        return getattr(get_auth(), name)
+
+
+supabase = _LazySupabase()
+auth = _LazyAuth()
+
+
+def _open_supabase_connection():
+    get_http_client().get(
+        f"{settings.SUPABASE_URL}/auth/v1/health",
+        headers={"apikey": settings.SUPABASE_KEY},
+        timeout=5,
+    )
+
+
+def warm_up(*tasks):
+    """Open WARM_CONNECTIONS upstream connections, then run ``tasks``."""
+    started = time.monotonic()
+    if settings.WARM_UP_CLIENTS:
+        get_supabase()
+        # Concurrent requests, so each one opens its own keep-alive connection
+        with ThreadPoolExecutor(settings.WARM_CONNECTIONS) as executor:
+            futures = [
+                executor.submit(_open_supabase_connection)
+                for _ in range(settings.WARM_CONNECTIONS)
+            ]
+        for future in futures:
+            try:
+                future.result()
+            except httpx.HTTPError:
+                logger.warning("Failed to open a Supabase connection", exc_info=True)
+                break
+
+        if settings.DATA_BACKEND == "postgres":
+            count = min(settings.WARM_CONNECTIONS, settings.PG_POOL_MAX_CONNECTIONS)
+            try:
+                # Checked out together, so they are all separate connections
+                with ExitStack() as stack:
+                    for _ in range(count):
+                        stack.enter_context(get_pg_pool().connection())
+            except Exception:
+                logger.warning("Failed to open database connections", exc_info=True)
+
+    for task in tasks:
+        try:
+            task()
+        except Exception:
+            logger.exception("Warm-up task %s failed", getattr(task, "__qualname__", task))
+    logger.info("Warm-up finished in %.0f ms", (time.monotonic() - started) * 1000)
+
+
+def start_warm_up(*tasks):
+    """Run ``warm_up(*tasks)`` in a background thread, so startup isn't held up by it."""
+    global _warm_up_tasks
+    _warm_up_tasks = tasks
+    threading.Thread(target=warm_up, args=tasks, name="warm-up", daemon=True).start()
+
+
+def close():
+    """Close the shared clients and the database connections; runs at exit."""
+    global _http, _supabase, _auth_client
+    with _lock:
+        http_client, _http, _supabase, _auth_client = _http, None, None, None
+    if http_client is not None:
+        http_client.close()
+    close_db_clients()
+
+
+def _forget_after_fork():
+    global _lock, _http, _supabase, _auth_client
+    _lock = threading.Lock()
+    _http = _supabase = _auth_client = None
+    if _warm_up_tasks is not None:
+        start_warm_up(*_warm_up_tasks)
+
+
+os.register_at_fork(after_in_child=_forget_after_fork)
+atexit.register(close)
@@ -1,26 +1,214 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
 from pymongo import MongoClient
 import psycopg2
+import psycopg2.extras
 from django.conf import settings
 
+from .metrics import timed
+
+
+_mongo = None
+_mongo_lock = threading.Lock()
+
 
 def get_mongo_client():
-    client = MongoClient(settings.MONGO_URI)
-    return client
+    """The process-wide MongoClient; it pools its own connections."""
+    global _mongo
+    if _mongo is None:
+        with _mongo_lock:
+            if _mongo is None:
+                _mongo = MongoClient(settings.MONGO_URI)
+    return _mongo
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection:
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        # Names of the statements PREPAREd on this server session
+        self.prepared = set()
+
+    def cursor(self, **kwargs):
+        return self.raw.cursor(**kwargs)
+
+    def execute_prepared(self, name, sql, params=()):
+        """Run ``sql`` (with $1, $2 placeholders) as a server-side prepared statement.
+
+        The statement is planned once per connection and re-executed by name.
+        Returns a RealDictCursor positioned on the results.
+        """
+        cursor = self.raw.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        with timed("postgres"):
+            if name not in self.prepared:
+                cursor.execute(f"PREPARE {name} AS {sql}")
+                self.prepared.add(name)
+            if params:
+                placeholders = ", ".join(["%s"] * len(params))
+                cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+            else:
+                cursor.execute(f"EXECUTE {name}")
+        return cursor
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of psycopg2 connections.
+
+    At most ``maxconn`` connections exist at once; callers wait up to
+    ``timeout`` seconds for a free one. Connections idle for longer than
+    ``health_check_after`` seconds are pinged before being handed out, and
+    connections older than ``max_age`` seconds are closed instead of reused.
+    """
+
+    def __init__(self, connect, maxconn=10, max_age=1800, health_check_after=30, timeout=10):
+        self._connect = connect
+        self.max_age = max_age
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _is_usable(self, conn):
+        if conn.raw.closed:
+            return False
+        if time.monotonic() - conn.created_at > self.max_age:
+            return False
+        if time.monotonic() - conn.last_used > self.health_check_after:
+            try:
+                with conn.raw.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.raw.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return PooledConnection(self._connect())
+            if self._is_usable(conn):
+                return conn
+            self._close(conn)
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.raw.close()
+        except psycopg2.Error:
+            pass
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for one transaction.
+
+        Commits when the block succeeds, rolls back when it raises, and
+        returns the connection to the pool either way.
+        """
+        # Waiting for a free slot and connecting count as their own upstream call
+        with timed("postgres.checkout"):
+            if not self._slots.acquire(timeout=self.timeout):
+                raise PoolTimeout("Timed out waiting for a database connection")
+        conn = None
+        try:
+            with timed("postgres.checkout"):
+                conn = self._checkout()
+            try:
+                yield conn
+                conn.raw.commit()
+            except Exception:
+                if not conn.raw.closed:
+                    conn.raw.rollback()
+                raise
+        finally:
+            if conn is not None:
+                conn.last_used = time.monotonic()
+                broken = (
+                    conn.raw.closed
+                    or conn.raw.get_transaction_status()
+                    != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+                )
+                if broken or time.monotonic() - conn.created_at > self.max_age:
+                    self._close(conn)
+                else:
+                    with self._lock:
+                        self._idle.append(conn)
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn)
+
+
+def _connect():
+    return psycopg2.connect(
+        user=settings.SUPABASE_USER,
+        password=settings.SUPABASE_PASSWORD,
+        host=settings.SUPABASE_HOST,
+        port=settings.SUPABASE_PORT,
+        dbname=settings.DBNAME,
+    )
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pg_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _connect,
+                    maxconn=settings.PG_POOL_MAX_CONNECTIONS,
+                    max_age=settings.PG_POOL_MAX_AGE,
+                    health_check_after=settings.PG_POOL_HEALTH_CHECK_AFTER,
+                    timeout=settings.PG_POOL_TIMEOUT,
+                )
+    return _pool
+
+
+def close_db_clients():
+    """Close the Postgres pool's idle connections and the Mongo client."""
+    global _pool, _mongo
+    pool, _pool = _pool, None
+    mongo, _mongo = _mongo, None
+    if pool is not None:
+        pool.close()
+    if mongo is not None:
+        mongo.close()
+
+
+def _forget_after_fork():
+    # The sockets belong to the parent; closing them here would end its sessions
+    global _pool, _pool_lock, _mongo, _mongo_lock
+    _pool, _pool_lock = None, threading.Lock()
+    _mongo, _mongo_lock = None, threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_after_fork)
 
 
 def get_supabase_client():
-    try:
-        connection = psycopg2.connect(
-            user=settings.SUPABASE_USER,
-            password=settings.SUPABASE_PASSWORD,
-            host=settings.SUPABASE_HOST,
-            port=settings.SUPABASE_PORT,
-            dbname=settings.DBNAME,
-        )
-        return connection
-
-    except Exception as e:
-        print(f"Failed to connect: {e}")
+    """Borrow a pooled connection to the Supabase Postgres database.
+
+    Use as ``with get_supabase_client() as connection:``; the connection goes
+    back to the pool when the block ends.
+    """
+    return get_pg_pool().connection()
 
 
 # cursor = connection.cursor()
@@ -0,0 +1,221 @@
+"""Near-duplicate detection for new reports.
+
+A new report is compared with the open issues of the same category within a
+few tens of metres (found through the spatial ``GridIndex``). Descriptions
+are compared by MinHash signatures of their character shingles, kept in
+memory for every open issue, so scoring a candidate is a signature
+comparison rather than a text diff.
+"""
+
+import random
+import re
+import zlib
+
+from .reloading import ReloadingIndex
+
+OPEN_STATUSES = ("Reported", "In Progress")
+SHINGLE_SIZE = 4
+NUM_PERMUTATIONS = 64
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Character shingles of the lower-cased, punctuation-free text."""
+    text = " ".join(re.findall(r"\w+", (text or "").lower()))
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_permutations=NUM_PERMUTATIONS, seed=1):
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_permutations)
+        ]
+
+    def signature(self, text):
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(text)]
+        if not hashes:
+            return None
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._permutations
+        )
+
+    @staticmethod
+    def similarity(first, second):
+        """Estimated Jaccard similarity of the two shingle sets."""
+        if not first or not second:
+            return 0.0
+        return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+def load_open_issue_texts(supabase, batch_size=1000):
+    last_id = None
+    while True:
+        query = (
+            supabase.table("issues")
+            .select("id, description")
+            .in_("status", list(OPEN_STATUSES))
+            .eq("is_hidden", False)
+        )
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(batch_size).execute().data
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def _digest(description):
+    return zlib.crc32((description or "").encode("utf-8"))
+
+
+class MinHashIndex(ReloadingIndex):
+    """MinHash signatures of every open issue's description.
+
+    Reloaded from ``loader`` in the background like the spatial index (see
+    ``ReloadingIndex``); issues created or closed in this process are
+    applied immediately, including while a reload runs. Signatures are only
+    computed for descriptions the index hasn't seen, so a reload costs one
+    pass over the rows rather than one signature per issue.
+    """
+
+    thread_name = "dedup-index"
+
+    def __init__(self, loader, hasher=None, ttl=300):
+        super().__init__(loader, ttl)
+        self.hasher = hasher or MinHasher()
+        # issue id -> (description digest, signature)
+        self._signatures = {}
+
+    def _build(self):
+        with self._lock:
+            known = dict(self._signatures)
+        signatures = {}
+        for row in self.loader():
+            digest = _digest(row.get("description"))
+            entry = known.get(row["id"])
+            if entry is None or entry[0] != digest:
+                entry = (digest, self.hasher.signature(row.get("description")))
+            signatures[row["id"]] = entry
+        return signatures
+
+    def _install(self, index):
+        self._signatures = index
+
+    def add(self, issue):
+        if issue.get("status", "Reported") not in OPEN_STATUSES:
+            return
+        description = issue.get("description")
+        entry = (_digest(description), self.hasher.signature(description))
+        self._write(self._put, issue["id"], entry)
+
+    def update(self, issue):
+        if issue.get("status") in OPEN_STATUSES:
+            with self._lock:
+                if issue["id"] in self._signatures:
+                    return
+            self.add(issue)
+        else:
+            self.remove(issue["id"])
+
+    def remove(self, issue_id):
+        self._write(self._discard, issue_id)
+
+    def _put(self, issue_id, entry):
+        self._signatures[issue_id] = entry
+
+    def _discard(self, issue_id):
+        self._signatures.pop(issue_id, None)
+
+    def scores(self, issue_ids, description):
+        """Return ``{issue_id: similarity}`` for the given ids that are open."""
+        self._ensure_fresh()
+        signature = self.hasher.signature(description)
+        with self._lock:
+            candidates = {
+                issue_id: self._signatures[issue_id][1]
+                for issue_id in issue_ids
+                if issue_id in self._signatures
+            }
+        return {
+            issue_id: self.hasher.similarity(signature, other)
+            for issue_id, other in candidates.items()
+        }
+
+
+def parse_duplicate_of(value):
+    """The issue id a reporter chose to merge into; raise ValueError."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError("'duplicate_of' must be an issue id")
+    try:
+        issue_id = int(value)
+    except ValueError:
+        raise ValueError("'duplicate_of' must be an issue id")
+    if issue_id < 1:
+        raise ValueError("'duplicate_of' must be an issue id")
+    return issue_id
+
+
+def open_issue_query(supabase, issue_id):
+    return (
+        supabase.table("issues")
+        .select("id, status, is_hidden")
+        .eq("id", issue_id)
+        .in_("status", list(OPEN_STATUSES))
+        .eq("is_hidden", False)
+    )
+
+
+def is_open_issue(issue):
+    """Whether a report may be merged into ``issue`` (a row, or None)."""
+    return bool(issue) and issue.get("status") in OPEN_STATUSES and not issue.get("is_hidden")
+
+
+def find_duplicates(
+    locations, texts, lat, lng, category_id, description, radius_km, min_score
+):
+    """Open issues of the category within ``radius_km`` whose description is similar.
+
+    Returns ``[{"id", "score", "distance_km"}]``, best match first.
+    """
+    nearby = locations.query(
+        lat=lat, lng=lng, radius_km=radius_km, category_id=category_id, limit=50
+    )
+    distances = {issue_id: distance for distance, issue_id in nearby}
+    scores = texts.scores(distances, description)
+    matches = [
+        {
+            "id": issue_id,
+            "score": round(score, 3),
+            "distance_km": round(distances[issue_id], 3),
+        }
+        for issue_id, score in scores.items()
+        if score >= min_score
+    ]
+    matches.sort(key=lambda match: (-match["score"], match["distance_km"]))
+    return matches
+
+
+def candidates_query(supabase, matches):
+    return (
+        supabase.table("issues")
+        .select("id, title, description, status, created_at, report_count")
+        .in_("id", [match["id"] for match in matches])
+    )
+
+
+def with_scores(rows, matches):
+    """Order candidate rows like ``matches`` and add their score and distance."""
+    by_id = {row["id"]: row for row in rows}
+    candidates = []
+    for match in matches:
+        row = by_id.get(match["id"])
+        if row:
+            candidates.append({**row, "score": match["score"], "distance_km": match["distance_km"]})
+    return candidates
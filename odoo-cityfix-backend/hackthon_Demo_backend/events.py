@@ -0,0 +1,341 @@
+"""Issue change events pushed to clients over Server-Sent Events.
+
+Views publish compact deltas (issue created, status changed, flagged) to a
+broker, which numbers them, keeps the most recent ones for clients resuming
+from a sequence number, and hands each one to the subscriptions whose
+category and viewport it matches.
+
+The broker class is set by EVENT_BROKER. ``InProcessBroker`` only reaches
+clients connected to the same process; ``PostgresNotifyBroker`` relays
+events between workers through Postgres LISTEN/NOTIFY.
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import queue
+import select
+import threading
+import time
+
+import psycopg2.extensions
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+from .db_clients import _connect, get_pg_pool
+from .metrics import timed
+
+logger = logging.getLogger(__name__)
+
+ISSUE_CREATED = "issue.created"
+ISSUE_STATUS_CHANGED = "issue.status_changed"
+ISSUE_FLAGGED = "issue.flagged"
+RESET = "reset"
+
+# Every delta carries what subscriptions filter on: category and position
+EVENT_FIELDS = {
+    ISSUE_CREATED: (
+        "id", "title", "category_id", "status", "priority", "latitude",
+        "longitude", "address", "user_id", "created_at",
+    ),
+    ISSUE_STATUS_CHANGED: (
+        "id", "status", "priority", "category_id", "latitude", "longitude",
+        "updated_at",
+    ),
+    ISSUE_FLAGGED: (
+        "id", "category_id", "latitude", "longitude", "flag_count", "is_hidden",
+    ),
+}
+
+
+def compact_issue(event_type, issue):
+    """Reduce a full issue row to the fields its event type carries."""
+    delta = {field: issue.get(field) for field in EVENT_FIELDS[event_type]}
+    if event_type == ISSUE_CREATED:
+        delta["category"] = (issue.get("categories") or {}).get("name")
+        photos = issue.get("issue_photos") or []
+        delta["image_url"] = photos[0]["image_url"] if photos else None
+    return delta
+
+
+def parse_bbox(value):
+    """Parse a ``south,west,north,east`` query parameter; raise ValueError if invalid."""
+    if not value:
+        return None
+    try:
+        south, west, north, east = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError("bbox must be 'south,west,north,east'")
+    if south > north or west > east:
+        raise ValueError("bbox must be 'south,west,north,east'")
+    return south, west, north, east
+
+
+def parse_sequence(value):
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("Invalid event id")
+
+
+class Subscription:
+    """One client's filtered view of the event stream.
+
+    Events are queued on the subscriber's event loop, or, without a loop (a
+    stream served by a WSGI worker thread), on a thread-safe queue. A client
+    that falls more than ``maxsize`` events behind is disconnected and
+    resumes from its last event id, instead of the queue growing without
+    bound.
+    """
+
+    def __init__(self, broker, loop=None, category_id=None, bbox=None, maxsize=1000):
+        self.broker = broker
+        self.loop = loop
+        self.category_id = category_id
+        self.bbox = bbox
+        self.maxsize = maxsize
+        self.reset = False
+        self.last_seq = None
+        self._queue = asyncio.Queue() if loop is not None else queue.Queue()
+        self._closed = False
+
+    def matches(self, event):
+        issue = event["issue"]
+        if self.category_id is not None and issue.get("category_id") != self.category_id:
+            return False
+        if self.bbox:
+            lat, lng = issue.get("latitude"), issue.get("longitude")
+            if lat is None or lng is None:
+                return False
+            south, west, north, east = self.bbox
+            if not (south <= float(lat) <= north and west <= float(lng) <= east):
+                return False
+        return True
+
+    def deliver(self, event):
+        """Hand an event over from the publishing thread."""
+        if self.loop is None:
+            self.offer(event)
+        else:
+            self.loop.call_soon_threadsafe(self.offer, event)
+
+    def offer(self, event):
+        """Queue an event; must run on the subscriber's loop, if it has one."""
+        if self._closed:
+            return
+        if self._queue.qsize() >= self.maxsize:
+            self._closed = True
+            self._queue.put_nowait(None)
+            return
+        self._queue.put_nowait(event)
+
+    async def get(self):
+        """Next event, or None once the subscription has been cut off."""
+        return await self._queue.get()
+
+    def get_blocking(self, timeout):
+        """``get`` for loopless subscriptions; raises ``queue.Empty`` after ``timeout``."""
+        return self._queue.get(timeout=timeout)
+
+    def close(self):
+        self._closed = True
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Numbers, buffers and fans out events within one process."""
+
+    def __init__(self, buffer_size=1000):
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._buffer = collections.deque(maxlen=buffer_size)
+        self._subscribers = set()
+
+    def publish(self, event_type, issue):
+        with self._lock:
+            self._seq += 1
+            self._append(self._seq, event_type, compact_issue(event_type, issue))
+
+    def _append(self, seq, event_type, issue):
+        # Called with the lock held, so every subscriber sees events in order
+        event = {"seq": seq, "type": event_type, "issue": issue}
+        self._seq = max(self._seq, seq)
+        self._buffer.append(event)
+        dead = []
+        for subscription in self._subscribers:
+            if subscription.matches(event):
+                try:
+                    subscription.deliver(event)
+                except RuntimeError:
+                    # Its event loop is closed, so the client is gone for good
+                    dead.append(subscription)
+        if dead:
+            logger.info("Dropped %d subscriptions with closed event loops", len(dead))
+            self._subscribers.difference_update(dead)
+
+    def subscribe(self, after=None, category_id=None, bbox=None, blocking=False):
+        """Subscribe from the running event loop, replaying events after ``after``.
+
+        ``blocking`` subscriptions are read from a plain thread instead, with
+        ``get_blocking``. When the requested events are no longer buffered
+        (or come from before a restart) the subscription is marked ``reset``
+        and the client should re-fetch its list.
+        """
+        loop = None if blocking else asyncio.get_running_loop()
+        subscription = Subscription(self, loop, category_id=category_id, bbox=bbox)
+        with self._lock:
+            self._subscribers.add(subscription)
+            subscription.last_seq = self._seq
+            if after is None:
+                return subscription
+            oldest = self._buffer[0]["seq"] if self._buffer else self._seq + 1
+            if after > self._seq or after < oldest - 1:
+                subscription.reset = True
+                return subscription
+            for event in self._buffer:
+                if event["seq"] > after and subscription.matches(event):
+                    subscription.offer(event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+
+class PostgresNotifyBroker(InProcessBroker):
+    """Relays events between workers through Postgres LISTEN/NOTIFY.
+
+    Sequence numbers come from the ``issue_event_seq`` sequence (sql/005), so
+    they agree across workers. Each process keeps one listening connection,
+    opened by a background thread on first use.
+    """
+
+    channel = "issue_events"
+
+    def __init__(self, buffer_size=1000, connect=_connect):
+        super().__init__(buffer_size)
+        self._connect = connect
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def _ensure_listening(self):
+        with self._listener_lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name="issue-events-listener", daemon=True
+                )
+                self._listener.start()
+
+    def publish(self, event_type, issue):
+        self._ensure_listening()
+        event = json.dumps(
+            {"type": event_type, "issue": compact_issue(event_type, issue)},
+            cls=DjangoJSONEncoder,
+        )
+        with get_pg_pool().connection() as conn, conn.cursor() as cursor, timed("postgres"):
+            cursor.execute(
+                "SELECT pg_notify(%s, json_build_object("
+                "'seq', nextval('issue_event_seq'), 'event', %s::json)::text)",
+                (self.channel, event),
+            )
+
+    def subscribe(self, after=None, category_id=None, bbox=None, blocking=False):
+        self._ensure_listening()
+        return super().subscribe(
+            after=after, category_id=category_id, bbox=bbox, blocking=blocking
+        )
+
+    def _listen(self):
+        while True:
+            try:
+                conn = self._connect()
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        message = json.loads(conn.notifies.pop(0).payload)
+                        event = message["event"]
+                        with self._lock:
+                            self._append(message["seq"], event["type"], event["issue"])
+            except Exception:
+                logger.exception("Event listener lost its connection; reconnecting")
+                time.sleep(1)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.EVENT_BROKER)(
+                    buffer_size=settings.EVENT_BUFFER_SIZE
+                )
+    return _broker
+
+
+def publish_issue_event(event_type, issue):
+    """Publish an event; a broker failure never fails the write that caused it."""
+    try:
+        get_broker().publish(event_type, issue)
+    except Exception:
+        logger.exception("Failed to publish %s event", event_type)
+
+
+def format_event(event):
+    data = json.dumps(event.get("issue"), cls=DjangoJSONEncoder)
+    return f"id: {event['seq']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+async def sse_stream(subscription, heartbeat=15):
+    """Encode a subscription as an SSE body, with keep-alive comments."""
+    try:
+        yield "retry: 3000\n\n"
+        if subscription.reset:
+            yield format_event({"seq": subscription.last_seq, "type": RESET})
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                return
+            yield format_event(event)
+    finally:
+        subscription.close()
+
+
+def sse_stream_blocking(subscription, heartbeat=15, max_seconds=None):
+    """``sse_stream`` for WSGI, which can only send a sync iterator.
+
+    Each open stream holds a worker thread, so it ends after ``max_seconds``;
+    the browser reconnects on its own and resumes from its last event id.
+    """
+    deadline = None if max_seconds is None else time.monotonic() + max_seconds
+    try:
+        yield "retry: 3000\n\n"
+        if subscription.reset:
+            yield format_event({"seq": subscription.last_seq, "type": RESET})
+        while deadline is None or time.monotonic() < deadline:
+            try:
+                event = subscription.get_blocking(heartbeat)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                return
+            yield format_event(event)
+    finally:
+        subscription.close()
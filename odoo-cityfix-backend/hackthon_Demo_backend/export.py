@@ -0,0 +1,165 @@
+"""Streaming issue export as NDJSON, CSV or GeoJSON.
+
+Rows are pulled in fixed-size batches (a server-side cursor on the direct
+connection, keyset pages over PostgREST) and encoded one at a time, so memory
+use does not depend on the size of the table. Under asgi.py the encoded
+stream is handed over as an async iterator (``aiter_in_thread``), since
+Django would read a sync one into a list before sending the first byte.
+"""
+
+import csv
+import io
+import itertools
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .db_clients import get_pg_pool
+from .issue_feed import parse_timestamp
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "geojson": "application/geo+json",
+}
+EXPORT_COLUMNS = (
+    "id", "title", "description", "category_id", "status", "latitude",
+    "longitude", "user_id", "created_at", "updated_at",
+)
+EXPORT_BATCH_SIZE = 2000
+# Leading characters that make spreadsheet software evaluate a CSV cell
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def export_filters(params, categories):
+    """Validate export query parameters; raise ValueError on bad input."""
+    since, until = params.get("since"), params.get("until")
+    return {
+        "category_id": categories.resolve(params.get("category")),
+        "status": params.get("status") or None,
+        "since": parse_timestamp(since, "since") if since else None,
+        "until": parse_timestamp(until, "until") if until else None,
+    }
+
+
+def iter_issues_postgrest(supabase, filters, batch_size=EXPORT_BATCH_SIZE):
+    last_id = None
+    while True:
+        query = supabase.table("issues").select(", ".join(EXPORT_COLUMNS))
+        if filters["category_id"] is not None:
+            query = query.eq("category_id", filters["category_id"])
+        if filters["status"]:
+            query = query.eq("status", filters["status"])
+        if filters["since"]:
+            query = query.gte("created_at", filters["since"])
+        if filters["until"]:
+            query = query.lt("created_at", filters["until"])
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(batch_size).execute().data
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def iter_issues_postgres(filters, batch_size=EXPORT_BATCH_SIZE):
+    clauses, params = [], []
+    for column, operator, value in (
+        ("category_id", "=", filters["category_id"]),
+        ("status", "=", filters["status"]),
+        ("created_at", ">=", filters["since"]),
+        ("created_at", "<", filters["until"]),
+    ):
+        if value is not None:
+            clauses.append(f"{column} {operator} %s")
+            params.append(value)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    with get_pg_pool().connection() as conn:
+        # A named cursor keeps the result set on the server and streams it
+        with conn.raw.cursor(name="issue_export") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(
+                f"SELECT {', '.join(EXPORT_COLUMNS)} FROM issues {where} ORDER BY id",
+                params,
+            )
+            for row in cursor:
+                yield dict(zip(EXPORT_COLUMNS, row))
+
+
+def _with_category(issues, categories):
+    for issue in issues:
+        issue["category"] = categories.name_for(issue.get("category_id"))
+        yield issue
+
+
+def encode_ndjson(issues):
+    for issue in issues:
+        yield json.dumps(issue, cls=DjangoJSONEncoder) + "\n"
+
+
+def csv_cell(value):
+    """Quote text a spreadsheet would run as a formula; reporters write titles."""
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def encode_csv(issues):
+    columns = EXPORT_COLUMNS + ("category",)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for issue in issues:
+        writer.writerow({key: csv_cell(value) for key, value in issue.items()})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def encode_geojson(issues):
+    yield '{"type": "FeatureCollection", "features": ['
+    separator = ""
+    for issue in issues:
+        if issue.get("latitude") is None or issue.get("longitude") is None:
+            continue
+        properties = {
+            key: value for key, value in issue.items() if key not in ("latitude", "longitude")
+        }
+        feature = {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": [float(issue["longitude"]), float(issue["latitude"])],
+            },
+            "properties": properties,
+        }
+        yield separator + json.dumps(feature, cls=DjangoJSONEncoder)
+        separator = ","
+    yield "]}\n"
+
+
+ENCODERS = {"ndjson": encode_ndjson, "csv": encode_csv, "geojson": encode_geojson}
+
+
+def stream_export(issues, fmt, categories):
+    return ENCODERS[fmt](_with_category(issues, categories))
+
+
+def _take(iterator, count):
+    return list(itertools.islice(iterator, count))
+
+
+async def aiter_in_thread(iterable, batch_size=EXPORT_BATCH_SIZE):
+    """Iterate a blocking iterable from worker threads, ``batch_size`` items per hop."""
+    iterator = iter(iterable)
+    take = sync_to_async(_take, thread_sensitive=False)
+    while True:
+        batch = await take(iterator, batch_size)
+        for item in batch:
+            yield item
+        if len(batch) < batch_size:
+            return
@@ -0,0 +1,219 @@
+import math
+from collections import defaultdict
+
+from .reloading import ReloadingIndex
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+
+NEARBY_DEFAULT_LIMIT = 50
+NEARBY_MAX_LIMIT = 200
+NEARBY_MAX_RADIUS_KM = 50
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def load_issue_points(supabase, batch_size=1000):
+    """Yield the columns the spatial index needs for every issue, in id order."""
+    last_id = None
+    while True:
+        query = (
+            supabase.table("issues")
+            .select("id, latitude, longitude, status, category_id")
+            .eq("is_hidden", False)
+        )
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(batch_size).execute().data
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+class GridIndex(ReloadingIndex):
+    """Uniform latitude/longitude grid over issue coordinates.
+
+    Rebuilt from ``loader`` every ``ttl`` seconds in the background, see
+    ``ReloadingIndex``; writes made in this process are applied straight
+    away through ``add``, ``update`` and ``remove``.
+    """
+
+    thread_name = "geo-index"
+
+    def __init__(self, loader, cell_deg=0.01, ttl=300):
+        super().__init__(loader, ttl)
+        self.cell_deg = cell_deg
+        self._cells = defaultdict(dict)
+        self._points = {}
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    @staticmethod
+    def _entry(issue):
+        return (
+            float(issue["latitude"]),
+            float(issue["longitude"]),
+            issue.get("category_id"),
+            issue.get("status"),
+        )
+
+    def _build(self):
+        cells = defaultdict(dict)
+        points = {}
+        for issue in self.loader():
+            if issue.get("latitude") is None or issue.get("longitude") is None:
+                continue
+            entry = self._entry(issue)
+            points[issue["id"]] = entry
+            cells[self._cell(entry[0], entry[1])][issue["id"]] = entry
+        return cells, points
+
+    def _install(self, index):
+        self._cells, self._points = index
+
+    def add(self, issue):
+        if issue.get("latitude") is None or issue.get("longitude") is None:
+            return
+        self._write(self._put, issue["id"], self._entry(issue))
+
+    def update(self, issue_id, **changes):
+        self._write(self._change, issue_id, changes)
+
+    def remove(self, issue_id):
+        self._write(self._discard, issue_id)
+
+    def _put(self, issue_id, entry):
+        self._discard(issue_id)
+        self._points[issue_id] = entry
+        self._cells[self._cell(entry[0], entry[1])][issue_id] = entry
+
+    def _change(self, issue_id, changes):
+        entry = self._points.get(issue_id)
+        if entry is None:
+            return
+        lat, lng, category_id, status = entry
+        entry = (
+            lat,
+            lng,
+            changes.get("category_id", category_id),
+            changes.get("status", status),
+        )
+        self._points[issue_id] = entry
+        self._cells[self._cell(lat, lng)][issue_id] = entry
+
+    def _discard(self, issue_id):
+        entry = self._points.pop(issue_id, None)
+        if entry is not None:
+            cell = self._cell(entry[0], entry[1])
+            self._cells[cell].pop(issue_id, None)
+            if not self._cells[cell]:
+                del self._cells[cell]
+
+    def _scan(self, south, west, north, east):
+        row_min, col_min = self._cell(south, west)
+        row_max, col_max = self._cell(north, east)
+        candidates = []
+        with self._lock:
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    cell = self._cells.get((row, col))
+                    if cell:
+                        candidates.extend(cell.items())
+        return candidates
+
+    def query(
+        self,
+        lat,
+        lng,
+        radius_km=None,
+        min_radius_km=0,
+        bbox=None,
+        category_id=None,
+        status=None,
+        limit=NEARBY_DEFAULT_LIMIT,
+    ):
+        """Return up to ``limit`` ``(distance_km, issue_id)`` pairs, nearest first.
+
+        Either ``radius_km`` (optionally with ``min_radius_km`` for a ring) or a
+        ``bbox`` of ``(south, west, north, east)`` selects the area; distances
+        are measured from ``(lat, lng)``.
+        """
+        self._ensure_fresh()
+
+        if bbox is None:
+            dlat = radius_km / KM_PER_DEGREE_LAT
+            cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+            dlng = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180)
+            south, west, north, east = lat - dlat, lng - dlng, lat + dlat, lng + dlng
+        else:
+            south, west, north, east = bbox
+
+        matches = []
+        for issue_id, (p_lat, p_lng, p_category, p_status) in self._scan(
+            south, west, north, east
+        ):
+            if category_id is not None and p_category != category_id:
+                continue
+            if status and p_status != status:
+                continue
+            if bbox is not None and not (south <= p_lat <= north and west <= p_lng <= east):
+                continue
+            distance = haversine_km(lat, lng, p_lat, p_lng)
+            if radius_km is not None and not (min_radius_km <= distance <= radius_km):
+                continue
+            matches.append((distance, issue_id))
+
+        matches.sort(key=lambda match: match[0])
+        return matches[:limit]
+
+
+def parse_nearby_params(data, categories):
+    """Validate a nearby-issues request body into ``GridIndex.query`` keyword arguments."""
+    try:
+        limit = int(data.get("limit") or NEARBY_DEFAULT_LIMIT)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid 'limit'")
+    params = {
+        "category_id": categories.resolve(data.get("category")),
+        "status": data.get("status"),
+        "limit": max(1, min(limit, NEARBY_MAX_LIMIT)),
+    }
+
+    try:
+        bbox = data.get("bbox")
+        if bbox:
+            south, west, north, east = (
+                float(bbox[side]) for side in ("south", "west", "north", "east")
+            )
+            if south > north or west > east:
+                raise ValueError
+            cos_lat = math.cos(math.radians((south + north) / 2))
+            if (north - south) * KM_PER_DEGREE_LAT > 2 * NEARBY_MAX_RADIUS_KM:
+                raise ValueError
+            if (east - west) * KM_PER_DEGREE_LAT * cos_lat > 2 * NEARBY_MAX_RADIUS_KM:
+                raise ValueError
+            params["bbox"] = (south, west, north, east)
+            # Distances are measured from the viewport center unless a point is given
+            params["lat"] = float(data.get("lat", (south + north) / 2))
+            params["lng"] = float(data.get("lng", (west + east) / 2))
+            return params
+
+        params["lat"] = float(data["lat"])
+        params["lng"] = float(data["lng"])
+        params["radius_km"] = float(data["radius_km"])
+        params["min_radius_km"] = float(data.get("min_radius_km") or 0)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Provide lat, lng and radius_km, or a valid bbox")
+
+    if not 0 < params["radius_km"] <= NEARBY_MAX_RADIUS_KM:
+        raise ValueError(f"radius_km must be between 0 and {NEARBY_MAX_RADIUS_KM}")
+    return params
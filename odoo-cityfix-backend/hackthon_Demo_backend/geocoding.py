@@ -0,0 +1,160 @@
+"""Reverse geocoding of issue coordinates, resolved once and cached.
+
+Addresses are keyed by coordinates rounded to GEOCODE_PRECISION decimal
+places (about 11 m). A lookup tries a bounded in-process LRU, then the
+``geocode_cache`` table (sql/009), and only then the geocoder chosen by
+GEOCODER. A trigger on ``issues`` copies the cached address into every new
+row, so resolving the coordinates before ``create_issue`` is enough to store
+the issue's address.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .clients import get_http_client
+
+# Must match the rounding in sql/009_geocode_cache.sql
+GEOCODE_PRECISION = 4
+_QUANTUM = Decimal(1).scaleb(-GEOCODE_PRECISION)
+
+
+def geocode_key(lat, lng):
+    """``(lat_key, lng_key)`` strings, rounded half away from zero like Postgres ``round``."""
+    return tuple(
+        str(Decimal(str(value)).quantize(_QUANTUM, rounding=ROUND_HALF_UP))
+        for value in (lat, lng)
+    )
+
+
+class NominatimGeocoder:
+    """OpenStreetMap Nominatim, throttled to its one request per second policy."""
+
+    def __init__(self, url=None, user_agent=None, timeout=None, min_interval=1.0):
+        self.url = url or settings.GEOCODER_URL
+        self.user_agent = user_agent or settings.GEOCODER_USER_AGENT
+        self.timeout = timeout or settings.GEOCODER_TIMEOUT
+        self.min_interval = min_interval
+        self._last_request = 0.0
+        self._lock = threading.Lock()
+
+    def reverse(self, lat, lng):
+        """Return the address at the coordinates, or None if there is none."""
+        with self._lock:
+            wait = self._last_request + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_request = time.monotonic()
+        # Over the shared keep-alive pool, timed under the geocoder's host name
+        response = get_http_client().get(
+            self.url,
+            params={"format": "jsonv2", "lat": lat, "lon": lng, "accept-language": "en"},
+            headers={"User-Agent": self.user_agent},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json().get("display_name")
+
+
+class StubGeocoder:
+    """Offline stand-in for development and tests: the address is the coordinates."""
+
+    def reverse(self, lat, lng):
+        return f"{lat}, {lng}"
+
+
+class SupabaseGeocodeStore:
+    """The persistent ``geocode_cache`` table, over PostgREST."""
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def get(self, key):
+        """The cached row for ``key``, or None if it was never resolved."""
+        rows = (
+            self.supabase.table("geocode_cache")
+            .select("address")
+            .eq("lat_key", key[0])
+            .eq("lng_key", key[1])
+            .limit(1)
+            .execute()
+            .data
+        )
+        return rows[0] if rows else None
+
+    def put(self, key, address):
+        self.supabase.table("geocode_cache").upsert(
+            {"lat_key": key[0], "lng_key": key[1], "address": address}
+        ).execute()
+
+
+class GeocodeCache:
+    """Bounded LRU of resolved addresses in front of the persistent store.
+
+    "No address here" is cached like any other answer; geocoder failures are
+    not, and propagate to the caller.
+    """
+
+    def __init__(self, geocoder, store, maxsize=10000):
+        self.geocoder = geocoder
+        self.store = store
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key, address):
+        with self._lock:
+            self._entries[key] = address
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def resolve(self, lat, lng):
+        key = geocode_key(lat, lng)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        row = self.store.get(key)
+        if row is not None:
+            address = row["address"]
+        else:
+            address = self.geocoder.reverse(float(key[0]), float(key[1]))
+            self.store.put(key, address)
+        self._remember(key, address)
+        return address
+
+
+def load_unaddressed_issues(supabase, batch_size=1000):
+    last_id = None
+    while True:
+        query = (
+            supabase.table("issues")
+            .select("id, latitude, longitude")
+            .is_("address", "null")
+        )
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(batch_size).execute().data
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder():
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                _geocoder = import_string(settings.GEOCODER)()
+    return _geocoder
@@ -0,0 +1,243 @@
+"""Streaming bulk import of issues from NDJSON or CSV exports.
+
+Rows are parsed and validated one at a time and written in chunks, each in
+one transaction: the issues of a chunk, their status logs and their photos
+go in together or not at all. A bad row is reported with its line number
+and skipped; it never aborts the rest of the import. When the database
+refuses a chunk (say, a row naming an unknown user), it is split in halves
+and retried until the rows it refuses are isolated.
+"""
+
+import csv
+import json
+from datetime import datetime
+
+import psycopg2.extras
+
+from .db_clients import get_pg_pool
+from .export import CSV_FORMULA_PREFIXES
+
+INGEST_FORMATS = ("ndjson", "csv")
+ISSUE_STATUSES = ("Reported", "In Progress", "Resolved", "Rejected")
+MAX_REPORTED_ERRORS = 1000
+
+
+class RowError(ValueError):
+    pass
+
+
+def photo_urls(urls):
+    # Only uploaded photos; browser-local blob: and data: URLs mean nothing here
+    return [
+        url.strip()
+        for url in urls
+        if isinstance(url, str) and url.strip().startswith(("http://", "https://"))
+    ]
+
+
+def _csv_value(value):
+    # Undo the quote ``export.csv_cell`` puts in front of formula-like text
+    if isinstance(value, str) and value[:1] == "'" and value[1:].startswith(CSV_FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+
+def iter_records(lines, fmt):
+    """Yield ``(line_number, record)`` from an iterable of raw byte or text lines."""
+    text_lines = (
+        line.decode("utf-8-sig") if isinstance(line, bytes) else line for line in lines
+    )
+    if fmt == "csv":
+        reader = csv.DictReader(text_lines)
+        for record in reader:
+            yield reader.line_num, {key: _csv_value(value) for key, value in record.items()}
+        return
+
+    for line_number, line in enumerate(text_lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, RowError(f"Invalid JSON: {e.msg}")
+
+
+def _timestamp(value, field):
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        raise RowError(f"Invalid '{field}' timestamp")
+
+
+def _float(record, field):
+    try:
+        return float(record[field])
+    except KeyError:
+        raise RowError(f"Missing '{field}'")
+    except (TypeError, ValueError):
+        raise RowError(f"Invalid '{field}'")
+
+
+def validate_record(record, categories, default_user_id):
+    """Turn one export record into ``(issue_row, status_logs, image_urls)``."""
+    if isinstance(record, RowError):
+        raise record
+    if not isinstance(record, dict):
+        raise RowError("Expected an object")
+
+    description = (record.get("description") or "").strip()
+    if not description:
+        raise RowError("Missing 'description'")
+
+    category_id = categories.id_for(record.get("category"))
+    if category_id is None:
+        raise RowError(f"Category '{record.get('category')}' not found")
+
+    latitude = _float(record, "latitude")
+    longitude = _float(record, "longitude")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise RowError("Coordinates out of range")
+
+    status = record.get("status") or "Reported"
+    if status not in ISSUE_STATUSES:
+        raise RowError(f"Invalid status '{status}'")
+
+    created_at = record.get("created_at")
+    created_at = _timestamp(created_at, "created_at") if created_at else None
+    updated_at = record.get("updated_at")
+    updated_at = _timestamp(updated_at, "updated_at") if updated_at else created_at
+
+    logs = record.get("status_logs") or [{"status": status, "changed_at": created_at}]
+    if isinstance(logs, str):
+        logs = json.loads(logs)
+    status_logs = []
+    for log in logs:
+        if log.get("status") not in ISSUE_STATUSES:
+            raise RowError(f"Invalid status log '{log.get('status')}'")
+        changed_at = log.get("changed_at")
+        status_logs.append(
+            (log["status"], _timestamp(changed_at, "changed_at") if changed_at else created_at)
+        )
+
+    images = record.get("images") or []
+    if isinstance(images, str):
+        # CSV exports carry photos as a "|"-separated list
+        images = images.split("|")
+    image_urls = photo_urls(images)
+
+    issue = {
+        "title": (record.get("title") or description[:30]).strip(),
+        "description": description,
+        "category_id": category_id,
+        "user_id": record.get("user_id") or default_user_id,
+        "latitude": latitude,
+        "longitude": longitude,
+        "is_anonymous": str(record.get("is_anonymous", False)).lower() in ("true", "1"),
+        "status": status,
+        "created_at": created_at,
+        "updated_at": updated_at,
+    }
+    return issue, status_logs, image_urls
+
+
+class PostgrestWriter:
+    """Writes each chunk with one ``import_issues`` call (sql/013), one transaction."""
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def write(self, rows):
+        issues = [
+            {
+                **issue,
+                "status_logs": [
+                    {"status": status, "changed_at": changed_at}
+                    for status, changed_at in status_logs
+                ],
+                "image_urls": image_urls,
+            }
+            for issue, status_logs, image_urls in rows
+        ]
+        return self.supabase.rpc("import_issues", {"p_issues": issues}).execute().data
+
+
+class PostgresWriter:
+    """Writes each chunk as one transaction over a pooled direct connection."""
+
+    ISSUE_COLUMNS = (
+        "title", "description", "category_id", "user_id", "latitude", "longitude",
+        "is_anonymous", "status", "created_at", "updated_at",
+    )
+
+    def write(self, rows):
+        with get_pg_pool().connection() as conn, conn.cursor() as cursor:
+            issue_ids = psycopg2.extras.execute_values(
+                cursor,
+                f"INSERT INTO issues ({', '.join(self.ISSUE_COLUMNS)}) VALUES %s RETURNING id",
+                [tuple(issue[column] for column in self.ISSUE_COLUMNS) for issue, _, _ in rows],
+                template="(%s, %s, %s, %s, %s, %s, %s, %s, COALESCE(%s::timestamptz, now()), COALESCE(%s::timestamptz, now()))",
+                page_size=len(rows),
+                fetch=True,
+            )
+
+            logs, photos = [], []
+            for (issue_id,), (_, status_logs, image_urls) in zip(issue_ids, rows):
+                logs.extend((issue_id, status, changed_at) for status, changed_at in status_logs)
+                photos.extend((issue_id, url) for url in image_urls)
+            if logs:
+                psycopg2.extras.execute_values(
+                    cursor,
+                    "INSERT INTO issue_status_logs (issue_id, status, changed_at) VALUES %s",
+                    logs,
+                    template="(%s, %s, COALESCE(%s::timestamptz, now()))",
+                    page_size=len(logs),
+                )
+            if photos:
+                psycopg2.extras.execute_values(
+                    cursor,
+                    "INSERT INTO issue_photos (issue_id, image_url, uploaded_at) VALUES %s",
+                    photos,
+                    template="(%s, %s, now())",
+                    page_size=len(photos),
+                )
+            return len(issue_ids)
+
+
+def ingest(records, categories, writer, default_user_id=None, chunk_size=500):
+    """Validate and write ``(line_number, record)`` pairs; return a summary.
+
+    The summary counts inserted and failed rows and lists the first
+    MAX_REPORTED_ERRORS failures as ``{"line": ..., "error": ...}``.
+    """
+    summary = {"inserted": 0, "failed": 0, "errors": []}
+
+    def fail(line_number, error):
+        summary["failed"] += 1
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append({"line": line_number, "error": str(error)})
+
+    def flush(chunk):
+        try:
+            summary["inserted"] += writer.write([row for _, row in chunk])
+        except Exception as e:
+            if len(chunk) == 1:
+                fail(chunk[0][0], f"Insert failed: {e}")
+                return
+            # Each half is its own transaction; only the refused rows fail
+            middle = len(chunk) // 2
+            flush(chunk[:middle])
+            flush(chunk[middle:])
+
+    chunk = []
+    for line_number, record in records:
+        try:
+            chunk.append((line_number, validate_record(record, categories, default_user_id)))
+        except (RowError, KeyError, TypeError, ValueError, AttributeError) as e:
+            fail(line_number, e)
+            continue
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+    return summary
@@ -0,0 +1,134 @@
+"""Read-through cache of issue detail documents.
+
+A document is what the issue detail page shows: the issue with its category,
+reporter and photos, plus its status logs. It is keyed by issue id and
+dropped by every write path that changes the issue (flags, merged reports,
+status updates), so a hot issue is served without any upstream call.
+
+``InMemoryIssueCache`` is a per-process LRU; with several workers, either
+keep ISSUE_CACHE_TTL short or use ``DjangoIssueCache`` over a shared Django
+cache (Redis, Memcached) so an invalidation reaches every worker.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+class InMemoryIssueCache:
+    """Bounded LRU of detail documents, each kept for at most ``ttl`` seconds."""
+
+    def __init__(self, maxsize=None, ttl=None):
+        self.maxsize = maxsize or settings.ISSUE_CACHE_SIZE
+        self.ttl = ttl or settings.ISSUE_CACHE_TTL
+        self._entries = OrderedDict()
+        # Generation of each key's last invalidation, so a read that raced
+        # with a write doesn't put the old document back
+        self._invalidated = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, self._generation
+            doc, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None, self._generation
+            self._entries.move_to_end(key)
+            return doc, None
+
+    def _put(self, key, doc, generation):
+        with self._lock:
+            if self._invalidated.get(key, -1) > generation:
+                return
+            self._entries[key] = (doc, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def fetch(self, issue_id, loader):
+        """The cached document, or ``loader()``'s result (cached unless None)."""
+        key = str(issue_id)
+        doc, generation = self._get(key)
+        if doc is None:
+            doc = loader()
+            if doc is not None:
+                self._put(key, doc, generation)
+        return doc
+
+    async def afetch(self, issue_id, loader):
+        """``fetch`` with an async ``loader``."""
+        key = str(issue_id)
+        doc, generation = self._get(key)
+        if doc is None:
+            doc = await loader()
+            if doc is not None:
+                self._put(key, doc, generation)
+        return doc
+
+    def invalidate(self, issue_id):
+        key = str(issue_id)
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(key, None)
+            self._invalidated[key] = self._generation
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.maxsize:
+                self._invalidated.popitem(last=False)
+
+    async def ainvalidate(self, issue_id):
+        self.invalidate(issue_id)
+
+
+class DjangoIssueCache:
+    """Detail documents in the Django cache ISSUE_CACHE_ALIAS, shared between workers."""
+
+    key_prefix = "issue-detail:"
+
+    def __init__(self, alias=None, ttl=None):
+        self.cache = caches[alias or settings.ISSUE_CACHE_ALIAS]
+        self.ttl = ttl or settings.ISSUE_CACHE_TTL
+
+    def fetch(self, issue_id, loader):
+        key = f"{self.key_prefix}{issue_id}"
+        doc = self.cache.get(key)
+        if doc is None:
+            doc = loader()
+            if doc is not None:
+                self.cache.set(key, doc, self.ttl)
+        return doc
+
+    async def afetch(self, issue_id, loader):
+        key = f"{self.key_prefix}{issue_id}"
+        doc = await self.cache.aget(key)
+        if doc is None:
+            doc = await loader()
+            if doc is not None:
+                await self.cache.aset(key, doc, self.ttl)
+        return doc
+
+    def invalidate(self, issue_id):
+        self.cache.delete(f"{self.key_prefix}{issue_id}")
+
+    async def ainvalidate(self, issue_id):
+        await self.cache.adelete(f"{self.key_prefix}{issue_id}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_issue_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = import_string(settings.ISSUE_CACHE)()
+    return _cache
@@ -0,0 +1,110 @@
+import base64
+import json
+from datetime import datetime
+
+from .projections import select_for
+
+# Category names are filled in from the in-process registry, not embedded
+ISSUE_FEED_SELECT = select_for()
+
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(issue):
+    # The cursor is the (created_at, id) pair of the last issue on a page
+    raw = json.dumps([issue["created_at"], issue["id"]])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+class InvalidCursor(ValueError):
+    """The client sent a cursor this server did not issue; answered with a 400."""
+
+
+def decode_cursor(cursor):
+    # Both values end up inside a PostgREST filter string, so nothing but
+    # a re-serialized timestamp and a positive int may come out of here
+    try:
+        created_at, issue_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        created_at = datetime.fromisoformat(created_at).isoformat()
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    if type(issue_id) is not int or issue_id <= 0:
+        raise InvalidCursor("Invalid cursor")
+    return created_at, issue_id
+
+
+def parse_timestamp(value, name):
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid '{name}' timestamp")
+
+
+def parse_page_size(value):
+    if value in (None, ""):
+        return FEED_PAGE_SIZE
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid 'limit'")
+    return max(1, min(limit, FEED_MAX_PAGE_SIZE))
+
+
+def issue_page_query(
+    supabase,
+    cursor=None,
+    limit=None,
+    category_id=None,
+    status=None,
+    since=None,
+    until=None,
+    include_hidden=False,
+    fields=None,
+):
+    """Build the query for one page of the issue feed, newest first.
+
+    Issues hidden after too many spam flags are left out unless
+    ``include_hidden`` is set (admins reviewing them). ``fields`` narrows
+    the columns to those names from ``projections.ISSUE_FEED_FIELDS``.
+
+    Pagination is keyset based on (created_at, id), so the cost of a page does
+    not depend on how deep into the feed the client is. Returns the query and
+    the page size; pass the executed rows to ``split_page``.
+    """
+    limit = parse_page_size(limit)
+
+    query = supabase.table("issues").select(select_for(fields))
+    if not include_hidden:
+        query = query.eq("is_hidden", False)
+    if category_id is not None:
+        query = query.eq("category_id", category_id)
+    if status:
+        query = query.eq("status", status)
+    if since:
+        query = query.gte("created_at", parse_timestamp(since, "since"))
+    if until:
+        query = query.lt("created_at", parse_timestamp(until, "until"))
+    if cursor:
+        created_at, issue_id = decode_cursor(cursor)
+        query = query.or_(
+            f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{issue_id}")'
+        )
+
+    # Fetch one extra row to know whether another page exists
+    query = query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
+    return query, limit
+
+
+def split_page(issues, limit):
+    next_cursor = None
+    if len(issues) > limit:
+        issues = issues[:limit]
+        next_cursor = encode_cursor(issues[-1])
+    return issues, next_cursor
+
+
+def fetch_issue_page(supabase, **filters):
+    """Return one page of the issue feed and the cursor of the next page."""
+    query, limit = issue_page_query(supabase, **filters)
+    return split_page(query.execute().data, limit)
@@ -0,0 +1,69 @@
+from .ingest import ISSUE_STATUSES, photo_urls
+
+ISSUE_PRIORITIES = ("Low", "Medium", "High", "Critical")
+MAX_ISSUE_CHANGES = 500
+
+
+def image_urls(form_data):
+    images = form_data.get("images") or []
+    if isinstance(images, str):
+        images = [images]
+    return photo_urls(images)
+
+
+def create_issue_params(form_data, user_id):
+    """Arguments for the ``create_issue`` database function (sql/002_create_issue_rpc.sql)."""
+    return {
+        "p_title": form_data["description"][:30],
+        "p_description": form_data["description"],
+        "p_category": form_data["category"],
+        "p_user_id": user_id,
+        "p_latitude": form_data["location"]["lat"],
+        "p_longitude": form_data["location"]["lng"],
+        "p_image_urls": image_urls(form_data),
+    }
+
+
+def add_report_params(form_data, issue_id, user_id):
+    """Arguments for the ``add_issue_report`` database function (sql/008_issue_reports.sql)."""
+    return {
+        "p_issue_id": issue_id,
+        "p_user_id": user_id,
+        "p_image_urls": image_urls(form_data),
+    }
+
+
+def flag_issue_params(issue_id, user_id, hide_threshold):
+    """Arguments for the ``flag_issue`` database function (sql/011_issue_flags.sql)."""
+    return {
+        "p_issue_id": issue_id,
+        "p_user_id": user_id,
+        "p_hide_threshold": hide_threshold,
+    }
+
+
+def issue_changes(changes):
+    """Validate a batch of admin ``{issue_id, status, priority}`` changes.
+
+    Returns the ``p_changes`` argument of the ``update_issues`` database
+    function (sql/004_update_issues_rpc.sql); raises ValueError on bad input.
+    """
+    if not isinstance(changes, list) or not changes:
+        raise ValueError("'changes' must be a non-empty list")
+    if len(changes) > MAX_ISSUE_CHANGES:
+        raise ValueError(f"At most {MAX_ISSUE_CHANGES} changes per request")
+
+    rows = []
+    for change in changes:
+        if not isinstance(change, dict) or not change.get("issue_id"):
+            raise ValueError("Every change needs an 'issue_id'")
+        status = change.get("status") or None
+        priority = change.get("priority") or None
+        if status is None and priority is None:
+            raise ValueError(f"Nothing to change for issue {change['issue_id']}")
+        if status is not None and status not in ISSUE_STATUSES:
+            raise ValueError(f"Invalid status '{status}'")
+        if priority is not None and priority not in ISSUE_PRIORITIES:
+            raise ValueError(f"Invalid priority '{priority}'")
+        rows.append({"id": change["issue_id"], "status": status, "priority": priority})
+    return rows
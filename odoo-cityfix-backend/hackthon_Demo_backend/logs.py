@@ -0,0 +1,86 @@
+"""Structured, non-blocking logging.
+
+Records are formatted as one JSON object per line on the logging thread and
+handed through a queue to a background thread that writes them, so a slow
+stderr or log collector never holds up a request. Each line carries the id
+of the request it was logged for (also returned as ``X-Request-ID``) and any
+``extra=`` fields.
+
+The writer thread starts with the first record, not when logging is
+configured. A forked worker (gunicorn ``--preload``) inherits the handler
+but not the thread, so it starts a writer of its own the same way.
+"""
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        current = request_id.get()
+        if current:
+            entry["request_id"] = current
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class QueueLogHandler(logging.handlers.QueueHandler):
+    """Formats in the caller and writes from a background thread."""
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self.setFormatter(JsonFormatter())
+        self.writer = logging.StreamHandler(stream or sys.stderr)
+        self.listener = None
+        self._start_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._forget_listener)
+
+    def _forget_listener(self):
+        # The parent's thread isn't running here, and its queued lines are its own
+        self.queue = queue.SimpleQueue()
+        self.listener = None
+        self._start_lock = threading.Lock()
+
+    def enqueue(self, record):
+        if self.listener is None:
+            with self._start_lock:
+                if self.listener is None:
+                    listener = logging.handlers.QueueListener(self.queue, self.writer)
+                    listener.start()
+                    self.listener = listener
+        super().enqueue(record)
+
+    def close(self):
+        # Called by logging.shutdown() at exit: write out what is queued first
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+        super().close()
+
+    def prepare(self, record):
+        # Hand over only the formatted line; the writer prints it as is
+        return logging.makeLogRecord({"msg": self.format(record), "levelno": record.levelno})
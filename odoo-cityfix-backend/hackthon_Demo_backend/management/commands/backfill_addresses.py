@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from hackthon_Demo_backend.geocoding import geocode_key, load_unaddressed_issues
+from hackthon_Demo_backend.views import geocode_cache, supabase
+
+
+class Command(BaseCommand):
+    help = "Resolve and store the addresses of issues that have none."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, help="Resolve at most this many distinct locations"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Locations resolved between writes to the issues table",
+        )
+
+    def handle(self, *args, **options):
+        # Issues reported from the same spot share one geocoder lookup
+        keys = dict.fromkeys(
+            geocode_key(issue["latitude"], issue["longitude"])
+            for issue in load_unaddressed_issues(supabase)
+            if issue["latitude"] is not None and issue["longitude"] is not None
+        )
+        keys = list(keys)[: options["limit"]]
+
+        resolved = failed = filled = 0
+        for start in range(0, len(keys), options["batch_size"]):
+            for key in keys[start : start + options["batch_size"]]:
+                try:
+                    geocode_cache.resolve(*key)
+                    resolved += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{key[0]},{key[1]}: {e}")
+            # Copy the newly cached addresses onto their issues (sql/009)
+            filled += supabase.rpc("fill_issue_addresses", {}).execute().data or 0
+
+        self.stdout.write(
+            json.dumps({"locations": resolved, "failed": failed, "issues": filled})
+        )
@@ -0,0 +1,55 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from hackthon_Demo_backend.ingest import (
+    INGEST_FORMATS,
+    PostgresWriter,
+    PostgrestWriter,
+    ingest,
+    iter_records,
+)
+from hackthon_Demo_backend.views import category_registry, supabase, use_direct_db
+
+
+class Command(BaseCommand):
+    help = "Bulk-import issues from an NDJSON or CSV export."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Export file to import")
+        parser.add_argument(
+            "--format",
+            choices=INGEST_FORMATS,
+            help="File format (default: guessed from the extension)",
+        )
+        parser.add_argument(
+            "--user-id",
+            help="users_table id recorded as reporter for rows without a user_id",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.INGEST_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.lower().endswith(".csv") else "ndjson")
+        writer = PostgresWriter() if use_direct_db else PostgrestWriter(supabase)
+
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as export:
+                summary = ingest(
+                    iter_records(export, fmt),
+                    category_registry,
+                    writer,
+                    default_user_id=options["user_id"],
+                    chunk_size=options["chunk_size"],
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in summary["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(
+            json.dumps({"inserted": summary["inserted"], "failed": summary["failed"]})
+        )
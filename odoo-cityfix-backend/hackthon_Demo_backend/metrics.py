@@ -0,0 +1,226 @@
+"""Request and upstream-call instrumentation.
+
+Every call to Supabase (through the instrumented httpx clients), to Postgres
+(through the connection pool) and to other HTTP services (wrapped in
+``timed``) is timed and counted. The timings of the current request are
+collected in a context variable and sent back in its ``Server-Timing``
+header by ``MetricsMiddleware``. Totals and latency histograms are kept per
+process and exposed at /metrics/ in the Prometheus text format.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+
+# Seconds; the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Supabase API paths and the upstream service each one is counted as
+SUPABASE_SERVICES = {
+    "rest": "supabase.rest",
+    "auth": "supabase.auth",
+    "storage": "supabase.storage",
+    "functions": "supabase.functions",
+}
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        names = (*self.labelnames, "le")
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_label_text(names, (*labels, bound))} {cumulative}"
+                )
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {total:.6f}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+http_requests = Counter(
+    "cityfix_http_requests_total",
+    "Requests handled, by route, method and status code.",
+    ("route", "method", "status"),
+)
+http_request_duration = Histogram(
+    "cityfix_http_request_duration_seconds",
+    "Time to produce a response (streamed bodies excluded), by route and method.",
+    ("route", "method"),
+)
+upstream_calls = Counter(
+    "cityfix_upstream_calls_total",
+    "Calls to Supabase, Postgres and other services, by service and outcome.",
+    ("service", "outcome"),
+)
+upstream_duration = Histogram(
+    "cityfix_upstream_call_duration_seconds",
+    "Duration of upstream calls, by service.",
+    ("service",),
+)
+
+REGISTRY = (http_requests, http_request_duration, upstream_calls, upstream_duration)
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class RequestTimings:
+    """Upstream calls made while handling one request, as ``(name, seconds)``."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.calls = []
+
+    def add(self, name, seconds):
+        # list.append is atomic, so threads running sync_to_async code can share this
+        self.calls.append((name, seconds))
+
+    def server_timing(self, total=None):
+        """The ``Server-Timing`` header value: per-service totals plus the whole request."""
+        if total is None:
+            total = time.perf_counter() - self.started
+        totals = {}
+        for name, seconds in self.calls:
+            duration, count = totals.get(name, (0.0, 0))
+            totals[name] = (duration + seconds, count + 1)
+        entries = [f"total;dur={total * 1000:.1f}"]
+        for name, (duration, count) in totals.items():
+            entry = f"{name};dur={duration * 1000:.1f}"
+            if count > 1:
+                entry += f';desc="{count} calls"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+current_timings = contextvars.ContextVar("current_timings", default=None)
+
+
+def record(name, seconds, outcome="ok"):
+    upstream_calls.inc(name, outcome)
+    upstream_duration.observe(seconds, name)
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def timed(name):
+    """Time the block as one call to the upstream service ``name``."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        record(name, time.perf_counter() - started, outcome)
+
+
+@contextmanager
+def stage(name):
+    """Time the block as a step of the current request, shown in ``Server-Timing`` only."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add(name, time.perf_counter() - started)
+
+
+def service_name(url):
+    """``supabase.rest``, ``supabase.auth``, ... for Supabase URLs, else the host."""
+    parts = url.path.split("/")
+    if len(parts) > 1 and parts[1] in SUPABASE_SERVICES:
+        return SUPABASE_SERVICES[parts[1]]
+    return url.host
+
+
+class TimedTransport(httpx.BaseTransport):
+    """Times every request made through a sync httpx client, up to the response headers."""
+
+    def __init__(self, transport=None):
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request):
+        with timed(service_name(request.url)):
+            return self._transport.handle_request(request)
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncTimedTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport=None):
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request):
+        with timed(service_name(request.url)):
+            return await self._transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self._transport.aclose()
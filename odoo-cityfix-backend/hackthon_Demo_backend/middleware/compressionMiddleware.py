@@ -0,0 +1,100 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    # Optional: without it, gzip is offered alone
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+# Routes whose responses always carry a new session's tokens
+TOKEN_PATHS = ("/login/",)
+
+
+def accepted_encodings(header):
+    """The encodings in an Accept-Encoding header that aren't refused with q=0."""
+    encodings = set()
+    for part in header.split(","):
+        name, *params = part.strip().split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def carries_tokens(request):
+    """Whether the response body holds session tokens (a login, or a refresh)."""
+    # SupabaseAuthMiddleware sets request.access when it refreshed the session
+    return request.path in TOKEN_PATHS or getattr(request, "access", None) is not None
+
+
+class CompressionMiddleware:
+    """Compress JSON and text responses with brotli or gzip, as the client accepts.
+
+    Streamed responses (the event stream, exports) pass through untouched so
+    events aren't held back in a compressor buffer. Responses that echo
+    tokens next to user input are a BREACH target: gzip output gets Django's
+    random-length header padding, as GZipMiddleware does, and since brotli
+    has no equivalent, responses carrying tokens are only ever gzipped.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self._compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._compress(request, await self.get_response(request))
+
+    def _compress(self, request, response):
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or not response.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES)
+        ):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if len(response.content) < self.min_size:
+            return response
+
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        if brotli is not None and "br" in accepted and not carries_tokens(request):
+            encoding = "br"
+            compressed = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+        elif "gzip" in accepted:
+            encoding = "gzip"
+            compressed = compress_string(response.content, max_random_bytes=100)
+        else:
+            return response
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        # The compressed body is a different representation of the same resource
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
@@ -0,0 +1,107 @@
+import logging
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.urls import Resolver404, resolve
+
+from .. import logs
+from ..metrics import RequestTimings, current_timings, http_request_duration, http_requests
+
+logger = logging.getLogger("hackthon_Demo_backend.requests")
+
+
+def _route(request):
+    """The matched URL pattern, so metrics don't get one series per issue id."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return "unmatched"
+    return "/" + match.route
+
+
+def _request_id(request):
+    # Keep the proxy's id so its logs and ours can be joined
+    incoming = request.headers.get("X-Request-ID", "")
+    if incoming and len(incoming) <= 64:
+        return incoming
+    return uuid.uuid4().hex[:16]
+
+
+class MetricsMiddleware:
+    """Time every request, count it, and log one line for it.
+
+    The response carries the upstream calls it made in ``Server-Timing``
+    and its id in ``X-Request-ID``. Streamed bodies are timed up to the
+    first byte.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings, tokens = self._start(request)
+        try:
+            response = self.get_response(request)
+            return self._finish(request, response, timings)
+        finally:
+            self._reset(tokens)
+
+    async def __acall__(self, request):
+        timings, tokens = self._start(request)
+        try:
+            response = await self.get_response(request)
+            return self._finish(request, response, timings)
+        finally:
+            self._reset(tokens)
+
+    @staticmethod
+    def _start(request):
+        timings = RequestTimings()
+        tokens = (current_timings.set(timings), logs.request_id.set(_request_id(request)))
+        return timings, tokens
+
+    @staticmethod
+    def _reset(tokens):
+        timings_token, request_id_token = tokens
+        current_timings.reset(timings_token)
+        logs.request_id.reset(request_id_token)
+
+    @staticmethod
+    def _finish(request, response, timings):
+        duration = time.perf_counter() - timings.started
+        route = _route(request)
+        http_requests.inc(route, request.method, str(response.status_code))
+        http_request_duration.observe(duration, route, request.method)
+
+        response["Server-Timing"] = timings.server_timing(duration)
+        response["Timing-Allow-Origin"] = "*"
+        response["X-Request-ID"] = logs.request_id.get()
+
+        upstream = {}
+        for name, seconds in timings.calls:
+            upstream[name] = round(upstream.get(name, 0) + seconds * 1000, 1)
+        logger.info(
+            "%s %s %s",
+            request.method,
+            request.path,
+            response.status_code,
+            extra={
+                "route": route,
+                "method": request.method,
+                "status": response.status_code,
+                "duration_ms": round(duration * 1000, 1),
+                "timings": upstream,
+            },
+        )
+        return response
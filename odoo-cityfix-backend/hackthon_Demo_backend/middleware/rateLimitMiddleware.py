@@ -0,0 +1,81 @@
+import math
+
+import jwt
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import JsonResponse
+
+from ..auth_tokens import UndecidedToken, verify_access_token
+from ..rate_limit import client_ip, get_rate_limit_store, route_limits
+from .supabaseMiddleware import _read_tokens, token_cache
+
+
+def _user_id(request):
+    """The signed-in user's id when the token can be checked locally, else None.
+
+    Runs before SupabaseAuthMiddleware, so it never asks the auth server;
+    requests it can't attribute are still limited by IP.
+    """
+    try:
+        access_token, _ = _read_tokens(request)
+        if not access_token:
+            return None
+        user = token_cache.get(access_token)
+        if user is None:
+            user, _ = verify_access_token(access_token)
+        return user.user.id
+    except (ValueError, UndecidedToken, jwt.PyJWTError, AttributeError):
+        return None
+
+
+class RateLimitMiddleware:
+    """Reject requests over their route's RATE_LIMITS with 429 and ``Retry-After``.
+
+    Placed ahead of SupabaseAuthMiddleware so throttled traffic costs no
+    remote auth work.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limits = route_limits()
+        self.store = get_rate_limit_store()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self._check(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path in self.limits:
+            if self.store.blocking:
+                rejected = await sync_to_async(self._check, thread_sensitive=False)(request)
+            else:
+                rejected = self._check(request)
+            if rejected is not None:
+                return rejected
+        return await self.get_response(request)
+
+    def _check(self, request):
+        """Take a token from each of the route's buckets; return the 429 response or None."""
+        limits = self.limits.get(request.path)
+        # CORS preflights carry no tokens and must not use up the budget
+        if not limits or request.method == "OPTIONS":
+            return None
+
+        for scope, rate, burst in limits:
+            key = client_ip(request) if scope == "ip" else _user_id(request)
+            if not key:
+                continue
+            retry_after = self.store.take(f"{scope}:{request.path}:{key}", rate, burst)
+            if retry_after:
+                response = JsonResponse(
+                    {"error": "Too many requests. Please try again later."}, status=429
+                )
+                response["Retry-After"] = str(math.ceil(retry_after))
+                return response
+        return None
@@ -1,68 +1,240 @@
 from django.http import JsonResponse
 from django.conf import settings
-from supabase import create_client
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 import json
+import jwt
+from ..async_supabase import get_async_auth
+from ..auth_tokens import (
+    SingleFlight,
+    TokenCache,
+    UndecidedToken,
+    token_expiry,
+    verify_access_token,
+)
+from ..clients import auth
+from ..metrics import stage
 
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+token_cache = TokenCache(maxsize=settings.JWT_CACHE_SIZE, ttl=settings.JWT_CACHE_TTL)
+
+# Concurrent requests carrying the same stale session share one refresh
+session_refreshes = SingleFlight(ttl=settings.REFRESH_CACHE_TTL)
+
+
+PUBLIC_PATHS = [
+    "/login/",
+    "/register/",
+    "/verify_user/",
+    "/forgot-password/",
+    "/reset-password/",
+    "/metrics/",
+]
+
+# Uploaded photos are linked from <img> tags, which carry no tokens
+PUBLIC_PATH_PREFIXES = ("/media/",)
+
+# EventSource cannot set headers, so only this route reads the access token
+# from the query string
+EVENT_STREAM_PATH = "/issues/events/"
+
+
+def _verify_locally(access_token):
+    """Return ``(user, expires_at)`` from the cache or local verification.
+
+    Returns None for tokens that are definitely invalid; raises
+    ``UndecidedToken`` when the auth server has to decide and
+    ``jwt.ExpiredSignatureError`` for expired tokens.
+    """
+    if not access_token:
+        return None
+
+    user = token_cache.get(access_token)
+    if user:
+        return user, None
+
+    try:
+        return verify_access_token(access_token)
+    except jwt.ExpiredSignatureError:
+        raise
+    except jwt.InvalidTokenError:
+        return None
+
+
+def get_user(access_token):
+    """Resolve an access token to a user, verifying it locally when possible."""
+    try:
+        verified = _verify_locally(access_token)
+        if not verified:
+            return None
+        user, expires_at = verified
+    except UndecidedToken:
+        # Only the auth server can tell, e.g. the token was signed with a rotated key
+        user = auth.get_user(access_token)
+        expires_at = token_expiry(access_token)
+
+    if user and expires_at:
+        token_cache.put(access_token, user, expires_at)
+    return user
+
+
+async def aget_user(access_token):
+    try:
+        verified = _verify_locally(access_token)
+        if not verified:
+            return None
+        user, expires_at = verified
+    except UndecidedToken:
+        client = await get_async_auth()
+        user = await client.get_user(access_token)
+        expires_at = token_expiry(access_token)
+
+    if user and expires_at:
+        token_cache.put(access_token, user, expires_at)
+    return user
+
+
+def _session_from_refresh(new_session):
+    if not new_session.session:
+        return None
+
+    access_token = new_session.session.access_token
+    try:
+        user, expires_at = verify_access_token(access_token)
+    except UndecidedToken:
+        # The refresh response already carries the user, no need to ask again
+        user, expires_at = new_session, token_expiry(access_token)
+    token_cache.put(access_token, user, expires_at)
+    return access_token, new_session.session.refresh_token, user
+
+
+def refresh_session(refresh_token):
+    """Return ``(access_token, refresh_token, user)`` for a refresh token, or None.
+
+    The result is shared with concurrent and follow-up requests that carry the
+    same refresh token for REFRESH_CACHE_TTL seconds.
+    """
+    return session_refreshes.do(
+        refresh_token,
+        lambda: _session_from_refresh(auth.refresh_session(refresh_token)),
+    )
+
+
+async def arefresh_session(refresh_token):
+    async def refresh():
+        client = await get_async_auth()
+        return _session_from_refresh(await client.refresh_session(refresh_token))
+
+    return await session_refreshes.ado(refresh_token, refresh)
+
+
+def _read_tokens(request):
+    # Streaming endpoints send the tokens as headers so the body is left unread
+    authorization = request.headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        return authorization[len("Bearer ") :], request.headers.get("X-Refresh-Token")
+    if request.path == EVENT_STREAM_PATH and request.method == "GET":
+        # Never a refresh token: the stream can't hand rotated tokens back, and
+        # the browser would keep a spent one. An expired token is rejected and
+        # the client reopens the stream with its current cookies.
+        return request.GET.get("access_token"), None
+
+    body_unicode = request.body.decode("utf-8")
+    body_data = json.loads(body_unicode) if body_unicode else {}
+    return body_data.get("access_token"), body_data.get("refresh_token")
 
 
 class SupabaseAuthMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
         # Skip auth check for public routes
-        if request.path in [
-            "/login/",
-            "/register/",
-            "/verify_user/",
-            "/forgot-password/",
-            "/reset-password/",
-        ]:
+        if request.path in PUBLIC_PATHS or request.path.startswith(PUBLIC_PATH_PREFIXES):
             return self.get_response(request)
 
-        body_unicode = request.body.decode("utf-8")
-        body_data = json.loads(body_unicode)
-        access_token = body_data.get("access_token")
-        refresh_token = body_data.get("refresh_token")
+        access_token, refresh_token = _read_tokens(request)
 
         try:
             # Check if token is expired
-            user = supabase.auth.get_user(access_token)
-            if not user:
-                return JsonResponse({"error": "Invalid token"}, status=201)
+            with stage("auth"):
+                user = get_user(access_token)
+        except Exception as e:
+            # If token expired, try refreshing
+            if "expired" not in str(e).lower():
+                return JsonResponse({"error": "Unauthorized"}, status=201)
+            if not refresh_token:
+                return JsonResponse(
+                    {"error": "Session expired. Please log in again."}, status=201
+                )
 
-            # Attach user to request for views to use
-            request.user = user
+            try:
+                with stage("auth"):
+                    new_session = refresh_session(refresh_token)
+            except Exception as e:
+                return JsonResponse(
+                    {"error": "Refresh token invalid or expired"}, status=201
+                )
+            error = self._with_session(request, new_session)
+            if error is not None:
+                return error
             return self.get_response(request)
 
+        if not user:
+            return JsonResponse({"error": "Invalid token"}, status=201)
+
+        # Attach user to request for views to use
+        request.user = user
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path in PUBLIC_PATHS or request.path.startswith(PUBLIC_PATH_PREFIXES):
+            return await self.get_response(request)
+
+        access_token, refresh_token = _read_tokens(request)
+
+        try:
+            with stage("auth"):
+                user = await aget_user(access_token)
         except Exception as e:
-            # If token expired, try refreshing
-            if "expired" in str(e).lower():
-                if not refresh_token:
-                    return JsonResponse(
-                        {"error": "Session expired. Please log in again."}, status=201
-                    )
-
-                try:
-                    new_session = supabase.auth.refresh_session(refresh_token)
-
-                    if not new_session.session:
-                        return JsonResponse(
-                            {"error": "Failed to refresh session"}, status=201
-                        )
-
-                    # Optional: update cookies or headers with new tokens
-                    new_access_token = new_session.session.access_token
-                    new_refresh_token = new_session.session.refresh_token
-                    # You might want to attach the new token to the request or response
-                    request.user = supabase.auth.get_user(new_access_token)
-                    request.refresh = new_refresh_token
-                    request.access = new_access_token
-                    return self.get_response(request)
-
-                except Exception as e:
-                    return JsonResponse(
-                        {"error": "Refresh token invalid or expired"}, status=201
-                    )
-            return JsonResponse({"error": "Unauthorized"}, status=201)
+            if "expired" not in str(e).lower():
+                return JsonResponse({"error": "Unauthorized"}, status=201)
+            if not refresh_token:
+                return JsonResponse(
+                    {"error": "Session expired. Please log in again."}, status=201
+                )
+
+            try:
+                with stage("auth"):
+                    new_session = await arefresh_session(refresh_token)
+            except Exception as e:
+                return JsonResponse(
+                    {"error": "Refresh token invalid or expired"}, status=201
+                )
+            error = self._with_session(request, new_session)
+            if error is not None:
+                return error
+            return await self.get_response(request)
+
+        if not user:
+            return JsonResponse({"error": "Invalid token"}, status=201)
+
+        request.user = user
+        return await self.get_response(request)
+
+    @staticmethod
+    def _with_session(request, new_session):
+        """Attach a refreshed session to the request, or return the error response."""
+        if not new_session:
+            return JsonResponse({"error": "Failed to refresh session"}, status=201)
+
+        # Views hand the new tokens back to the client
+        request.access, request.refresh, request.user = new_session
+        return None
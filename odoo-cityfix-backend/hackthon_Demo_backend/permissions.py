@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+# users_table ids never change, so the email -> id lookups are remembered
+USER_ID_CACHE_SIZE = 10000
+_user_ids = OrderedDict()
+_user_ids_lock = threading.Lock()
+
+
+def request_email(request):
+    """Email of the authenticated user, whichever way the middleware resolved it."""
+    user = getattr(request, "user", None)
+    user = getattr(user, "user", None)
+    return getattr(user, "email", None)
+
+
+def _user_query(supabase, email):
+    return supabase.table("users_table").select("id, email, role").eq("email", email.lower())
+
+
+def _admin_row(rows):
+    if rows and rows[0].get("role") in settings.ADMIN_ROLES:
+        return rows[0]
+    return None
+
+
+def get_admin(supabase, request):
+    """Return the caller's ``users_table`` row if they have an admin role, else None."""
+    email = request_email(request)
+    if not email:
+        return None
+    return _admin_row(_user_query(supabase, email).execute().data)
+
+
+async def aget_admin(supabase, request):
+    """``get_admin`` over the async Supabase client."""
+    email = request_email(request)
+    if not email:
+        return None
+    return _admin_row((await _user_query(supabase, email).execute()).data)
+
+
+def _cached_user_id(email):
+    with _user_ids_lock:
+        user_id = _user_ids.get(email)
+        if user_id is not None:
+            _user_ids.move_to_end(email)
+        return user_id
+
+
+def _remember_user_id(email, rows):
+    if not rows:
+        return None
+    with _user_ids_lock:
+        _user_ids[email] = rows[0]["id"]
+        if len(_user_ids) > USER_ID_CACHE_SIZE:
+            _user_ids.popitem(last=False)
+    return rows[0]["id"]
+
+
+def get_user_id(supabase, request):
+    """The caller's ``users_table`` id, from the verified token, or None.
+
+    Views act as this user rather than as any id the request body names.
+    """
+    email = request_email(request)
+    if not email:
+        return None
+    user_id = _cached_user_id(email.lower())
+    if user_id is None:
+        rows = _user_query(supabase, email).execute().data
+        user_id = _remember_user_id(email.lower(), rows)
+    return user_id
+
+
+async def aget_user_id(supabase, request):
+    """``get_user_id`` over the async Supabase client."""
+    email = request_email(request)
+    if not email:
+        return None
+    user_id = _cached_user_id(email.lower())
+    if user_id is None:
+        rows = (await _user_query(supabase, email).execute()).data
+        user_id = _remember_user_id(email.lower(), rows)
+    return user_id
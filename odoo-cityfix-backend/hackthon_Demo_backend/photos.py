@@ -0,0 +1,101 @@
+"""Issue photo uploads and background thumbnailing.
+
+Uploads are streamed to storage as they arrive (Django spools anything over
+FILE_UPLOAD_MAX_MEMORY_SIZE to a temporary file). Once an issue is created,
+WebP thumbnails of its photos are generated in a small thread pool and
+recorded in ``issue_photos.thumbnail_url`` (sql/007); list responses use
+them instead of the originals.
+"""
+
+import io
+import logging
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes of the accepted image formats
+PHOTO_SIGNATURES = {
+    b"\xff\xd8\xff": ("image/jpeg", ".jpg"),
+    b"\x89PNG\r\n\x1a\n": ("image/png", ".png"),
+}
+THUMBNAIL_SIZE = 480
+# The names store_photo gives uploads; image URLs come from the client, so
+# only these are ever opened for thumbnailing
+UPLOAD_NAME = re.compile(r"issues/[0-9a-f]{32}\.(jpg|png|webp)")
+
+
+def sniff_photo(uploaded_file):
+    """Return ``(content_type, extension)`` from the file's magic bytes; raise ValueError."""
+    head = uploaded_file.read(12)
+    uploaded_file.seek(0)
+    for signature, kind in PHOTO_SIGNATURES.items():
+        if head.startswith(signature):
+            return kind
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    raise ValueError("Photos must be JPEG, PNG or WebP images")
+
+
+def store_photo(storage, uploaded_file, max_bytes):
+    """Validate an uploaded photo and stream it to storage; return its URL."""
+    if uploaded_file.size > max_bytes:
+        raise ValueError(f"Photos must be smaller than {max_bytes // (1024 * 1024)} MB")
+    content_type, extension = sniff_photo(uploaded_file)
+    name = f"issues/{uuid.uuid4().hex}{extension}"
+    return storage.save(name, uploaded_file, content_type=content_type)
+
+
+def thumbnail_name(name):
+    stem = name.rsplit(".", 1)[0]
+    return f"thumbs/{stem}_{THUMBNAIL_SIZE}.webp"
+
+
+def make_thumbnail(storage, name, size=THUMBNAIL_SIZE):
+    """Write a WebP thumbnail of the stored photo ``name``; return its URL."""
+    from PIL import Image, ImageOps
+
+    with storage.open(name) as f, Image.open(f) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        image.save(out, "WEBP", quality=80)
+    return storage.save(thumbnail_name(name), out.getvalue(), content_type="image/webp")
+
+
+class ThumbnailWorker:
+    """Generates thumbnails off the request thread and records them with ``on_done``."""
+
+    def __init__(self, storage, on_done, max_workers=2):
+        self.storage = storage
+        self.on_done = on_done
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="thumbnails"
+        )
+
+    def submit(self, image_urls):
+        for image_url in image_urls:
+            name = self.storage.name_for(image_url)
+            if name and UPLOAD_NAME.fullmatch(name):
+                self._executor.submit(self._run, image_url, name)
+
+    def _run(self, image_url, name):
+        try:
+            self.on_done(image_url, make_thumbnail(self.storage, name))
+        except Exception:
+            logger.exception("Thumbnail of %s failed", image_url)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def record_thumbnail(supabase):
+    def on_done(image_url, thumbnail_url):
+        supabase.table("issue_photos").update({"thumbnail_url": thumbnail_url}).eq(
+            "image_url", image_url
+        ).execute()
+
+    return on_done
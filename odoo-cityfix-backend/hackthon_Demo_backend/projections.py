@@ -0,0 +1,94 @@
+"""The columns each issue and user response carries, and the ``fields`` selector.
+
+Responses name their columns instead of selecting ``*``, so a column added
+to a table doesn't grow every payload, and the reporter is embedded by name
+only (clients match their own issues on ``user_id``). List endpoints also
+take a ``fields`` list; it narrows the PostgREST select, so unrequested
+columns are never fetched, let alone encoded.
+"""
+
+ISSUE_COLUMNS = (
+    "id",
+    "title",
+    "description",
+    "category_id",
+    "user_id",
+    "latitude",
+    "longitude",
+    "address",
+    "status",
+    "priority",
+    "report_count",
+    "flag_count",
+    "is_hidden",
+    "is_anonymous",
+    "created_at",
+    "updated_at",
+)
+
+REPORTER = "users_table(first_name, last_name)"
+PHOTOS = "issue_photos(image_url, thumbnail_url)"
+
+# Response field -> select item. Category names are filled in from the
+# in-process registry, so ``categories`` only needs ``category_id``.
+ISSUE_FEED_FIELDS = {
+    **{column: column for column in ISSUE_COLUMNS},
+    "categories": "category_id",
+    "users_table": REPORTER,
+    "issue_photos": PHOTOS,
+    "issue_status_logs": "issue_status_logs(status, changed_at)",
+}
+# Feed cursors and client caches are keyed on these, so they are always sent
+FEED_REQUIRED_FIELDS = ("id", "created_at")
+
+ISSUE_DETAIL_SELECT = ", ".join((*ISSUE_COLUMNS, REPORTER, PHOTOS))
+STATUS_LOG_SELECT = "id, issue_id, status, changed_at"
+SYNC_SELECT = ", ".join((*ISSUE_COLUMNS, REPORTER, PHOTOS))
+
+USER_COLUMNS = (
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "role",
+    "profile_pic",
+    "bio",
+    "is_verified",
+    "created_at",
+)
+USER_SELECT = ", ".join(USER_COLUMNS)
+
+
+def parse_fields(value, available=ISSUE_FEED_FIELDS):
+    """The requested field names, or None for all of them; raise ValueError.
+
+    ``value`` is a list or a comma-separated string.
+    """
+    if value in (None, "", []):
+        return None
+    names = value.split(",") if isinstance(value, str) else value
+    if not isinstance(names, list):
+        raise ValueError("'fields' must be a list of field names")
+
+    fields = []
+    for name in names:
+        name = str(name).strip()
+        if name not in available:
+            raise ValueError(f"Unknown field '{name}'")
+        if name not in fields:
+            fields.append(name)
+    return fields
+
+
+def select_for(fields=None, available=ISSUE_FEED_FIELDS, required=FEED_REQUIRED_FIELDS):
+    """The PostgREST select for ``fields`` (all of ``available`` when None)."""
+    names = available if fields is None else (*required, *fields)
+    items = []
+    for name in names:
+        if available[name] not in items:
+            items.append(available[name])
+    return ", ".join(items)
+
+
+def wants(fields, name):
+    return fields is None or name in fields
@@ -0,0 +1,117 @@
+"""Token-bucket rate limits for the expensive public and write endpoints.
+
+Limits are configured per route in RATE_LIMITS as ``"<count>/<period>"``
+strings (``"10/m"``: bursts of up to 10, refilled at 10 per minute), keyed
+by client IP and, for signed-in routes, by user. Buckets live in the store
+named by RATE_LIMIT_STORE: ``InMemoryRateLimitStore`` is per process;
+``PostgresRateLimitStore`` (sql/010) is shared by every worker.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .db_clients import get_pg_pool
+
+RATE_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """``"10/m"`` -> ``(tokens_per_second, burst)``; raise ValueError."""
+    try:
+        count, period = rate.split("/")
+        count = int(count)
+        seconds = RATE_PERIODS[period.strip().lower()]
+    except (AttributeError, KeyError, ValueError):
+        raise ValueError(f"Invalid rate '{rate}', expected e.g. '10/m'")
+    if count < 1:
+        raise ValueError(f"Invalid rate '{rate}', the count must be positive")
+    return count / seconds, count
+
+
+class InMemoryRateLimitStore:
+    """Buckets of this process only, as a bounded LRU of ``key -> (tokens, updated_at)``.
+
+    Evicting an idle bucket only refills it early.
+    """
+
+    # Cheap enough to call from the event loop
+    blocking = False
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize or settings.RATE_LIMIT_CACHE_SIZE
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        """Take one token; return 0 if allowed, else the seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return 0 if allowed else (1 - tokens) / rate
+
+
+TAKE_TOKEN_SQL = "SELECT take_rate_limit_token($1, $2, $3) AS retry_after"
+
+
+class PostgresRateLimitStore:
+    """Buckets shared by every worker, in an unlogged table (sql/010)."""
+
+    blocking = True
+
+    def take(self, key, rate, burst):
+        with get_pg_pool().connection() as conn:
+            with conn.execute_prepared(
+                "take_rate_limit_token", TAKE_TOKEN_SQL, (key, rate, burst)
+            ) as cursor:
+                return cursor.fetchone()["retry_after"]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_rate_limit_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(settings.RATE_LIMIT_STORE)()
+    return _store
+
+
+def route_limits(config=None):
+    """Parse RATE_LIMITS into ``{path: [(scope, rate, burst)]}``; raise ValueError."""
+    config = settings.RATE_LIMITS if config is None else config
+    limits = {}
+    for path, scopes in config.items():
+        for scope, rate in scopes.items():
+            if scope not in ("ip", "user"):
+                raise ValueError(f"Unknown rate limit scope '{scope}' for {path}")
+            limits.setdefault(path, []).append((scope, *parse_rate(rate)))
+    return limits
+
+
+def client_ip(request):
+    """The client address, looking through RATE_LIMIT_PROXY_COUNT trusted proxies."""
+    proxies = settings.RATE_LIMIT_PROXY_COUNT
+    if proxies:
+        forwarded = [
+            part.strip()
+            for part in request.headers.get("X-Forwarded-For", "").split(",")
+            if part.strip()
+        ]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
@@ -0,0 +1,94 @@
+"""Base class for the in-process indexes over database rows.
+
+Each index is rebuilt from its loader every ``ttl`` seconds, which picks up
+writes made by other worker processes. Only the first load blocks (``warm``
+does it at startup); after that a stale index keeps serving while a
+background thread rebuilds it.
+
+Writes made in this process are applied straight away. Those made while a
+rebuild is loading are also recorded and replayed onto the new index, so
+swapping it in doesn't undo them.
+"""
+
+import threading
+import time
+
+
+class ReloadingIndex:
+    thread_name = "index-reload"
+
+    def __init__(self, loader, ttl):
+        self.loader = loader
+        self.ttl = ttl
+        self._loaded_at = None
+        # Bumped by invalidate; the index is stale until a rebuild started after it
+        self._version = 0
+        self._loaded_version = 0
+        # (apply, args) of the writes made while a rebuild is loading
+        self._pending = None
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    def _build(self):
+        """Read ``loader`` into a new index; runs without the lock held."""
+        raise NotImplementedError
+
+    def _install(self, index):
+        """Replace the served index with ``index``; runs with the lock held."""
+        raise NotImplementedError
+
+    def _is_fresh(self):
+        loaded_at = self._loaded_at
+        return (
+            loaded_at is not None
+            and self._loaded_version == self._version
+            and time.monotonic() - loaded_at < self.ttl
+        )
+
+    def _ensure_fresh(self):
+        if self._is_fresh():
+            return
+        if self._loaded_at is None:
+            self._rebuild()
+        elif self._rebuild_lock.acquire(blocking=False):
+            self._rebuild_lock.release()
+            threading.Thread(target=self._rebuild, name=self.thread_name, daemon=True).start()
+
+    def _rebuild(self, max_age=None):
+        """Rebuild unless fresh; with ``max_age``, also once older than that."""
+        with self._rebuild_lock:
+            if self._is_fresh() and (
+                max_age is None or time.monotonic() - self._loaded_at <= max_age
+            ):
+                return
+            with self._lock:
+                version = self._version
+                self._pending = []
+            try:
+                index = self._build()
+            except BaseException:
+                with self._lock:
+                    self._pending = None
+                raise
+            with self._lock:
+                self._install(index)
+                for apply, args in self._pending:
+                    apply(*args)
+                self._pending = None
+                self._loaded_at = time.monotonic()
+                self._loaded_version = version
+
+    def _write(self, apply, *args):
+        """Run ``apply(*args)`` against the served index, and the next one."""
+        with self._lock:
+            apply(*args)
+            if self._pending is not None:
+                self._pending.append((apply, args))
+
+    def warm(self):
+        self._rebuild()
+
+    def invalidate(self):
+        """Rebuild on next use; until then the current index keeps serving."""
+        with self._lock:
+            self._version += 1
@@ -0,0 +1,150 @@
+"""Direct SQL for the hot queries, over the pooled Postgres connection.
+
+Used instead of PostgREST when DATA_BACKEND is "postgres". Rows come back in
+the same shape as the equivalent PostgREST selects, embedded relations
+included, so views can switch between the two freely.
+"""
+
+import json
+
+from .db_clients import get_pg_pool
+from .projections import ISSUE_COLUMNS, USER_COLUMNS
+
+USER_BY_EMAIL_SQL = f"SELECT {', '.join(USER_COLUMNS)} FROM users_table WHERE email = $1"
+
+ISSUE_BY_ID_SQL = f"""
+    SELECT {', '.join(f'i.{column}' for column in ISSUE_COLUMNS)},
+           json_build_object('name', c.name) AS categories,
+           json_build_object('first_name', u.first_name, 'last_name', u.last_name) AS users_table,
+           COALESCE(
+               (SELECT json_agg(json_build_object('image_url', p.image_url, 'thumbnail_url', p.thumbnail_url))
+                FROM issue_photos p WHERE p.issue_id = i.id),
+               '[]'::json
+           ) AS issue_photos
+    FROM issues i
+    LEFT JOIN categories c ON c.id = i.category_id
+    LEFT JOIN users_table u ON u.id = i.user_id
+    WHERE i.id = $1
+"""
+
+STATUS_LOGS_SQL = """
+    SELECT id, issue_id, status, changed_at FROM issue_status_logs
+    WHERE issue_id = $1 ORDER BY changed_at
+"""
+
+ADD_ISSUE_REPORT_SQL = """
+    SELECT add_issue_report($1, $2, $3::text[]) AS issue
+"""
+
+FLAG_ISSUE_SQL = """
+    SELECT flag_issue($1, $2, $3) AS issue
+"""
+
+UPDATE_ISSUES_SQL = """
+    SELECT update_issues($1::jsonb) AS issues
+"""
+
+STAT_COUNTS_SQL = """
+    SELECT dimension, key, count FROM issue_stat_counts
+    WHERE count > 0
+      AND (dimension IN ('status', 'category', 'cell')
+           OR (dimension = 'day' AND key >= $1)
+           OR (dimension = 'week' AND key >= $2))
+"""
+
+RESOLUTION_HISTOGRAM_SQL = """
+    SELECT hours, count FROM issue_resolution_histogram WHERE count > 0 ORDER BY hours
+"""
+
+CREATE_ISSUE_SQL = """
+    SELECT create_issue($1, $2, $3, $4, $5, $6, $7::text[]) AS issue
+"""
+
+
+def _fetchone(conn, name, sql, params):
+    with conn.execute_prepared(name, sql, params) as cursor:
+        return cursor.fetchone()
+
+
+def _fetchall(conn, name, sql, params):
+    with conn.execute_prepared(name, sql, params) as cursor:
+        return cursor.fetchall()
+
+
+def get_user_by_email(email):
+    with get_pg_pool().connection() as conn:
+        return _fetchone(conn, "user_by_email", USER_BY_EMAIL_SQL, (email,))
+
+
+def get_issue(issue_id):
+    with get_pg_pool().connection() as conn:
+        return _fetchone(conn, "issue_by_id", ISSUE_BY_ID_SQL, (issue_id,))
+
+
+def get_status_logs(issue_id):
+    with get_pg_pool().connection() as conn:
+        return _fetchall(conn, "status_logs", STATUS_LOGS_SQL, (issue_id,))
+
+
+def get_issue_with_logs(issue_id):
+    """Return ``(issue, logs)`` using one pooled connection, or ``(None, [])``."""
+    with get_pg_pool().connection() as conn:
+        issue = _fetchone(conn, "issue_by_id", ISSUE_BY_ID_SQL, (issue_id,))
+        if not issue:
+            return None, []
+        logs = _fetchall(conn, "status_logs", STATUS_LOGS_SQL, (issue_id,))
+        return issue, logs
+
+
+def get_stat_rows(day_cutoff, week_cutoff):
+    """Return ``(count_rows, histogram)`` from the statistics rollups."""
+    with get_pg_pool().connection() as conn:
+        count_rows = _fetchall(
+            conn, "stat_counts", STAT_COUNTS_SQL, (day_cutoff, week_cutoff)
+        )
+        histogram = _fetchall(conn, "resolution_histogram", RESOLUTION_HISTOGRAM_SQL, ())
+        return count_rows, histogram
+
+
+def create_issue(params):
+    """Create an issue with its status log and photos in one round-trip.
+
+    ``params`` are the ``create_issue`` function arguments built by
+    ``issue_writes.create_issue_params``; returns the new issue.
+    """
+    args = (
+        params["p_title"],
+        params["p_description"],
+        params["p_category"],
+        params["p_user_id"],
+        params["p_latitude"],
+        params["p_longitude"],
+        params["p_image_urls"],
+    )
+    with get_pg_pool().connection() as conn:
+        return _fetchone(conn, "create_issue", CREATE_ISSUE_SQL, args)["issue"]
+
+
+def add_issue_report(params):
+    """Merge a duplicate report into an existing issue as a "+1"; return the issue."""
+    args = (params["p_issue_id"], params["p_user_id"], params["p_image_urls"])
+    with get_pg_pool().connection() as conn:
+        return _fetchone(conn, "add_issue_report", ADD_ISSUE_REPORT_SQL, args)["issue"]
+
+
+def flag_issue(params):
+    """Flag an issue once per user; return its flag state or None if it doesn't exist."""
+    args = (params["p_issue_id"], params["p_user_id"], params["p_hide_threshold"])
+    with get_pg_pool().connection() as conn:
+        return _fetchone(conn, "flag_issue", FLAG_ISSUE_SQL, args)["issue"]
+
+
+def update_issues(changes):
+    """Apply a batch of ``issue_writes.issue_changes`` in one round-trip.
+
+    Returns the updated issues.
+    """
+    with get_pg_pool().connection() as conn:
+        return _fetchone(conn, "update_issues", UPDATE_ISSUES_SQL, (json.dumps(changes),))[
+            "issues"
+        ]
@@ -0,0 +1,34 @@
+"""JSON responses encoded with orjson.
+
+orjson writes the response body straight to bytes in one pass, several
+times faster than the stdlib encoder behind Django's ``JsonResponse``, and
+handles datetimes and UUIDs natively. ``JsonResponse`` takes the same
+arguments as Django's, so views only change their import.
+"""
+
+from decimal import Decimal
+
+import orjson
+from django.http import HttpResponse
+from django.utils.functional import Promise
+
+
+def _default(value):
+    # What DjangoJSONEncoder adds on top of what orjson already knows
+    if isinstance(value, (Decimal, Promise)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data):
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class JsonResponse(HttpResponse):
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the safe parameter to False."
+            )
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
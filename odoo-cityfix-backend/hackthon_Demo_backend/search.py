@@ -0,0 +1,275 @@
+"""In-process inverted index for issue search.
+
+Every issue's title, description, category and address are tokenized into
+postings (term -> {issue_id: weighted term frequency}). A query matches the
+issues containing every query word, each word also matching longer terms it
+is a prefix of, and results are ranked by BM25. The index is rebuilt from
+the database in the background on a TTL, like the spatial index (see
+``ReloadingIndex``), and new issues are added as they are reported.
+"""
+
+import bisect
+import heapq
+import math
+import re
+from operator import itemgetter
+
+from .reloading import ReloadingIndex
+
+# Title words count for more than description words
+FIELD_WEIGHTS = {"title": 3, "category": 2, "address": 1, "description": 1}
+# A word matching only as a prefix ranks below an exact match
+PREFIX_PENALTY = 0.6
+MAX_PREFIX_EXPANSIONS = 50
+MIN_PREFIX_LENGTH = 3
+# In multi-word queries, words found in more than this share of issues are
+# ignored like stop words: they barely change the ranking but cost the most
+COMMON_WORD_RATIO = 0.25
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def load_search_documents(supabase, batch_size=1000):
+    last_id = None
+    while True:
+        query = (
+            supabase.table("issues")
+            .select("id, title, description, address, category_id, status, created_at")
+            .eq("is_hidden", False)
+        )
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(batch_size).execute().data
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+class _Snapshot:
+    def __init__(self):
+        self.postings = {}
+        self.terms = []
+        self.docs = {}
+        # BM25 length normalisation per issue, against the average at build time
+        self.norms = {}
+        self.avg_length = None
+
+    def add(self, issue_id, weights, category_id, status):
+        self.remove(issue_id)
+        for term, weight in weights.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                bisect.insort(self.terms, term)
+            postings[issue_id] = weight
+        length = sum(weights.values())
+        self.docs[issue_id] = [tuple(weights), length, category_id, status]
+        if self.avg_length:
+            self.norms[issue_id] = self._norm(length)
+
+    def finalize(self):
+        self.avg_length = sum(doc[1] for doc in self.docs.values()) / (len(self.docs) or 1) or 1
+        self.norms = {issue_id: self._norm(doc[1]) for issue_id, doc in self.docs.items()}
+
+    def _norm(self, length):
+        return BM25_K1 * (1 - BM25_B + BM25_B * length / self.avg_length)
+
+    def remove(self, issue_id):
+        doc = self.docs.pop(issue_id, None)
+        if doc is None:
+            return
+        self.norms.pop(issue_id, None)
+        for term in doc[0]:
+            postings = self.postings[term]
+            postings.pop(issue_id, None)
+            if not postings:
+                del self.postings[term]
+                self.terms.pop(bisect.bisect_left(self.terms, term))
+
+
+class SearchIndex(ReloadingIndex):
+    thread_name = "search-index"
+
+    def __init__(self, loader, categories, ttl=600):
+        super().__init__(loader, ttl)
+        self.categories = categories
+        self._index = _Snapshot()
+        self._index.finalize()
+
+    def _weights(self, issue):
+        weights = {}
+        fields = {
+            "title": issue.get("title"),
+            "description": issue.get("description"),
+            "category": self.categories.name_for(issue.get("category_id")),
+            "address": issue.get("address"),
+        }
+        for field, text in fields.items():
+            for term in tokenize(text):
+                weights[term] = weights.get(term, 0) + FIELD_WEIGHTS[field]
+        return weights
+
+    def _build(self):
+        index = _Snapshot()
+        for issue in self.loader():
+            index.add(
+                issue["id"], self._weights(issue), issue.get("category_id"), issue.get("status")
+            )
+        index.finalize()
+        return index
+
+    def _install(self, index):
+        self._index = index
+
+    def add(self, issue):
+        weights = self._weights(issue)
+        self._write(self._put, issue["id"], weights, issue.get("category_id"), issue.get("status"))
+
+    def update(self, issue_id, **changes):
+        self._write(self._change, issue_id, changes)
+
+    def remove(self, issue_id):
+        self._write(self._discard, issue_id)
+
+    def _put(self, issue_id, weights, category_id, status):
+        self._index.add(issue_id, weights, category_id, status)
+
+    def _change(self, issue_id, changes):
+        doc = self._index.docs.get(issue_id)
+        if doc is not None:
+            doc[2] = changes.get("category_id", doc[2])
+            doc[3] = changes.get("status", doc[3])
+
+    def _discard(self, issue_id):
+        self._index.remove(issue_id)
+
+    def _expand(self, index, word):
+        """Index terms matching ``word``, with their score factor."""
+        expansions = {}
+        if word in index.postings:
+            expansions[word] = 1.0
+        if len(word) >= MIN_PREFIX_LENGTH:
+            position = bisect.bisect_right(index.terms, word)
+            for term in index.terms[position : position + MAX_PREFIX_EXPANSIONS]:
+                if not term.startswith(word):
+                    break
+                expansions[term] = PREFIX_PENALTY
+        return expansions
+
+    def _term_boosts(self, index, word):
+        """``[(postings, boost)]`` for every index term the word matches."""
+        doc_count = len(index.docs) or 1
+        boosts = []
+        for term, factor in self._expand(index, word).items():
+            postings = index.postings[term]
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            boosts.append((postings, factor * idf * (BM25_K1 + 1)))
+        return boosts
+
+    @staticmethod
+    def _word_scores(norms, boosts):
+        """BM25 contribution of one query word for every issue it matches."""
+        scores = {}
+        for postings, boost in boosts:
+            term_scores = {
+                issue_id: boost * tf / (tf + norms[issue_id])
+                for issue_id, tf in postings.items()
+            }
+            if not scores:
+                scores = term_scores
+                continue
+            # An issue matching through several terms keeps its best one
+            for issue_id, score in term_scores.items():
+                if score > scores.get(issue_id, 0):
+                    scores[issue_id] = score
+        return scores
+
+    def search(self, query, category_id=None, status=None, limit=SEARCH_DEFAULT_LIMIT, offset=0):
+        """Return ``(total, [(score, issue_id)])`` for one page of ranked matches."""
+        self._ensure_fresh()
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return 0, []
+
+        with self._lock:
+            index = self._index
+            norms = index.norms
+            per_word = [self._term_boosts(index, word) for word in words]
+            # Every word must match: score the rarest word, then narrow down
+            per_word.sort(key=lambda boosts: sum(len(postings) for postings, _ in boosts))
+            common = COMMON_WORD_RATIO * len(index.docs)
+            per_word = per_word[:1] + [
+                boosts
+                for boosts in per_word[1:]
+                if sum(len(postings) for postings, _ in boosts) <= common
+            ]
+            scores = self._word_scores(norms, per_word[0])
+            if category_id is not None or status:
+                docs = index.docs
+                scores = {
+                    issue_id: score
+                    for issue_id, score in scores.items()
+                    if (category_id is None or docs[issue_id][2] == category_id)
+                    and (not status or docs[issue_id][3] == status)
+                }
+            for boosts in per_word[1:]:
+                # Probing the candidates is cheaper than scoring a common word in full
+                if 3 * len(scores) * len(boosts) > sum(len(postings) for postings, _ in boosts):
+                    other = self._word_scores(norms, boosts)
+                    scores = {
+                        issue_id: score + other[issue_id]
+                        for issue_id, score in scores.items()
+                        if issue_id in other
+                    }
+                    continue
+                narrowed = {}
+                for issue_id, score in scores.items():
+                    best = 0
+                    for postings, boost in boosts:
+                        tf = postings.get(issue_id)
+                        if tf:
+                            best = max(best, boost * tf / (tf + norms[issue_id]))
+                    if best:
+                        narrowed[issue_id] = score + best
+                scores = narrowed
+
+        top = heapq.nlargest(offset + limit, scores.items(), key=itemgetter(1))
+        return len(scores), [(round(score, 4), issue_id) for issue_id, score in top[offset:]]
+
+
+def parse_search_params(data, categories):
+    """Validate a search request body into ``SearchIndex.search`` keyword arguments."""
+    query = (data.get("q") or "").strip()
+    if not query:
+        raise ValueError("Missing search query 'q'")
+    try:
+        limit = int(data.get("limit") or SEARCH_DEFAULT_LIMIT)
+        offset = int(data.get("offset") or 0)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid 'limit' or 'offset'")
+    return {
+        "query": query,
+        "category_id": categories.resolve(data.get("category")),
+        "status": data.get("status") or None,
+        "limit": max(1, min(limit, SEARCH_MAX_LIMIT)),
+        "offset": max(0, offset),
+    }
+
+
+def with_search_scores(rows, matches):
+    """Order fetched rows like ``matches`` and add their search score."""
+    by_id = {row["id"]: row for row in rows}
+    issues = []
+    for score, issue_id in matches:
+        row = by_id.get(issue_id)
+        if row:
+            row["score"] = score
+            issues.append(row)
+    return issues
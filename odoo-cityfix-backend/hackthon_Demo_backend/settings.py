@@ -1,14 +1,13 @@
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 # load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 env_path = os.path.join(BASE_DIR, "keys.env")
 
-DATA_UPLOAD_MAX_MEMORY_SIZE = 20 * 1024 * 1024
-
 load_dotenv(dotenv_path=env_path)
 SECRET_KEY = os.getenv("SECRET_KEY")
 DEBUG = os.getenv("DEBUG")
@@ -23,6 +22,100 @@ DBNAME = os.getenv("DBNAME")
 
 MONGO_URI = os.getenv("MONGO_URI")
 
+# "postgrest" talks to Supabase over HTTP; "postgres" runs the hot queries over
+# pooled direct connections (use the session-mode or direct port, since the
+# pool relies on server-side prepared statements). Applies to the sync and the
+# ASYNC_VIEWS views alike: issue details, reports, flags and statistics
+DATA_BACKEND = os.getenv("DATA_BACKEND", "postgrest")
+PG_POOL_MAX_CONNECTIONS = int(os.getenv("PG_POOL_MAX_CONNECTIONS", 10))
+PG_POOL_MAX_AGE = int(os.getenv("PG_POOL_MAX_AGE", 1800))
+PG_POOL_HEALTH_CHECK_AFTER = int(os.getenv("PG_POOL_HEALTH_CHECK_AFTER", 30))
+PG_POOL_TIMEOUT = int(os.getenv("PG_POOL_TIMEOUT", 10))
+
+# Serve the Supabase-bound views with their async versions (run under asgi.py)
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "False") == "True"
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", 100))
+# Seconds an idle keep-alive connection to Supabase (or the geocoder) is kept
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+# Open this many Supabase (and, with DATA_BACKEND=postgres, database)
+# connections in the background when a worker starts, so the first requests
+# don't pay for the TLS handshakes
+WARM_UP_CLIENTS = os.getenv("WARM_UP_CLIENTS", "True") == "True"
+WARM_CONNECTIONS = int(os.getenv("WARM_CONNECTIONS", 4))
+
+# users_table roles allowed to use the admin endpoints
+ADMIN_ROLES = os.getenv("ADMIN_ROLES", "admin").split(",")
+# Rows written per multi-row insert by the bulk issue import
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", 500))
+
+# Seconds before the in-memory copy of the categories table is reloaded
+CATEGORY_CACHE_TTL = int(os.getenv("CATEGORY_CACHE_TTL", 3600))
+
+# Seconds before the in-memory spatial index of issues is rebuilt from the database
+GEO_INDEX_TTL = int(os.getenv("GEO_INDEX_TTL", 300))
+
+# Seconds before the in-memory full-text search index is rebuilt from the database
+SEARCH_INDEX_TTL = int(os.getenv("SEARCH_INDEX_TTL", 600))
+
+# Reverse geocoding of issue coordinates (see geocoding.py). Use
+# hackthon_Demo_backend.geocoding.StubGeocoder to run without network access
+GEOCODER = os.getenv("GEOCODER", "hackthon_Demo_backend.geocoding.NominatimGeocoder")
+GEOCODER_URL = os.getenv("GEOCODER_URL", "https://nominatim.openstreetmap.org/reverse")
+GEOCODER_USER_AGENT = os.getenv("GEOCODER_USER_AGENT", "CityFix/1.0")
+GEOCODER_TIMEOUT = float(os.getenv("GEOCODER_TIMEOUT", 3))
+# Resolved addresses kept in memory in front of the geocode_cache table
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", 10000))
+
+# Near-duplicate detection for new reports: open issues of the same category
+# within DEDUP_RADIUS_M metres are scored by description similarity (0-1).
+# At DEDUP_MERGE_SCORE the report is merged as a "+1"; from
+# DEDUP_CANDIDATE_SCORE the matches are returned for the reporter to choose
+DEDUP_RADIUS_M = int(os.getenv("DEDUP_RADIUS_M", 50))
+DEDUP_MERGE_SCORE = float(os.getenv("DEDUP_MERGE_SCORE", 0.8))
+DEDUP_CANDIDATE_SCORE = float(os.getenv("DEDUP_CANDIDATE_SCORE", 0.3))
+DEDUP_INDEX_TTL = int(os.getenv("DEDUP_INDEX_TTL", 300))
+
+# Issue detail documents (issue + status logs) cached per issue id; use
+# hackthon_Demo_backend.issue_cache.DjangoIssueCache to share them between
+# workers through the ISSUE_CACHE_ALIAS entry of CACHES
+ISSUE_CACHE = os.getenv("ISSUE_CACHE", "hackthon_Demo_backend.issue_cache.InMemoryIssueCache")
+ISSUE_CACHE_ALIAS = os.getenv("ISSUE_CACHE_ALIAS", "default")
+ISSUE_CACHE_SIZE = int(os.getenv("ISSUE_CACHE_SIZE", 2048))
+ISSUE_CACHE_TTL = int(os.getenv("ISSUE_CACHE_TTL", 300))
+
+# Distinct users flagging an issue as spam before it is hidden pending review
+FLAG_HIDE_THRESHOLD = int(os.getenv("FLAG_HIDE_THRESHOLD", 5))
+
+# Broker for the /issues/events/ push channel. InProcessBroker only reaches
+# clients of the same process; use PostgresNotifyBroker with several workers
+EVENT_BROKER = os.getenv("EVENT_BROKER", "hackthon_Demo_backend.events.InProcessBroker")
+# Recent events kept for clients resuming with Last-Event-ID
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", 1000))
+EVENT_HEARTBEAT = int(os.getenv("EVENT_HEARTBEAT", 15))
+# Under WSGI each open stream holds a worker thread; it is closed after this
+# long and the browser reconnects
+EVENT_WSGI_STREAM_SECONDS = int(os.getenv("EVENT_WSGI_STREAM_SECONDS", 300))
+
+# Token-bucket limits per route and scope ("ip" or "user"), as "<count>/<s|m|h|d>":
+# bursts of up to <count> requests, refilled at <count> per period
+RATE_LIMITS = {
+    "/report-new-issue/": {"user": "10/m", "ip": "30/m"},
+    "/report-spam/": {"user": "20/m", "ip": "60/m"},
+    "/photos/upload/": {"user": "30/m", "ip": "60/m"},
+    "/register/": {"ip": "5/m"},
+    "/login/": {"ip": "20/m"},
+    "/forgot-password/": {"ip": "5/m"},
+    "/reset-password/": {"ip": "10/m"},
+}
+# InMemoryRateLimitStore limits each worker separately; PostgresRateLimitStore
+# (sql/010) shares the buckets between workers
+RATE_LIMIT_STORE = os.getenv(
+    "RATE_LIMIT_STORE", "hackthon_Demo_backend.rate_limit.InMemoryRateLimitStore"
+)
+RATE_LIMIT_CACHE_SIZE = int(os.getenv("RATE_LIMIT_CACHE_SIZE", 100000))
+# Reverse proxies in front of the app whose X-Forwarded-For entries are trusted
+RATE_LIMIT_PROXY_COUNT = int(os.getenv("RATE_LIMIT_PROXY_COUNT", 0))
+
 ALLOWED_HOSTS = ["*"]
 
 INSTALLED_APPS = [
@@ -40,8 +133,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so the timings and logs cover every other middleware
+    "hackthon_Demo_backend.middleware.metricsMiddleware.MetricsMiddleware",
+    # Sees the final body, so it runs before everything that produces one
+    "hackthon_Demo_backend.middleware.compressionMiddleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # Before any session or Supabase auth work, so throttled requests are cheap
+    "hackthon_Demo_backend.middleware.rateLimitMiddleware.RateLimitMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -52,6 +151,9 @@ MIDDLEWARE = [
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
+# Uploads and streams send the tokens as headers
+CORS_ALLOW_HEADERS = (*default_headers, "x-refresh-token")
+CORS_EXPOSE_HEADERS = ["Server-Timing", "X-Request-ID", "Retry-After"]
 
 ROOT_URLCONF = "hackthon_Demo_backend.urls"
 
@@ -85,9 +187,49 @@ EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM")
-
-DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
+JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "authenticated")
+# Locally verified access tokens are remembered for at most JWT_CACHE_TTL seconds
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 4096))
+JWT_CACHE_TTL = int(os.getenv("JWT_CACHE_TTL", 300))
+# Seconds a refreshed session is reused by requests carrying the same refresh token
+REFRESH_CACHE_TTL = int(os.getenv("REFRESH_CACHE_TTL", 30))
+
+# Photos go through /photos/upload/ as multipart, so JSON bodies stay small;
+# uploaded files over 1 MB are spooled to disk instead of held in memory
+DATA_UPLOAD_MAX_MEMORY_SIZE = 1 * 1024 * 1024
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1 * 1024 * 1024
+
+# Where issue photos are stored: LocalPhotoStorage (MEDIA_ROOT, served by this
+# app at PHOTO_BASE_URL) or SupabasePhotoStorage (public PHOTO_BUCKET)
+PHOTO_STORAGE = os.getenv("PHOTO_STORAGE", "hackthon_Demo_backend.storage.LocalPhotoStorage")
+PHOTO_BUCKET = os.getenv("PHOTO_BUCKET", "issue-photos")
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", BASE_DIR / "media")
+PHOTO_BASE_URL = os.getenv("PHOTO_BASE_URL", "http://127.0.0.1:8000/media/")
+PHOTO_MAX_SIZE_MB = int(os.getenv("PHOTO_MAX_SIZE_MB", 8))
+PHOTO_MAX_COUNT = int(os.getenv("PHOTO_MAX_COUNT", 5))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", 2))
+
+# Responses smaller than this are sent uncompressed; brotli is offered when
+# the Brotli package is installed, gzip always
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 512))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 5))
+
+# One JSON object per line on stderr, written by a background thread
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "queue": {"class": "hackthon_Demo_backend.logs.QueueLogHandler"},
+    },
+    "root": {"handlers": ["queue"], "level": LOG_LEVEL},
+    "loggers": {
+        "django": {"handlers": ["queue"], "level": "INFO", "propagate": False},
+    },
+}
+# Bearer token required to read /metrics/; unset leaves it open (keep it
+# behind the proxy then)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 STATIC_URL = "static/"
 
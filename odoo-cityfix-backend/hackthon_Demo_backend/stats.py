@@ -0,0 +1,106 @@
+"""Dashboard statistics read from the rollup tables of sql/003.
+
+``issue_stat_counts`` and ``issue_resolution_histogram`` are kept current by
+triggers on every issue and status log write, so building the response costs
+the same whatever the number of issues.
+"""
+
+from datetime import date, timedelta
+
+STATS_DAYS = 90
+STATS_WEEKS = 26
+# Grid cell size used by issue_stat_keys() in sql/003
+STATS_CELL_DEG = 0.01
+
+
+def stats_cutoffs(today=None, days=STATS_DAYS, weeks=STATS_WEEKS):
+    """Return the oldest ``day`` and ``week`` keys to include, as ISO dates."""
+    today = today or date.today()
+    monday = today - timedelta(days=today.weekday())
+    return (
+        (today - timedelta(days=days - 1)).isoformat(),
+        (monday - timedelta(weeks=weeks - 1)).isoformat(),
+    )
+
+
+def stat_counts_query(supabase, day_cutoff, week_cutoff):
+    return (
+        supabase.table("issue_stat_counts")
+        .select("dimension, key, count")
+        .gt("count", 0)
+        .or_(
+            "dimension.in.(status,category,cell),"
+            f"and(dimension.eq.day,key.gte.{day_cutoff}),"
+            f"and(dimension.eq.week,key.gte.{week_cutoff})"
+        )
+    )
+
+
+def resolution_histogram_query(supabase):
+    return (
+        supabase.table("issue_resolution_histogram")
+        .select("hours, count")
+        .gt("count", 0)
+        .order("hours")
+    )
+
+
+def median_resolution_hours(histogram):
+    """Median of the hour buckets, taking the midpoint of the median bucket."""
+    buckets = sorted((row["hours"], row["count"]) for row in histogram)
+    total = sum(count for _, count in buckets)
+    if not total:
+        return None
+    seen = 0
+    for hours, count in buckets:
+        seen += count
+        if seen * 2 >= total:
+            return hours + 0.5
+
+
+def build_stats(count_rows, histogram, categories, cell_deg=STATS_CELL_DEG):
+    by_dimension = {}
+    for row in count_rows:
+        by_dimension.setdefault(row["dimension"], {})[row["key"]] = row["count"]
+
+    by_status = by_dimension.get("status", {})
+    by_category = {}
+    for category_id, count in by_dimension.get("category", {}).items():
+        name = categories.name_for(int(category_id)) or "Unknown"
+        by_category[name] = by_category.get(name, 0) + count
+
+    by_cell = []
+    for key, count in by_dimension.get("cell", {}).items():
+        lat_index, lng_index = (int(part) for part in key.split(":"))
+        by_cell.append(
+            {
+                "lat": round((lat_index + 0.5) * cell_deg, 6),
+                "lng": round((lng_index + 0.5) * cell_deg, 6),
+                "count": count,
+            }
+        )
+    by_cell.sort(key=lambda cell: -cell["count"])
+
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_category": by_category,
+        "by_day": [
+            {"date": key, "count": count}
+            for key, count in sorted(by_dimension.get("day", {}).items())
+        ],
+        "by_week": [
+            {"week": key, "count": count}
+            for key, count in sorted(by_dimension.get("week", {}).items())
+        ],
+        "by_cell": by_cell,
+        "resolved_count": sum(row["count"] for row in histogram),
+        "median_resolution_hours": median_resolution_hours(histogram),
+    }
+
+
+def fetch_stats(supabase, categories):
+    day_cutoff, week_cutoff = stats_cutoffs()
+    count_rows = stat_counts_query(supabase, day_cutoff, week_cutoff).execute().data
+    histogram = resolution_histogram_query(supabase).execute().data
+    return build_stats(count_rows, histogram, categories)
@@ -0,0 +1,102 @@
+"""Object storage for issue photos.
+
+The backend is chosen by PHOTO_STORAGE. ``LocalPhotoStorage`` writes under
+MEDIA_ROOT and is served by this app at PHOTO_BASE_URL (development and tests);
+``SupabasePhotoStorage`` writes to a public Supabase Storage bucket.
+"""
+
+import io
+import os
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .clients import supabase
+
+
+def _name_after(prefix, url):
+    """The storage name in ``url`` after ``prefix``, if it is a plain relative path."""
+    if not url or not url.startswith(prefix):
+        return None
+    name = url[len(prefix) :]
+    if any(part in ("", ".", "..") for part in name.split("/")) or "\\" in name:
+        return None
+    return name
+
+
+class LocalPhotoStorage:
+    def __init__(self, root=None, base_url=None):
+        self.root = str(root or settings.MEDIA_ROOT)
+        self.base_url = base_url or settings.PHOTO_BASE_URL
+
+    def _path(self, name):
+        root = os.path.realpath(self.root)
+        path = os.path.realpath(os.path.join(root, *name.split("/")))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Photo name {name!r} is outside the media root")
+        return path
+
+    def save(self, name, content, content_type=None):
+        """Write ``content`` (bytes or an uploaded file) to ``name``; return its URL."""
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            if isinstance(content, bytes):
+                f.write(content)
+            else:
+                for chunk in content.chunks():
+                    f.write(chunk)
+        return self.url(name)
+
+    def open(self, name):
+        return open(self._path(name), "rb")
+
+    def url(self, name):
+        return f"{self.base_url.rstrip('/')}/{name}"
+
+    def name_for(self, url):
+        """Storage name of one of our URLs, or None for a foreign URL."""
+        return _name_after(self.base_url.rstrip("/") + "/", url)
+
+
+class SupabasePhotoStorage:
+    def __init__(self, bucket=None):
+        self.bucket = bucket or settings.PHOTO_BUCKET
+
+    @property
+    def files(self):
+        # Looked up per call, so a forked worker uses its own client
+        return supabase.storage.from_(self.bucket)
+
+    def save(self, name, content, content_type=None):
+        if not isinstance(content, bytes):
+            # Large uploads are already spooled to disk; upload from there
+            spool = getattr(content, "temporary_file_path", None)
+            content = spool() if spool else content.read()
+        self.files.upload(
+            name, content, {"content-type": content_type or "application/octet-stream"}
+        )
+        return self.url(name)
+
+    def open(self, name):
+        return io.BytesIO(self.files.download(name))
+
+    def url(self, name):
+        return self.files.get_public_url(name).rstrip("?")
+
+    def name_for(self, url):
+        return _name_after(self.url(""), url)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_photo_storage():
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = import_string(settings.PHOTO_STORAGE)()
+    return _storage
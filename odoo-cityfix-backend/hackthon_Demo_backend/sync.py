@@ -0,0 +1,119 @@
+"""Delta sync of a client's cached issue list.
+
+The client sends the watermark from its previous sync and gets back only
+the issues changed after it, the status logs added since, the ids of issues
+deleted (from ``issue_tombstones``, sql/006) or hidden since, and a new
+watermark.
+Issues are read in (updated_at, id) order from ``issues_sync_idx``.
+
+Rows changed in the last SYNC_SETTLE_SECONDS are left for the next sync:
+``updated_at`` is the transaction start time, so a slow transaction can
+commit a row that is older than a watermark already handed out.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
+from .projections import SYNC_SELECT
+
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 1000
+SYNC_SETTLE_SECONDS = 5
+
+
+def encode_watermark(updated_at, issue_id=None):
+    raw = json.dumps([updated_at, issue_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+class InvalidWatermark(ValueError):
+    """The client sent a watermark this server did not issue; answered with a 400."""
+
+
+def decode_watermark(watermark):
+    # Like feed cursors, both values are put into a PostgREST filter string
+    try:
+        updated_at, issue_id = json.loads(base64.urlsafe_b64decode(watermark.encode("ascii")))
+        updated_at = datetime.fromisoformat(updated_at).isoformat()
+    except Exception:
+        raise InvalidWatermark("Invalid watermark")
+    if issue_id is not None and (type(issue_id) is not int or issue_id <= 0):
+        raise InvalidWatermark("Invalid watermark")
+    return updated_at, issue_id
+
+
+def _after(query, column, updated_at, issue_id):
+    if issue_id is None:
+        return query.gt(column, updated_at)
+    return query.or_(
+        f'{column}.gt."{updated_at}",and({column}.eq."{updated_at}",id.gt."{issue_id}")'
+    )
+
+
+def sync_issues(supabase, watermark=None, limit=None, settle_seconds=SYNC_SETTLE_SECONDS):
+    """Return the changes after ``watermark`` (everything when it is None).
+
+    ``has_more`` is set when the page was full; the client should sync again
+    right away with the returned watermark.
+    """
+    try:
+        limit = int(limit or SYNC_PAGE_SIZE)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid 'limit'")
+    limit = max(1, min(limit, SYNC_MAX_PAGE_SIZE))
+    after = decode_watermark(watermark) if watermark else None
+    settled = (
+        datetime.now(timezone.utc) - timedelta(seconds=settle_seconds)
+    ).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+    query = supabase.table("issues").select(SYNC_SELECT).lte("updated_at", settled)
+    if after:
+        query = _after(query, "updated_at", *after)
+    issues = (
+        query.order("updated_at").order("id").limit(limit + 1).execute().data
+    )
+
+    has_more = len(issues) > limit
+    if has_more:
+        issues = issues[:limit]
+        last = issues[-1]
+        upper, new_watermark = last["updated_at"], encode_watermark(
+            last["updated_at"], last["id"]
+        )
+    else:
+        upper, new_watermark = settled, encode_watermark(settled)
+
+    # Issues hidden after spam flags drop out of synced caches like deletions
+    deleted = [issue["id"] for issue in issues if issue.get("is_hidden")]
+    issues = [issue for issue in issues if not issue.get("is_hidden")]
+    logs = []
+    if after:
+        # An initial sync has nothing to delete and takes the full history
+        tombstones = (
+            supabase.table("issue_tombstones")
+            .select("issue_id")
+            .gt("deleted_at", after[0])
+            .lte("deleted_at", upper)
+            .execute()
+            .data
+        )
+        deleted += [row["issue_id"] for row in tombstones]
+
+    if issues:
+        logs_query = (
+            supabase.table("issue_status_logs")
+            .select("issue_id, status, changed_at")
+            .in_("issue_id", [issue["id"] for issue in issues])
+        )
+        if after:
+            logs_query = logs_query.gt("changed_at", after[0])
+        logs = logs_query.order("changed_at").execute().data
+
+    return {
+        "issues": issues,
+        "deleted": deleted,
+        "logs": logs,
+        "watermark": new_watermark,
+        "has_more": has_more,
+    }
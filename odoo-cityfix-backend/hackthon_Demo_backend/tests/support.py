@@ -0,0 +1,77 @@
+"""Runs views against ``benchmarks.fake_supabase`` instead of a Supabase project."""
+
+import threading
+from unittest import mock
+
+import jwt
+from django.test import SimpleTestCase, override_settings
+
+from benchmarks.dataset import Dataset, make_user
+from benchmarks.fake_supabase import FakeSupabase
+
+from .. import clients, geocoding, views
+
+JWT_SECRET = "test-secret-test-secret-test-secret-0123"
+
+
+class FakeSupabaseTestCase(SimpleTestCase):
+    """Starts a 1k-issue fake Supabase per class and points the app at it."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeSupabase(("127.0.0.1", 0), Dataset(1000), JWT_SECRET)
+        threading.Thread(target=cls.fake.serve_forever, daemon=True).start()
+        cls.enterClassContext(
+            override_settings(
+                SUPABASE_URL=cls.fake.base_url,
+                SUPABASE_KEY=jwt.encode({"role": "anon"}, JWT_SECRET, algorithm="HS256"),
+                JWT_SECRET=JWT_SECRET,
+                JWT_ALGORITHM="HS256",
+                RATE_LIMITS={},
+                WARM_UP_CLIENTS=False,
+                GEOCODER="hackthon_Demo_backend.geocoding.StubGeocoder",
+            )
+        )
+        # Built from GEOCODER at import, before the override
+        cls.enterClassContext(mock.patch.object(geocoding, "_geocoder", None))
+        cls.enterClassContext(
+            mock.patch.object(views.geocode_cache, "geocoder", geocoding.StubGeocoder())
+        )
+        super().setUpClass()
+        cls.addClassCleanup(cls.fake.server_close)
+        cls.addClassCleanup(cls.fake.shutdown)
+
+    def setUp(self):
+        # Clients built against another server (or none) are dropped
+        clients.close()
+        self.addCleanup(clients.close)
+        # Addresses cached against another fake's geocode_cache table
+        views.geocode_cache._entries.clear()
+
+    def session(self, user_id):
+        """A signed-in session for dataset user ``user_id``."""
+        return self.fake.auth.session(make_user(user_id))
+
+    def post(self, path, session, **data):
+        return self.client.post(
+            path,
+            {**data, "access_token": session["access_token"]},
+            content_type="application/json",
+        )
+
+
+class BlockingLoader:
+    """Serves ``rows``; once ``block`` is set, waits for ``release`` mid-load."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.block = False
+        self.loading = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        rows = list(self.rows)
+        if self.block:
+            self.loading.set()
+            self.release.wait(5)
+        return iter(rows)
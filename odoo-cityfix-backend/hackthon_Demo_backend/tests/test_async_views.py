@@ -0,0 +1,37 @@
+import json
+from unittest import mock
+
+from django.test import AsyncRequestFactory, SimpleTestCase
+
+from .. import async_views, repository
+
+
+class DirectDatabaseTests(SimpleTestCase):
+    """With DATA_BACKEND=postgres the async views read through ``repository``."""
+
+    def setUp(self):
+        patcher = mock.patch.object(async_views, "use_direct_db", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Any PostgREST call would fail the test
+        patcher = mock.patch.object(async_views, "get_async_supabase", side_effect=AssertionError)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, **body):
+        request = AsyncRequestFactory().post("/", body, content_type="application/json")
+        request.user = object()
+        return request
+
+    async def test_issue_details(self):
+        issue = {"id": 5, "title": "Pothole"}
+        logs = [{"status": "Reported"}]
+        with mock.patch.object(repository, "get_issue_with_logs", return_value=(issue, logs)):
+            response = await async_views.get_issue_details(self.request(issue=5))
+        self.assertEqual(json.loads(response.content), {"issue": issue, "logs": logs})
+
+    async def test_issue_stats(self):
+        with mock.patch.object(repository, "get_stat_rows", return_value=([], [])) as rows:
+            response = await async_views.issue_stats(self.request())
+        rows.assert_called_once()
+        self.assertIn("stats", json.loads(response.content))
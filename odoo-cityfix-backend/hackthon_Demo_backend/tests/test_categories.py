@@ -0,0 +1,61 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from ..categories import CategoryRegistry
+
+
+class CountingLoader:
+    def __init__(self, rows, delay=0):
+        self.rows = rows
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return list(self.rows)
+
+
+class CategoryRegistryTests(SimpleTestCase):
+    def test_lookups_survive_concurrent_invalidation(self):
+        registry = CategoryRegistry(CountingLoader([{"id": 1, "name": "Roads"}]))
+        registry.warm()
+        errors = []
+
+        def look_up():
+            try:
+                for _ in range(2000):
+                    registry.id_for("Roads")
+                    registry.name_for(1)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=look_up) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for _ in range(2000):
+            registry.invalidate()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_concurrent_misses_share_one_reload(self):
+        loader = CountingLoader([{"id": 1, "name": "Roads"}], delay=0.05)
+        registry = CategoryRegistry(loader, miss_reload_interval=0.01)
+        registry.warm()
+        time.sleep(0.02)
+        loader.rows = loader.rows + [{"id": 2, "name": "Parks"}]
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.id_for("Parks")))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [2] * 8)
+        self.assertEqual(loader.calls, 2)
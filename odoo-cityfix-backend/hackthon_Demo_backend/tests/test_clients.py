@@ -0,0 +1,46 @@
+import asyncio
+
+from django.conf import settings
+
+from benchmarks.dataset import PASSWORD, user_email
+
+from .. import clients
+from ..async_supabase import get_async_auth, get_async_supabase
+from ..middleware.supabaseMiddleware import arefresh_session, refresh_session
+from .support import FakeSupabaseTestCase
+
+
+class SharedClientTests(FakeSupabaseTestCase):
+    def anon_header(self):
+        return f"Bearer {settings.SUPABASE_KEY}"
+
+    def assertAnonymous(self, client):
+        self.assertEqual(client.options.headers["Authorization"], self.anon_header())
+        self.assertEqual(client.postgrest.headers["Authorization"], self.anon_header())
+
+    def test_login_and_refresh_leave_the_shared_client_anonymous(self):
+        shared = clients.get_supabase()
+        response = self.client.post(
+            "/login/",
+            {"email": user_email(5), "password": PASSWORD},
+            content_type="application/json",
+        ).json()
+        self.assertIn("access", response)
+        self.assertAnonymous(shared)
+
+        refresh_session(self.session(6)["refresh_token"])
+        self.assertAnonymous(shared)
+        self.assertIs(clients.get_supabase(), shared)
+
+    def test_async_sign_in_leaves_the_loop_client_anonymous(self):
+        async def sign_in_then_client():
+            auth = await get_async_auth()
+            await auth.sign_in_with_password({"email": user_email(5), "password": PASSWORD})
+            await arefresh_session(self.session(6)["refresh_token"])
+            return await get_async_supabase()
+
+        self.assertAnonymous(asyncio.run(sign_in_then_client()))
+
+    def test_shared_client_refuses_auth_calls(self):
+        with self.assertRaises(AttributeError):
+            clients.supabase.auth
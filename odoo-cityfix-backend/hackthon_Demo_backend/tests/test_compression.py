@@ -0,0 +1,58 @@
+import gzip
+import zlib
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase
+
+from ..middleware import compressionMiddleware
+from ..middleware.compressionMiddleware import CompressionMiddleware
+from ..responses import JsonResponse
+
+
+class FakeBrotli:
+    """Stands in for the optional brotli package; only the encoding matters here."""
+
+    @staticmethod
+    def compress(data, quality):
+        return zlib.compress(data)
+
+
+BODY = {"issues": [{"id": issue_id, "title": "Pothole on the main road"} for issue_id in range(50)]}
+
+
+class CompressionTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(compressionMiddleware, "brotli", FakeBrotli)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def respond(self, path="/issues/", accept="br, gzip", access=None, body=BODY):
+        request = RequestFactory().post(path, HTTP_ACCEPT_ENCODING=accept)
+        if access:
+            request.access = access
+        return CompressionMiddleware(lambda request: JsonResponse(body))(request)
+
+    def test_negotiation(self):
+        for accept, encoding in (
+            ("br, gzip", "br"),
+            ("gzip, br;q=0", "gzip"),
+            ("gzip", "gzip"),
+            ("identity", None),
+        ):
+            with self.subTest(accept=accept):
+                response = self.respond(accept=accept)
+                self.assertEqual(response.get("Content-Encoding"), encoding)
+                self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_responses_with_tokens_are_only_gzipped(self):
+        login = {**BODY, "access": "a" * 300, "refresh": "r" * 40}
+        for response in (
+            self.respond(path="/login/", body=login),
+            self.respond(access="new-access-token", body=login),
+        ):
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertIn(b'"refresh"', gzip.decompress(response.content))
+
+    def test_small_responses_are_left_alone(self):
+        response = self.respond(body={"ok": True})
+        self.assertFalse(response.has_header("Content-Encoding"))
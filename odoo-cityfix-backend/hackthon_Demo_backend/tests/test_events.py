@@ -0,0 +1,80 @@
+import asyncio
+import json
+import time
+
+import jwt
+from django.test import AsyncClient, SimpleTestCase
+
+from .. import events
+from ..events import ISSUE_CREATED, InProcessBroker, Subscription
+from .support import JWT_SECRET, FakeSupabaseTestCase
+
+ISSUE = {"id": 5, "title": "Pothole", "category_id": 1, "latitude": 1.5, "longitude": 2.5}
+
+
+class IssueEventsTests(FakeSupabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # A broker of its own, so no subscriber outlives the test that made it
+        broker, events._broker = events._broker, InProcessBroker()
+        self.addCleanup(setattr, events, "_broker", broker)
+
+    def params(self):
+        return {"access_token": self.session(7)["access_token"]}
+
+    def assertCreatedEvent(self, chunk):
+        lines = chunk.decode().splitlines()
+        self.assertEqual(lines[1], f"event: {ISSUE_CREATED}")
+        self.assertEqual(json.loads(lines[2][len("data: "):])["title"], "Pothole")
+
+    def test_first_event_under_wsgi(self):
+        response = self.client.get("/issues/events/", self.params())
+        self.assertFalse(response.is_async)
+        chunks = iter(response.streaming_content)
+        self.assertEqual(next(chunks), b"retry: 3000\n\n")
+
+        events.get_broker().publish(ISSUE_CREATED, ISSUE)
+        self.assertCreatedEvent(next(chunks))
+        response.close()
+        self.assertFalse(events.get_broker()._subscribers)
+
+    async def test_first_event_under_asgi(self):
+        response = await AsyncClient().get("/issues/events/", self.params())
+        self.assertTrue(response.is_async)
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 3000\n\n")
+
+        events.get_broker().publish(ISSUE_CREATED, ISSUE)
+        self.assertCreatedEvent(await anext(chunks))
+
+    def test_expired_token_is_refused_not_refreshed(self):
+        session = self.session(7)
+        claims = jwt.decode(session["access_token"], options={"verify_signature": False})
+        expired = jwt.encode({**claims, "exp": int(time.time()) - 60}, JWT_SECRET)
+        response = self.client.get(
+            "/issues/events/",
+            {"access_token": expired, "refresh_token": session["refresh_token"]},
+        )
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertNotIn("access", response.json())
+        # The refresh token was never spent
+        self.assertIn(session["refresh_token"], self.fake.auth.refresh_tokens)
+
+    def test_only_the_stream_reads_tokens_from_the_query_string(self):
+        response = self.client.get("/issues/export/", self.params())
+        self.assertEqual(response.json(), {"error": "Invalid token"})
+
+
+class InProcessBrokerTests(SimpleTestCase):
+    def test_closed_loop_does_not_stop_the_fan_out(self):
+        broker = InProcessBroker()
+        dead_loop = asyncio.new_event_loop()
+        dead = Subscription(broker, dead_loop)
+        dead_loop.close()
+        live = Subscription(broker)
+        broker._subscribers.update((dead, live))
+
+        for _ in range(2):
+            broker.publish(ISSUE_CREATED, ISSUE)
+            self.assertEqual(live.get_blocking(0)["issue"]["id"], 5)
+        self.assertEqual(broker._subscribers, {live})
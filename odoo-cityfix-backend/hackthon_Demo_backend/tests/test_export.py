@@ -0,0 +1,49 @@
+import csv
+import json
+
+from django.test import AsyncClient, SimpleTestCase
+
+from ..export import encode_csv
+from ..ingest import iter_records
+from .support import FakeSupabaseTestCase
+
+ADMIN = 1
+
+
+class ExportTests(FakeSupabaseTestCase):
+    def headers(self):
+        return {"Authorization": f"Bearer {self.session(ADMIN)['access_token']}"}
+
+    def test_export_streams_ndjson(self):
+        response = self.client.get("/issues/export/", headers=self.headers())
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1000)
+        self.assertEqual(json.loads(lines[0])["id"], 1)
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        response = await AsyncClient().get("/issues/export/", headers=self.headers())
+        # A sync iterator would be read into a list before the first byte went out
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(b"".join(chunks).decode().splitlines()), 1000)
+
+
+class CsvExportTests(SimpleTestCase):
+    def test_formula_like_text_is_quoted_and_imported_back(self):
+        issue = {
+            "id": 1,
+            "title": "=HYPERLINK(\"http://evil\")",
+            "description": "@SUM(A1)",
+            "longitude": -76.7,
+            "status": "Reported",
+        }
+        lines = "".join(encode_csv([issue])).splitlines(keepends=True)
+        row = next(csv.DictReader(lines))
+        self.assertEqual(row["title"], "'=HYPERLINK(\"http://evil\")")
+        self.assertEqual(row["description"], "'@SUM(A1)")
+        self.assertEqual(row["longitude"], "-76.7")
+        self.assertEqual(row["status"], "Reported")
+
+        _, record = next(iter_records(lines, "csv"))
+        self.assertEqual(record["title"], issue["title"])
+        self.assertEqual(record["description"], issue["description"])
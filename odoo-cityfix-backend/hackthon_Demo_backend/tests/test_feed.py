@@ -0,0 +1,41 @@
+import base64
+import json
+
+from ..issue_feed import InvalidCursor, decode_cursor
+from .support import FakeSupabaseTestCase
+
+
+def cursor(*values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+class FeedCursorTests(FakeSupabaseTestCase):
+    def test_pages_follow_the_cursor(self):
+        session = self.session(7)
+        first = self.post("/issues/", session, limit=5).json()
+        second = self.post("/issues/", session, limit=5, cursor=first["next_cursor"]).json()
+        ids = [issue["id"] for issue in first["issues"] + second["issues"]]
+        self.assertEqual(len(set(ids)), 10)
+
+    def test_crafted_cursor_is_rejected(self):
+        crafted = cursor("2025-01-01T00:00:00", '1"),id.gt.(0')
+        response = self.post("/issues/", self.session(7), cursor=crafted)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Invalid cursor"})
+
+    def test_decode_cursor_accepts_only_a_timestamp_and_an_id(self):
+        self.assertEqual(
+            decode_cursor(cursor("2025-01-01 00:00:00+00:00", 12)),
+            ("2025-01-01T00:00:00+00:00", 12),
+        )
+        for bad in (
+            cursor('2025-01-01T00:00:00"', 12),
+            cursor("2025-01-01T00:00:00", "12"),
+            cursor("2025-01-01T00:00:00", True),
+            cursor("2025-01-01T00:00:00", 0),
+            cursor("2025-01-01T00:00:00", 1.5),
+            cursor("2025-01-01T00:00:00", 1, 2),
+            "not base64!",
+        ):
+            with self.subTest(bad=bad), self.assertRaises(InvalidCursor):
+                decode_cursor(bad)
@@ -0,0 +1,22 @@
+from .support import FakeSupabaseTestCase
+
+
+class ReportSpamTests(FakeSupabaseTestCase):
+    def test_repeated_flags_from_one_user_count_once(self):
+        session = self.session(7)
+        first = self.post("/report-spam/", session, issue=42, user=7).json()["issue"]
+
+        # Other ids in the body don't make it count again
+        for body_user in (7, 8, 9):
+            again = self.post("/report-spam/", session, issue=42, user=body_user).json()["issue"]
+            self.assertFalse(again["flagged"])
+            self.assertEqual(again["flag_count"], first["flag_count"])
+
+        self.assertTrue(first["flagged"])
+        flags = self.fake.database.tables["flags"].find(issue_id=42)
+        self.assertEqual([flag["flagged_by"] for flag in flags], [7])
+
+    def test_flags_from_different_users_add_up(self):
+        before = self.post("/report-spam/", self.session(3), issue=43).json()["issue"]
+        after = self.post("/report-spam/", self.session(4), issue=43).json()["issue"]
+        self.assertEqual(after["flag_count"], before["flag_count"] + 1)
@@ -0,0 +1,31 @@
+from django.test import SimpleTestCase
+
+from ..geo_index import GridIndex
+from .support import BlockingLoader
+
+
+def point(issue_id, lat=10.0, lng=20.0):
+    return {"id": issue_id, "latitude": lat, "longitude": lng, "status": "Reported"}
+
+
+class GridIndexTests(SimpleTestCase):
+    def ids(self, index):
+        return sorted(issue_id for _, issue_id in index.query(10.0, 20.0, radius_km=5))
+
+    def test_stale_grid_serves_while_reloading_and_keeps_local_writes(self):
+        loader = BlockingLoader([point(1), point(2)])
+        index = GridIndex(loader)
+        index.warm()
+
+        loader.block = True
+        index.invalidate()
+        # Answered from the stale grid, while a background thread reloads
+        self.assertEqual(self.ids(index), [1, 2])
+        self.assertTrue(loader.loading.wait(5))
+
+        index.add(point(3))
+        index.remove(1)
+        loader.release.set()
+        with index._rebuild_lock:
+            pass
+        self.assertEqual(self.ids(index), [2, 3])
@@ -0,0 +1,36 @@
+import io
+
+from django.core.management import call_command
+
+from .support import FakeSupabaseTestCase
+
+
+class AddressTests(FakeSupabaseTestCase):
+    def test_reported_issue_gets_its_address(self):
+        response = self.post(
+            "/report-new-issue/",
+            self.session(12),
+            formData={
+                "description": "Fallen tree blocking the footpath",
+                "category": "Roads",
+                "location": {"lat": 30.71234, "lng": 76.70001},
+                "images": [],
+                "force": True,
+            },
+        )
+        issue = self.fake.database.issues.get(response.json()["issue"]["id"])
+        self.assertEqual(issue["address"], "30.7123, 76.7")
+
+    def test_backfill_fills_missing_addresses(self):
+        issues = self.fake.database.issues
+        for issue_id in (3, 4):
+            issues.update(issues.get(issue_id), {"address": None})
+
+        out = io.StringIO()
+        call_command("backfill_addresses", stdout=out)
+        self.assertIn('"issues": 2', out.getvalue())
+        for issue_id in (3, 4):
+            issue = issues.get(issue_id)
+            self.assertEqual(
+                issue["address"], f"{round(issue['latitude'], 4)}, {round(issue['longitude'], 4)}"
+            )
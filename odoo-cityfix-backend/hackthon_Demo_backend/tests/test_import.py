@@ -0,0 +1,74 @@
+import json
+
+from .. import views
+from .support import FakeSupabaseTestCase
+
+ADMIN = 1
+
+
+def record(description, **fields):
+    return {
+        "description": description,
+        "category": "Roads",
+        "latitude": 30.7,
+        "longitude": 76.7,
+        **fields,
+    }
+
+
+class ImportIssuesTests(FakeSupabaseTestCase):
+    def import_lines(self, *records):
+        body = "\n".join(json.dumps(r) for r in records) + "\n"
+        return self.client.post(
+            "/issues/import/",
+            body,
+            content_type="application/x-ndjson",
+            headers={"Authorization": f"Bearer {self.session(ADMIN)['access_token']}"},
+        ).json()
+
+    def test_children_are_attached_to_their_own_issue(self):
+        views.issue_texts.warm()
+        summary = self.import_lines(
+            record("first imported issue", images=["http://x/a.jpg", "http://x/b.jpg"]),
+            record("bad row", latitude="north"),
+            record(
+                "second imported issue",
+                status="Resolved",
+                status_logs=[{"status": "Reported"}, {"status": "Resolved"}],
+            ),
+        )
+        self.assertEqual((summary["inserted"], summary["failed"]), (2, 1))
+        self.assertEqual(summary["errors"][0]["line"], 2)
+
+        database = self.fake.database
+        first, second = (
+            database.tables["issues"].find(description=text)[0]
+            for text in ("first imported issue", "second imported issue")
+        )
+        photos = database.tables["issue_photos"].for_issue(first["id"])
+        self.assertEqual(sorted(p["image_url"] for p in photos), ["http://x/a.jpg", "http://x/b.jpg"])
+        logs = database.tables["issue_status_logs"].for_issue(second["id"])
+        self.assertEqual([log["status"] for log in logs], ["Reported", "Resolved"])
+
+        # Duplicate detection reloads to see the imported issues
+        self.assertFalse(views.issue_texts._is_fresh())
+
+    def test_a_refused_row_fails_alone(self):
+        summary = self.import_lines(
+            *(record(f"chunk row {n}") for n in range(5)),
+            record("unknown reporter", user_id=999999),
+            *(record(f"chunk row {n}") for n in range(5, 9)),
+        )
+        self.assertEqual((summary["inserted"], summary["failed"]), (9, 1))
+        self.assertEqual(summary["errors"][0]["line"], 6)
+
+    def test_only_http_photo_urls_are_imported(self):
+        self.import_lines(
+            record(
+                "imported with odd photos",
+                images="https://x/ok.jpg|javascript:alert(1)|data:image/png;base64,AA",
+            )
+        )
+        issue = self.fake.database.tables["issues"].find(description="imported with odd photos")[0]
+        photos = self.fake.database.tables["issue_photos"].for_issue(issue["id"])
+        self.assertEqual([p["image_url"] for p in photos], ["https://x/ok.jpg"])
@@ -0,0 +1,44 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from django.test import SimpleTestCase
+
+from ..logs import QueueLogHandler
+
+
+class QueueLogHandlerTests(SimpleTestCase):
+    def setUp(self):
+        self.out = tempfile.TemporaryFile("w+")
+        self.addCleanup(self.out.close)
+        self.handler = QueueLogHandler(stream=self.out)
+        self.logger = logging.getLogger(f"{__name__}.{self._testMethodName}")
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def lines(self):
+        self.out.seek(0)
+        return [json.loads(line)["msg"] for line in self.out]
+
+    def test_writer_starts_with_the_first_record(self):
+        self.assertIsNone(self.handler.listener)
+        self.logger.warning("first")
+        self.handler.close()
+        self.assertEqual(self.lines(), ["first"])
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_forked_child_writes_its_records(self):
+        self.logger.warning("parent")
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self.logger.warning("child")
+                self.handler.close()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        self.handler.close()
+        self.assertEqual(sorted(self.lines()), ["child", "parent"])
@@ -0,0 +1,91 @@
+from django.test import SimpleTestCase
+
+from ..dedup import MinHasher, MinHashIndex
+from .support import BlockingLoader, FakeSupabaseTestCase
+
+FORM = {
+    "description": "Deep pothole in the left lane next to the bus stop",
+    "category": "Roads",
+    "location": {"lat": 30.70, "lng": 76.70},
+    "images": [],
+}
+
+
+class ReportNewIssueTests(FakeSupabaseTestCase):
+    def report(self, user_id, **form):
+        response = self.post(
+            "/report-new-issue/", self.session(user_id), formData={**FORM, **form}, user=99
+        )
+        return response.json()
+
+    def issue_with_status(self, *statuses):
+        issues = self.fake.database.issues
+        return next(
+            issue_id
+            for issue_id in range(1, 1001)
+            if issues.get(issue_id)["status"] in statuses and not issues.get(issue_id)["is_hidden"]
+        )
+
+    def test_issue_is_reported_as_the_authenticated_user(self):
+        issue = self.report(12, force=True)["issue"]
+        self.assertEqual(self.fake.database.issues.get(issue["id"])["user_id"], 12)
+
+    def test_merge_into_an_open_issue(self):
+        target = self.issue_with_status("Reported", "In Progress")
+        response = self.report(12, duplicate_of=target)
+        self.assertTrue(response["merged"])
+        self.assertEqual(response["issue"]["id"], target)
+
+    def test_merge_rejects_missing_closed_and_malformed_issues(self):
+        for duplicate_of in (999999, self.issue_with_status("Resolved"), "1 or 1=1", True):
+            response = self.report(12, duplicate_of=duplicate_of)
+            self.assertIn("error", response, duplicate_of)
+            self.assertNotIn("merged", response)
+
+
+class CountingHasher(MinHasher):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def signature(self, text):
+        self.calls += 1
+        return super().signature(text)
+
+
+class MinHashIndexTests(SimpleTestCase):
+    def test_reload_only_hashes_new_or_changed_descriptions(self):
+        rows = [{"id": i, "description": f"broken streetlight number {i}"} for i in range(50)]
+        hasher = CountingHasher()
+        index = MinHashIndex(lambda: list(rows), hasher=hasher)
+        index.warm()
+        self.assertEqual(hasher.calls, 50)
+
+        rows[0] = {"id": 0, "description": "overflowing garbage bin"}
+        rows.append({"id": 50, "description": "fallen tree blocking the road"})
+        index.invalidate()
+        index.warm()
+        self.assertEqual(hasher.calls, 52)
+        self.assertEqual(index.scores([0], "overflowing garbage bin"), {0: 1.0})
+
+    def test_writes_during_a_reload_survive_it(self):
+        loader = BlockingLoader(
+            [{"id": i, "description": f"broken streetlight number {i}"} for i in range(3)]
+        )
+        index = MinHashIndex(loader)
+        index.warm()
+
+        loader.block = True
+        index.invalidate()
+        index.scores([0], "anything")
+        self.assertTrue(loader.loading.wait(5))
+        index.add({"id": 3, "description": "fallen tree blocking the road"})
+        # Closed or hidden in this process while the reload read the old rows
+        index.remove(0)
+        loader.release.set()
+        with index._rebuild_lock:
+            pass
+
+        scores = index.scores([0, 1, 3], "fallen tree blocking the road")
+        self.assertEqual(sorted(scores), [1, 3])
+        self.assertEqual(scores[3], 1.0)
@@ -0,0 +1,35 @@
+from django.test import SimpleTestCase
+
+from ..search import SearchIndex
+from .support import BlockingLoader
+
+
+class Categories:
+    def name_for(self, category_id):
+        return None
+
+
+def doc(issue_id, title):
+    return {"id": issue_id, "title": title, "status": "Reported"}
+
+
+class SearchIndexTests(SimpleTestCase):
+    def ids(self, index, query):
+        return sorted(issue_id for _, issue_id in index.search(query)[1])
+
+    def test_invalidated_index_serves_while_reloading_and_keeps_local_writes(self):
+        loader = BlockingLoader([doc(1, "broken streetlight"), doc(2, "broken bench")])
+        index = SearchIndex(loader, Categories())
+        index.warm()
+
+        loader.block = True
+        index.invalidate()
+        self.assertEqual(self.ids(index, "broken"), [1, 2])
+        self.assertTrue(loader.loading.wait(5))
+
+        index.add(doc(3, "broken sign"))
+        index.remove(2)
+        loader.release.set()
+        with index._rebuild_lock:
+            pass
+        self.assertEqual(self.ids(index, "broken"), [1, 3])
@@ -0,0 +1,42 @@
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..photos import ThumbnailWorker
+from ..storage import LocalPhotoStorage
+
+BASE_URL = "http://testserver/media"
+
+
+class LocalPhotoStorageTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.storage = LocalPhotoStorage(root=root.name, base_url=BASE_URL)
+
+    def test_name_for_rejects_paths_leaving_the_root(self):
+        for url in (
+            f"{BASE_URL}/../../etc/x.jpg",
+            f"{BASE_URL}/issues/../../x.jpg",
+            f"{BASE_URL}//etc/x.jpg",
+            "http://elsewhere/media/issues/x.jpg",
+        ):
+            self.assertIsNone(self.storage.name_for(url), url)
+        self.assertEqual(self.storage.name_for(f"{BASE_URL}/issues/a.jpg"), "issues/a.jpg")
+
+    def test_open_refuses_names_outside_the_root(self):
+        with self.assertRaises(ValueError):
+            self.storage.open("../outside.jpg")
+
+    def test_thumbnails_only_for_uploaded_names(self):
+        submitted = []
+        worker = ThumbnailWorker(self.storage, on_done=None)
+        worker._executor.submit = lambda fn, url, name: submitted.append(name)
+        worker.submit(
+            [
+                f"{BASE_URL}/issues/{'a' * 32}.jpg",
+                f"{BASE_URL}/thumbs/other.jpg",
+                f"{BASE_URL}/issues/{'b' * 32}.jpg/../../x.jpg",
+            ]
+        )
+        self.assertEqual(submitted, [f"issues/{'a' * 32}.jpg"])
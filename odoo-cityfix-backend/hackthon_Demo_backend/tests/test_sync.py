@@ -0,0 +1,45 @@
+import base64
+import json
+
+from ..sync import InvalidWatermark, decode_watermark
+from .support import FakeSupabaseTestCase
+
+
+def watermark(*values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+class SyncWatermarkTests(FakeSupabaseTestCase):
+    def test_sync_continues_from_the_watermark(self):
+        session = self.session(7)
+        first = self.post("/issues/sync/", session, limit=5).json()
+        self.assertTrue(first["has_more"])
+        second = self.post("/issues/sync/", session, limit=5, watermark=first["watermark"]).json()
+        ids = [issue["id"] for issue in first["issues"] + second["issues"]]
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_crafted_watermark_is_rejected(self):
+        crafted = watermark("2025-01-01T00:00:00", '1"),id.gt.(0')
+        response = self.post("/issues/sync/", self.session(7), watermark=crafted)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Invalid watermark"})
+
+    def test_decode_watermark_accepts_only_a_timestamp_and_an_id(self):
+        self.assertEqual(
+            decode_watermark(watermark("2025-01-01T00:00:00.5Z", None)),
+            ("2025-01-01T00:00:00.500000+00:00", None),
+        )
+        self.assertEqual(
+            decode_watermark(watermark("2025-01-01T00:00:00+00:00", 3)),
+            ("2025-01-01T00:00:00+00:00", 3),
+        )
+        for bad in (
+            watermark("2025-01-01T00:00:00)", None),
+            watermark("2025-01-01T00:00:00", "3"),
+            watermark("2025-01-01T00:00:00", False),
+            watermark("2025-01-01T00:00:00", -1),
+            watermark("2025-01-01T00:00:00"),
+            "not base64!",
+        ):
+            with self.subTest(bad=bad), self.assertRaises(InvalidWatermark):
+                decode_watermark(bad)
@@ -1,6 +1,11 @@
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path
-from . import views
+from django.urls import path, re_path
+from django.views.static import serve
+from . import async_views, views
+
+# Under asgi.py the Supabase-bound issue views can run natively async
+issue_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -11,7 +16,24 @@ urlpatterns = [
     path("edit-profile-data/", views.edit_profile_data, name="edit_profile_data"),
     path("forgot-password/", views.forgot_password, name="forgot_password"),
     path("reset-password/", views.reset_password, name="reset_password"),
-    path("get-issue-details/", views.get_issue_details, name="get_issue_details"),
-    path("report-spam/", views.report_spam, name="report_spam"),
-    path("report-new-issue/", views.report_new_issue, name="report_new_issue"),
+    path("get-issue-details/", issue_views.get_issue_details, name="get_issue_details"),
+    path("report-spam/", issue_views.report_spam, name="report_spam"),
+    path("photos/upload/", views.upload_photos, name="upload_photos"),
+    path("report-new-issue/", issue_views.report_new_issue, name="report_new_issue"),
+    path("issues/", issue_views.list_issues, name="list_issues"),
+    path("issues/nearby/", issue_views.nearby_issues, name="nearby_issues"),
+    path("issues/search/", issue_views.search_issues, name="search_issues"),
+    # Streams from the event loop under ASGI, from a worker thread under WSGI
+    path("issues/events/", async_views.issue_events, name="issue_events"),
+    path("issues/sync/", views.sync_issues, name="sync_issues"),
+    path("issues/stats/", issue_views.issue_stats, name="issue_stats"),
+    path("issues/update/", views.update_issues, name="update_issues"),
+    path("issues/import/", views.import_issues, name="import_issues"),
+    path("issues/export/", views.export_issues, name="export_issues"),
+    path("metrics/", views.metrics, name="metrics"),
 ]
+
+if settings.PHOTO_STORAGE.endswith(".LocalPhotoStorage"):
+    urlpatterns.append(
+        re_path(r"^media/(?P<path>.*)$", serve, {"document_root": settings.MEDIA_ROOT})
+    )
@@ -1,10 +1,104 @@
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
-import json, requests
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+import json, logging
 from django.conf import settings
-from supabase import create_client
-
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+from .clients import auth, get_http_client, supabase
+from .issue_feed import InvalidCursor, fetch_issue_page
+from .geo_index import GridIndex, load_issue_points, parse_nearby_params
+from .categories import CategoryRegistry, load_categories
+from . import repository
+from .issue_writes import (
+    add_report_params,
+    create_issue_params,
+    flag_issue_params,
+    issue_changes,
+)
+from .dedup import (
+    MinHashIndex,
+    candidates_query,
+    find_duplicates,
+    is_open_issue,
+    load_open_issue_texts,
+    open_issue_query,
+    parse_duplicate_of,
+    with_scores,
+)
+from .ingest import INGEST_FORMATS, PostgresWriter, PostgrestWriter, ingest, iter_records
+from .permissions import get_admin, get_user_id
+from .responses import JsonResponse
+from .projections import (
+    ISSUE_DETAIL_SELECT,
+    STATUS_LOG_SELECT,
+    USER_SELECT,
+    parse_fields,
+    select_for,
+    wants,
+)
+from .geocoding import GeocodeCache, SupabaseGeocodeStore, get_geocoder
+from .search import (
+    SearchIndex,
+    load_search_documents,
+    parse_search_params,
+    with_search_scores,
+)
+from .stats import build_stats, fetch_stats, stats_cutoffs
+from .sync import InvalidWatermark, sync_issues as fetch_issue_changes
+from .storage import get_photo_storage
+from .issue_cache import get_issue_cache
+from .metrics import render_metrics
+from .photos import ThumbnailWorker, record_thumbnail, store_photo
+from .events import (
+    ISSUE_CREATED,
+    ISSUE_FLAGGED,
+    ISSUE_STATUS_CHANGED,
+    publish_issue_event,
+)
+from .export import (
+    EXPORT_FORMATS,
+    aiter_in_thread,
+    export_filters,
+    iter_issues_postgres,
+    iter_issues_postgrest,
+    stream_export,
+)
+
+logger = logging.getLogger(__name__)
+
+# Hot queries go over pooled direct Postgres connections when enabled
+use_direct_db = settings.DATA_BACKEND == "postgres"
+
+category_registry = CategoryRegistry(
+    lambda: load_categories(supabase), ttl=settings.CATEGORY_CACHE_TTL
+)
+
+issue_locations = GridIndex(
+    lambda: load_issue_points(supabase), ttl=settings.GEO_INDEX_TTL
+)
+
+issue_texts = MinHashIndex(
+    lambda: load_open_issue_texts(supabase), ttl=settings.DEDUP_INDEX_TTL
+)
+
+search_index = SearchIndex(
+    lambda: load_search_documents(supabase),
+    category_registry,
+    ttl=settings.SEARCH_INDEX_TTL,
+)
+
+geocode_cache = GeocodeCache(
+    get_geocoder(),
+    SupabaseGeocodeStore(supabase),
+    maxsize=settings.GEOCODE_CACHE_SIZE,
+)
+
+issue_cache = get_issue_cache()
+
+thumbnail_worker = ThumbnailWorker(
+    get_photo_storage(),
+    record_thumbnail(supabase),
+    max_workers=settings.THUMBNAIL_WORKERS,
+)
 
 
 @csrf_exempt
@@ -26,7 +120,7 @@ def register_user(request):
 
         try:
             existing_user = (
-                supabase.table("users_table").select("*").eq("email", email).execute()
+                supabase.table("users_table").select("id").eq("email", email).execute()
             )
             if existing_user.data:
                 return JsonResponse({"error": "User already exists"}, status=201)
@@ -34,11 +128,11 @@ def register_user(request):
             pass
 
         try:
-            supabase.table("users_table").select("*").limit(1).execute()
-        except Exception as e:
-            print(e)
+            supabase.table("users_table").select("id").limit(1).execute()
+        except Exception:
+            logger.exception("users_table probe failed")
 
-        auth_response = supabase.auth.sign_up(
+        auth_response = auth.sign_up(
             {
                 "email": email,
                 "password": password,
@@ -76,7 +170,7 @@ def register_user(request):
         return JsonResponse({"error": "Registration failed"}, status=201)
 
     except Exception as e:
-        print(e)
+        logger.exception("register_user failed")
         return JsonResponse({"error": str(e)}, status=500)
 
 
@@ -88,12 +182,11 @@ def verify_email(request):
     try:
         data = json.loads(request.body)
         token = data.get("access_token")
-        print(token)
         if not token:
             return JsonResponse({"error": "Verification token is required"}, status=201)
 
         # This line automatically verifies and gets the user
-        user_response = supabase.auth.get_user(token)
+        user_response = auth.get_user(token)
         user = user_response.user
 
         if not user:
@@ -109,8 +202,8 @@ def verify_email(request):
 
         return JsonResponse({"message": "Email verified successfully"}, status=200)
 
-    except Exception as e:
-        print("error: ", e)
+    except Exception:
+        logger.exception("verify_email failed")
         return JsonResponse(
             {"error": "Invalid or expired verification token"}, status=201
         )
@@ -124,54 +217,48 @@ def login_user(request):
         data = json.loads(request.body)
         email = data.get("email").lower()
         password = data.get("password")
-        print(email, password)
 
         if not all([email, password]):
             return JsonResponse(
                 {"error": "Email and password are required"}, status=201
             )
 
-        user_record = (
-            supabase.table("users_table")
-            .select("is_verified")
-            .eq("email", email)
-            .execute()
-        )
-        if not user_record.data:
+        # One lookup serves both the existence check and the response
+        if use_direct_db:
+            user_record = repository.get_user_by_email(email)
+        else:
+            user_record = next(
+                iter(
+                    supabase.table("users_table")
+                    .select(USER_SELECT)
+                    .eq("email", email)
+                    .execute()
+                    .data
+                ),
+                None,
+            )
+        if not user_record:
             return JsonResponse({"error": "User not found"}, status=201)
 
-        auth_response = supabase.auth.sign_in_with_password(
+        auth_response = auth.sign_in_with_password(
             {"email": email, "password": password}
         )
         if auth_response.user:
             access_token = auth_response.session.access_token
             refresh_token = auth_response.session.refresh_token
 
-            user_data = (
-                supabase.table("users_table").select("*").eq("email", email).execute()
-            )
-            issues_record = (
-                supabase.table("issues")
-                .select(
-                    "*, categories(name), users_table(first_name, last_name, email), issue_photos(image_url), issue_status_logs(status, changed_at)"
-                )
-                .execute()
+            return JsonResponse(
+                {
+                    "message": "Login successful",
+                    "access": access_token,
+                    "refresh": refresh_token,
+                    "user": user_record,
+                },
+                status=200,
             )
 
-            if user_data.data:
-                return JsonResponse(
-                    {
-                        "message": "Login successful",
-                        "access": access_token,
-                        "refresh": refresh_token,
-                        "user": user_data.data[0],
-                        "issues": issues_record.data,
-                    },
-                    status=200,
-                )
-
     except Exception as e:
-        print("error: ", e)
+        logger.exception("login_user failed")
         if str(e) == "Invalid login credentials":
             return JsonResponse({"error": "Invalid login credentials"}, status=201)
         return JsonResponse({"error": str(e)}, status=500)
@@ -196,7 +283,7 @@ def check_auth(request):
             )
         return JsonResponse({"authenticated": True}, status=200)
 
-    except Exception as e:
+    except Exception:
         return JsonResponse(
             {"error": "Authentication check failed", "authenticated": False}, status=500
         )
@@ -214,7 +301,7 @@ def forgot_password(request):
         if not email:
             return JsonResponse({"error": "Email is required"}, status=201)
 
-        supabase.auth.reset_password_email(
+        auth.reset_password_email(
             email, options={"redirect_to": "http://localhost:5173/reset-password"}
         )
         return JsonResponse({"message": "Password reset email sent"}, status=200)
@@ -247,7 +334,7 @@ def reset_password(request):
         body = {"password": new_password}
         url = f"{settings.SUPABASE_URL}/auth/v1/user"
 
-        response = requests.put(url, headers=headers, json=body)
+        response = get_http_client().put(url, headers=headers, json=body)
 
         if response.status_code == 200:
             return JsonResponse(
@@ -285,7 +372,7 @@ def edit_profile_data(request):
 
         user = (
             supabase.table("users_table")
-            .select("*")
+            .select(USER_SELECT)
             .eq("email", tempData["email"])
             .execute()
         )
@@ -303,57 +390,69 @@ def edit_profile_data(request):
             status=200,
         )
 
-    except Exception as e:
-        print(e)
+    except Exception:
+        logger.exception("edit_profile_data failed")
         return JsonResponse(
             {"error": "Authentication check failed", "authenticated": False}, status=201
         )
 
 
-@csrf_exempt
-def get_issue_details(request):
-    if request.method != "POST":
-        return JsonResponse({"error": "Only POST method allowed"}, status=405)
-
-    try:
-        user = getattr(request, "user", None)
-        if not user:
-            return JsonResponse({"authenticated": False}, status=201)
-
-        data = json.loads(request.body)
-        issue_id = data.get("issue")
-
-        data = {}
-        if not issue_id:
-            return JsonResponse({"error": "Missing issue ID"}, status=201)
-
+def _load_issue_details(issue_id):
+    """The issue with its category, reporter and photos plus its status logs, or None."""
+    if use_direct_db:
+        issue, logs = repository.get_issue_with_logs(issue_id)
+    else:
         # Fetch the issue with category and reporter info
         issue_resp = (
             supabase.table("issues")
-            .select(
-                "*, categories(name), users_table(first_name, last_name), issue_photos(image_url)"
-            )
+            .select(ISSUE_DETAIL_SELECT)
             .eq("id", issue_id)
             .single()
             .execute()
         )
-
         issue = issue_resp.data
-        data["issue"] = issue
-        if not issue:
-            return JsonResponse({"error": "Issue not found"}, status=201)
+        if issue:
+            category_registry.attach_names([issue])
+        logs = None
+
+    if not issue:
+        return None
 
+    if logs is None:
         # Fetch issue status logs
         logs_resp = (
             supabase.table("issue_status_logs")
-            .select("*")
+            .select(STATUS_LOG_SELECT)
             .eq("issue_id", issue_id)
             .order("changed_at", desc=False)
             .execute()
         )
         logs = logs_resp.data
-        print(logs)
-        data["logs"] = logs
+    return {"issue": issue, "logs": logs}
+
+
+@csrf_exempt
+def get_issue_details(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        data = json.loads(request.body)
+        issue_id = data.get("issue")
+
+        if not issue_id:
+            return JsonResponse({"error": "Missing issue ID"}, status=201)
+
+        # Served from the cache until a write to the issue invalidates it
+        doc = issue_cache.fetch(issue_id, lambda: _load_issue_details(issue_id))
+        if not doc:
+            return JsonResponse({"error": "Issue not found"}, status=201)
+        # Copied so the tokens added below don't end up in the cached document
+        data = dict(doc)
 
         access = getattr(request, "access", None)
         refresh = getattr(request, "refresh", None)
@@ -365,8 +464,8 @@ def get_issue_details(request):
             status=200,
         )
 
-    except Exception as e:
-        print(e)
+    except Exception:
+        logger.exception("get_issue_details failed")
         return JsonResponse(
             {"error": "Authentication check failed", "authenticated": False}, status=201
         )
@@ -384,48 +483,34 @@ def report_spam(request):
 
         data = json.loads(request.body)
         issue_id = data.get("issue")
-        user_id = data.get("user")
 
-        data = {}
         if not issue_id:
             return JsonResponse({"error": "Missing issue ID"}, status=201)
 
-        # Fetch the issue with category and reporter info
-
-        supabase.table("flags").insert(
-            {
-                "flagged_by": user_id,
-                "issue_id": issue_id,
-                "flagged_at": "now()",
-            }
-        ).execute()
+        # The flag is the verified caller's, whatever the body says
+        user_id = get_user_id(supabase, request)
+        if not user_id:
+            return JsonResponse({"error": "Unknown user"}, status=201)
 
-        issue_resp = (
-            supabase.table("issues")
-            .select(
-                "*, categories(name), users_table(first_name, last_name), issue_photos(image_url), flags(flagged_by)"
-            )
-            .eq("id", issue_id)
-            .single()
-            .execute()
-        )
-
-        issue = issue_resp.data
-        data["issue"] = issue
+        # One flag per user and issue; the counter and auto-hide are updated
+        # in the same statement (sql/011)
+        params = flag_issue_params(issue_id, user_id, settings.FLAG_HIDE_THRESHOLD)
+        if use_direct_db:
+            issue = repository.flag_issue(params)
+        else:
+            issue = supabase.rpc("flag_issue", params).execute().data
         if not issue:
             return JsonResponse({"error": "Issue not found"}, status=201)
 
-        # Fetch issue status logs
-        logs_resp = (
-            supabase.table("issue_status_logs")
-            .select("*")
-            .eq("issue_id", issue_id)
-            .order("changed_at", desc=False)
-            .execute()
-        )
-        logs = logs_resp.data
-        print(logs)
-        data["logs"] = logs
+        issue_cache.invalidate(issue["id"])
+        if issue["flagged"]:
+            publish_issue_event(ISSUE_FLAGGED, issue)
+        if issue["is_hidden"]:
+            issue_locations.remove(issue["id"])
+            issue_texts.remove(issue["id"])
+            search_index.remove(issue["id"])
+
+        data = {"issue": issue}
 
         access = getattr(request, "access", None)
         refresh = getattr(request, "refresh", None)
@@ -437,13 +522,60 @@ def report_spam(request):
             status=200,
         )
 
-    except Exception as e:
-        print(e)
+    except Exception:
+        logger.exception("report_spam failed")
         return JsonResponse(
             {"error": "Authentication check failed", "authenticated": False}, status=201
         )
 
 
+@csrf_exempt
+def upload_photos(request):
+    """Store up to PHOTO_MAX_COUNT multipart ``photos`` and return their URLs.
+
+    Tokens go in the Authorization and X-Refresh-Token headers so the
+    multipart body is streamed to storage rather than parsed as JSON.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        photos = request.FILES.getlist("photos")
+        if not photos:
+            return JsonResponse({"error": "No photos uploaded"}, status=201)
+        if len(photos) > settings.PHOTO_MAX_COUNT:
+            return JsonResponse(
+                {"error": f"At most {settings.PHOTO_MAX_COUNT} photos per issue"},
+                status=201,
+            )
+
+        storage = get_photo_storage()
+        try:
+            urls = [
+                store_photo(storage, photo, settings.PHOTO_MAX_SIZE_MB * 1024 * 1024)
+                for photo in photos
+            ]
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=201)
+
+        data = {"urls": urls}
+
+        access = getattr(request, "access", None)
+        refresh = getattr(request, "refresh", None)
+        if access and refresh:
+            data["access"] = access
+            data["refresh"] = refresh
+        return JsonResponse(data, status=200)
+
+    except Exception:
+        logger.exception("upload_photos failed")
+        return JsonResponse({"error": "Upload failed"}, status=201)
+
+
 @csrf_exempt
 def report_new_issue(request):
     if request.method != "POST":
@@ -459,75 +591,427 @@ def report_new_issue(request):
         formData = (
             json.loads(formData_raw) if isinstance(formData_raw, str) else formData_raw
         )
-        print(1)
-        user_id = data.get("user")
         data = {}
         if not formData:
             return JsonResponse({"error": "Missing issue data"}, status=201)
 
-        # 1. Get category_id for "Lighting"
-        category_resp = (
-            supabase.table("categories")
-            .select("id")
-            .eq("name", formData["category"])
-            .execute()
+        # Reported as the verified caller, whatever the body says
+        user_id = get_user_id(supabase, request)
+        if not user_id:
+            return JsonResponse({"error": "Unknown user"}, status=201)
+
+        # Unknown categories are rejected from memory, before any write
+        try:
+            category_id = category_registry.resolve(formData.get("category"))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=201)
+        params = create_issue_params(formData, user_id)
+
+        # Look for the same problem reported nearby, unless the reporter has
+        # already picked a match or chosen to file a new issue
+        duplicate_of = formData.get("duplicate_of")
+        if duplicate_of:
+            # The reporter's pick: only an existing, open, visible issue
+            try:
+                duplicate_of = parse_duplicate_of(duplicate_of)
+            except ValueError as e:
+                return JsonResponse({"error": str(e)}, status=201)
+            if use_direct_db:
+                target = repository.get_issue(duplicate_of)
+            else:
+                target = next(iter(open_issue_query(supabase, duplicate_of).execute().data), None)
+            if not is_open_issue(target):
+                return JsonResponse({"error": "No open issue to merge into"}, status=201)
+        elif not formData.get("force"):
+            matches = find_duplicates(
+                issue_locations,
+                issue_texts,
+                params["p_latitude"],
+                params["p_longitude"],
+                category_id,
+                params["p_description"],
+                radius_km=settings.DEDUP_RADIUS_M / 1000,
+                min_score=settings.DEDUP_CANDIDATE_SCORE,
+            )
+            if matches and matches[0]["score"] >= settings.DEDUP_MERGE_SCORE:
+                duplicate_of = matches[0]["id"]
+            elif matches:
+                rows = candidates_query(supabase, matches).execute().data
+                data["duplicates"] = with_scores(rows, matches)
+                data["message"] = "Similar issues were already reported nearby"
+
+        if duplicate_of:
+            # A "+1" on the existing issue instead of a new row
+            merge = add_report_params(formData, duplicate_of, user_id)
+            if use_direct_db:
+                issue = repository.add_issue_report(merge)
+            else:
+                issue = supabase.rpc("add_issue_report", merge).execute().data
+            issue_cache.invalidate(duplicate_of)
+            thumbnail_worker.submit(merge["p_image_urls"])
+            data["message"] = "merged"
+            data["merged"] = True
+            data["issue"] = issue
+        elif "duplicates" not in data:
+            # Resolved into geocode_cache, from which create_issue fills the
+            # issue's address (sql/009)
+            try:
+                geocode_cache.resolve(params["p_latitude"], params["p_longitude"])
+            except Exception:
+                # The backfill_addresses command fills it in later
+                logger.exception("Reverse geocoding failed; backfill_addresses will retry")
+
+            # Category lookup, issue, status log and photos are written atomically
+            if use_direct_db:
+                new_issue = repository.create_issue(params)
+            else:
+                new_issue = supabase.rpc("create_issue", params).execute().data
+            if not new_issue:
+                raise Exception("Failed to insert issue")
+
+            issue_locations.add(new_issue)
+            issue_texts.add(new_issue)
+            search_index.add(new_issue)
+            publish_issue_event(ISSUE_CREATED, new_issue)
+            thumbnail_worker.submit(params["p_image_urls"])
+            data["message"] = "success"
+            data["issue"] = new_issue
+
+        access = getattr(request, "access", None)
+        refresh = getattr(request, "refresh", None)
+        if access and refresh:
+            data["access"] = access
+            data["refresh"] = refresh
+        return JsonResponse(
+            data,
+            status=200,
+        )
+
+    except Exception:
+        logger.exception("report_new_issue failed")
+        return JsonResponse(
+            {"error": "Authentication check failed", "authenticated": False}, status=201
+        )
+
+
+@csrf_exempt
+def list_issues(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        data = json.loads(request.body)
+        # Only admins see issues hidden by spam flags
+        include_hidden = bool(data.get("include_hidden")) and bool(
+            get_admin(supabase, request)
+        )
+        try:
+            fields = parse_fields(data.get("fields"))
+            issues, next_cursor = fetch_issue_page(
+                supabase,
+                cursor=data.get("cursor"),
+                limit=data.get("limit"),
+                category_id=category_registry.resolve(data.get("category")),
+                status=data.get("status"),
+                since=data.get("since"),
+                until=data.get("until"),
+                include_hidden=include_hidden,
+                fields=fields,
+            )
+        except InvalidCursor as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=201)
+        if wants(fields, "categories"):
+            category_registry.attach_names(issues)
+
+        data = {"issues": issues, "next_cursor": next_cursor}
+
+        access = getattr(request, "access", None)
+        refresh = getattr(request, "refresh", None)
+        if access and refresh:
+            data["access"] = access
+            data["refresh"] = refresh
+        return JsonResponse(
+            data,
+            status=200,
         )
-        if not category_resp.data:
-            raise Exception(f"Category '{formData['category']}' not found")
-        category_id = category_resp.data[0]["id"]
-
-        print(
-            2,
-            formData,
-            formData["description"][:30],
-            category_id,
-            user_id,
-            # formData["location"]["lat"],
-            # formData["location"]["lng"],
+
+    except Exception:
+        logger.exception("list_issues failed")
+        return JsonResponse({"error": "Failed to fetch issues"}, status=201)
+
+
+@csrf_exempt
+def nearby_issues(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        data = json.loads(request.body)
+        try:
+            params = parse_nearby_params(data, category_registry)
+            fields = parse_fields(data.get("fields"))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=201)
+
+        matches = issue_locations.query(**params)
+        issues = []
+        if matches:
+            rows = (
+                supabase.table("issues")
+                .select(select_for(fields))
+                .in_("id", [issue_id for _, issue_id in matches])
+                .execute()
+                .data
+            )
+            by_id = {row["id"]: row for row in rows}
+            for distance, issue_id in matches:
+                issue = by_id.get(issue_id)
+                if issue:
+                    issue["distance_km"] = round(distance, 3)
+                    issues.append(issue)
+            if wants(fields, "categories"):
+                category_registry.attach_names(issues)
+
+        data = {"issues": issues}
+
+        access = getattr(request, "access", None)
+        refresh = getattr(request, "refresh", None)
+        if access and refresh:
+            data["access"] = access
+            data["refresh"] = refresh
+        return JsonResponse(
+            data,
+            status=200,
         )
 
-        issue_payload = {
-            "title": formData["description"][:30],
-            "description": formData["description"],
-            "category_id": category_id,
-            "user_id": user_id,
-            "latitude": formData["location"]["lat"],
-            "longitude": formData["location"]["lng"],
-            "is_anonymous": False,
-            "status": "Reported",
-            "created_at": "now()",
-            "updated_at": "now()",
+    except Exception:
+        logger.exception("nearby_issues failed")
+        return JsonResponse({"error": "Failed to fetch nearby issues"}, status=201)
+
+
+@csrf_exempt
+def search_issues(request):
+    """Ranked full-text search over issue titles, descriptions and categories.
+
+    Body: ``{"q", "category", "status", "limit", "offset"}``. Words match as
+    prefixes, so partial input returns results while the user is typing.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        data = json.loads(request.body)
+        try:
+            params = parse_search_params(data, category_registry)
+            fields = parse_fields(data.get("fields"))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=201)
+
+        total, matches = search_index.search(**params)
+        issues = []
+        if matches:
+            rows = (
+                supabase.table("issues")
+                .select(select_for(fields))
+                .in_("id", [issue_id for _, issue_id in matches])
+                .execute()
+                .data
+            )
+            issues = with_search_scores(rows, matches)
+            if wants(fields, "categories"):
+                category_registry.attach_names(issues)
+
+        next_offset = params["offset"] + len(matches)
+        data = {
+            "issues": issues,
+            "total": total,
+            "next_offset": next_offset if next_offset < total else None,
         }
-        print(3)
 
-        issue_resp = supabase.table("issues").insert(issue_payload).execute()
-        if not issue_resp.data:
-            raise Exception("Failed to insert issue")
-        issue_id = issue_resp.data[0]["id"]
+        access = getattr(request, "access", None)
+        refresh = getattr(request, "refresh", None)
+        if access and refresh:
+            data["access"] = access
+            data["refresh"] = refresh
+        return JsonResponse(data, status=200)
 
-        supabase.table("issue_status_logs").insert(
-            {"issue_id": issue_id, "status": "Reported", "changed_at": "now()"}
-        ).execute()
-        print(4)
+    except Exception:
+        logger.exception("search_issues failed")
+        return JsonResponse({"error": "Failed to search issues"}, status=201)
 
-        image_url = formData["images"]
-        supabase.table("issue_photos").insert(
-            {
-                "issue_id": issue_id,
-                "image_url": image_url,
-                "uploaded_at": "now()",
-            }
-        ).execute()
 
-        issues_record = (
-            supabase.table("issues")
-            .select(
-                "*, categories(name), users_table(first_name, last_name, email), issue_photos(image_url), issue_status_logs(status, changed_at)"
+@csrf_exempt
+def sync_issues(request):
+    """Issues created, updated or deleted since the client's ``watermark``.
+
+    Omit the watermark for a full sync; repeat while ``has_more`` is set.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        data = json.loads(request.body)
+        try:
+            data = fetch_issue_changes(
+                supabase, watermark=data.get("watermark"), limit=data.get("limit")
             )
-            .execute()
+        except InvalidWatermark as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=201)
+        category_registry.attach_names(data["issues"])
+
+        access = getattr(request, "access", None)
+        refresh = getattr(request, "refresh", None)
+        if access and refresh:
+            data["access"] = access
+            data["refresh"] = refresh
+        return JsonResponse(data, status=200)
+
+    except Exception:
+        logger.exception("sync_issues failed")
+        return JsonResponse({"error": "Failed to sync issues"}, status=201)
+
+
+@csrf_exempt
+def issue_stats(request):
+    """Dashboard counts by status, category, day, week and grid cell.
+
+    Read from rollup tables maintained by triggers (sql/003), never from
+    the issues themselves.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        if use_direct_db:
+            count_rows, histogram = repository.get_stat_rows(*stats_cutoffs())
+            stats = build_stats(count_rows, histogram, category_registry)
+        else:
+            stats = fetch_stats(supabase, category_registry)
+
+        data = {"stats": stats}
+
+        access = getattr(request, "access", None)
+        refresh = getattr(request, "refresh", None)
+        if access and refresh:
+            data["access"] = access
+            data["refresh"] = refresh
+        return JsonResponse(data, status=200)
+
+    except Exception:
+        logger.exception("issue_stats failed")
+        return JsonResponse({"error": "Failed to fetch statistics"}, status=201)
+
+
+@csrf_exempt
+def update_issues(request):
+    """Apply a batch of admin status/priority changes in one round-trip.
+
+    Body: ``{"changes": [{"issue_id", "status", "priority"}, ...]}``.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        if not get_admin(supabase, request):
+            return JsonResponse({"error": "Admin access required"}, status=201)
+
+        data = json.loads(request.body)
+        try:
+            changes = issue_changes(data.get("changes"))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=201)
+
+        # One set-based update plus one bulk status-log insert (sql/004)
+        if use_direct_db:
+            issues = repository.update_issues(changes)
+        else:
+            issues = supabase.rpc("update_issues", {"p_changes": changes}).execute().data
+        for issue in issues:
+            issue_locations.update(issue["id"], status=issue["status"])
+            issue_texts.update(issue)
+            search_index.update(issue["id"], status=issue["status"])
+            issue_cache.invalidate(issue["id"])
+            publish_issue_event(ISSUE_STATUS_CHANGED, issue)
+
+        data = {"issues": issues}
+
+        access = getattr(request, "access", None)
+        refresh = getattr(request, "refresh", None)
+        if access and refresh:
+            data["access"] = access
+            data["refresh"] = refresh
+        return JsonResponse(data, status=200)
+
+    except Exception:
+        logger.exception("update_issues failed")
+        return JsonResponse({"error": "Failed to update issues"}, status=201)
+
+
+@csrf_exempt
+def import_issues(request):
+    """Bulk-import issues streamed as NDJSON or CSV.
+
+    The body is read line by line, so the tokens must be sent as
+    ``Authorization: Bearer <access>`` and ``X-Refresh-Token`` headers.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        admin = get_admin(supabase, request)
+        if not admin:
+            return JsonResponse({"error": "Admin access required"}, status=201)
+
+        fmt = request.GET.get("format") or (
+            "csv" if request.content_type == "text/csv" else "ndjson"
+        )
+        if fmt not in INGEST_FORMATS:
+            return JsonResponse({"error": f"Unsupported format '{fmt}'"}, status=201)
+
+        writer = PostgresWriter() if use_direct_db else PostgrestWriter(supabase)
+        data = ingest(
+            iter_records(request, fmt),
+            category_registry,
+            writer,
+            default_user_id=admin["id"],
+            chunk_size=settings.INGEST_CHUNK_SIZE,
         )
-        data["message"] = "success"
-        data["issues"] = issues_record.data
+        if data["inserted"]:
+            issue_locations.invalidate()
+            issue_texts.invalidate()
+            search_index.invalidate()
 
         access = getattr(request, "access", None)
         refresh = getattr(request, "refresh", None)
@@ -539,8 +1023,67 @@ def report_new_issue(request):
             status=200,
         )
 
-    except Exception as e:
-        print(e)
-        return JsonResponse(
-            {"error": "Authentication check failed", "authenticated": False}, status=201
+    except Exception:
+        logger.exception("import_issues failed")
+        return JsonResponse({"error": "Import failed"}, status=201)
+
+
+@csrf_exempt
+def export_issues(request):
+    """Stream issues as NDJSON, CSV or GeoJSON for analytics and GIS tools.
+
+    Query parameters: ``format`` (default ndjson), ``category``, ``status``,
+    ``since`` and ``until``. Tokens go in the Authorization and
+    X-Refresh-Token headers.
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Only GET method allowed"}, status=405)
+
+    try:
+        user = getattr(request, "user", None)
+        if not user:
+            return JsonResponse({"authenticated": False}, status=201)
+
+        if not get_admin(supabase, request):
+            return JsonResponse({"error": "Admin access required"}, status=201)
+
+        fmt = request.GET.get("format", "ndjson")
+        if fmt not in EXPORT_FORMATS:
+            return JsonResponse({"error": f"Unsupported format '{fmt}'"}, status=201)
+        try:
+            filters = export_filters(request.GET, category_registry)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=201)
+
+        issues = (
+            iter_issues_postgres(filters)
+            if use_direct_db
+            else iter_issues_postgrest(supabase, filters)
         )
+        content = stream_export(issues, fmt, category_registry)
+        if isinstance(request, ASGIRequest):
+            content = aiter_in_thread(content)
+        response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[fmt])
+        extension = "json" if fmt == "geojson" else fmt
+        response["Content-Disposition"] = f'attachment; filename="issues.{extension}"'
+        return response
+
+    except Exception:
+        logger.exception("export_issues failed")
+        return JsonResponse({"error": "Export failed"}, status=201)
+
+
+@csrf_exempt
+def metrics(request):
+    """This worker's request and upstream-call metrics in the Prometheus text format."""
+    if request.method != "GET":
+        return JsonResponse({"error": "Only GET method allowed"}, status=405)
+
+    if settings.METRICS_TOKEN and request.headers.get("Authorization") != (
+        f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return JsonResponse({"error": "Unauthorized"}, status=401)
+
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
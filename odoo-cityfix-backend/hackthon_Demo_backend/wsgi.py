@@ -5,3 +5,18 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hackthon_Demo_backend.settings')
 
 application = get_wsgi_application()
+
+# Open the upstream connections, load the categories table and build the
+# spatial, duplicate-detection and search indexes in the background, before
+# the first requests
+from hackthon_Demo_backend.clients import start_warm_up
+from hackthon_Demo_backend.views import (
+    category_registry,
+    issue_locations,
+    issue_texts,
+    search_index,
+)
+
+start_warm_up(
+    category_registry.warm, issue_locations.warm, issue_texts.warm, search_index.warm
+)
@@ -0,0 +1,18 @@
+-- Indexes backing the keyset-paginated /issues/ feed.
+-- Run once against the Supabase database (SQL editor or psql).
+
+create index if not exists issues_feed_idx
+    on issues (created_at desc, id desc);
+
+create index if not exists issues_status_feed_idx
+    on issues (status, created_at desc, id desc);
+
+create index if not exists issues_category_feed_idx
+    on issues (category_id, created_at desc, id desc);
+
+-- Embedded relations are fetched per issue id
+create index if not exists issue_photos_issue_id_idx
+    on issue_photos (issue_id);
+
+create index if not exists issue_status_logs_issue_id_idx
+    on issue_status_logs (issue_id, changed_at);
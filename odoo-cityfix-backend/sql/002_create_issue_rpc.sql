@@ -0,0 +1,70 @@
+-- Atomic issue creation, called by report_new_issue through PostgREST RPC
+-- (supabase.rpc("create_issue", ...)).
+--
+-- Resolves the category, inserts the issue, its initial status log and all
+-- of its photos in one statement, and returns the new issue in the same
+-- shape as the /issues/ feed select. Either everything is written or nothing.
+
+create or replace function create_issue(
+    p_title text,
+    p_description text,
+    p_category text,
+    p_user_id issues.user_id%type,
+    p_latitude issues.latitude%type,
+    p_longitude issues.longitude%type,
+    p_image_urls text[] default '{}'
+)
+returns json
+language plpgsql
+as $$
+declare
+    result json;
+begin
+    with category as (
+        select id, name from categories where name = p_category
+    ),
+    new_issue as (
+        insert into issues (
+            title, description, category_id, user_id, latitude, longitude,
+            is_anonymous, status, created_at, updated_at
+        )
+        select p_title, p_description, category.id, p_user_id, p_latitude,
+               p_longitude, false, 'Reported', now(), now()
+        from category
+        returning *
+    ),
+    log as (
+        insert into issue_status_logs (issue_id, status, changed_at)
+        select id, status, now() from new_issue
+        returning status, changed_at
+    ),
+    photos as (
+        insert into issue_photos (issue_id, image_url, uploaded_at)
+        select new_issue.id, url, now()
+        from new_issue, unnest(p_image_urls) as url
+        returning image_url
+    )
+    select row_to_json(created) into result
+    from (
+        select i.*,
+               (select json_build_object('name', name) from category) as categories,
+               (select json_build_object(
+                           'first_name', u.first_name,
+                           'last_name', u.last_name,
+                           'email', u.email)
+                from users_table u where u.id = i.user_id) as users_table,
+               coalesce(
+                   (select json_agg(json_build_object('image_url', image_url)) from photos),
+                   '[]'::json
+               ) as issue_photos,
+               (select json_agg(json_build_object('status', status, 'changed_at', changed_at))
+                from log) as issue_status_logs
+        from new_issue i
+    ) created;
+
+    if result is null then
+        raise exception 'Category ''%'' not found', p_category;
+    end if;
+    return result;
+end;
+$$;
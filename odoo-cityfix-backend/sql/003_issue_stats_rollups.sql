@@ -0,0 +1,156 @@
+-- Incrementally maintained rollups behind the /issues/stats/ endpoint.
+--
+-- issue_stat_counts holds one counter per (dimension, key):
+--   status    issue status
+--   category  category id
+--   day       creation date (YYYY-MM-DD, UTC)
+--   week      Monday of the creation week (YYYY-MM-DD, UTC)
+--   cell      "<lat_index>:<lng_index>" of the 0.01 degree grid cell
+--
+-- issue_resolution_histogram counts resolutions per whole hour between an
+-- issue's creation and its first "Resolved" status log; the median is read
+-- off the histogram. Triggers keep both tables current on every write, so
+-- the endpoint never scans issues or issue_status_logs.
+
+create table if not exists issue_stat_counts (
+    dimension text not null,
+    key text not null,
+    count bigint not null default 0,
+    primary key (dimension, key)
+);
+
+create table if not exists issue_resolution_histogram (
+    hours integer primary key,
+    count bigint not null default 0
+);
+
+-- Resolutions slower than this land in the last bucket
+create or replace function issue_resolution_max_hours()
+returns integer language sql immutable as $$ select 24 * 365 $$;
+
+create or replace function issue_stat_keys(
+    p_status text,
+    p_category_id issues.category_id%type,
+    p_created_at timestamptz,
+    p_latitude issues.latitude%type,
+    p_longitude issues.longitude%type
+)
+returns table (dimension text, key text)
+language sql immutable as $$
+    select 'status', coalesce(p_status, 'Reported')
+    union all
+    select 'category', p_category_id::text where p_category_id is not null
+    union all
+    select 'day', to_char(p_created_at at time zone 'UTC', 'YYYY-MM-DD')
+    union all
+    select 'week', to_char(date_trunc('week', p_created_at at time zone 'UTC'), 'YYYY-MM-DD')
+    union all
+    select 'cell', floor(p_latitude / 0.01)::bigint || ':' || floor(p_longitude / 0.01)::bigint
+    where p_latitude is not null and p_longitude is not null
+$$;
+
+create or replace function issue_stats_on_issue_write()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        update issue_stat_counts c
+        set count = c.count - 1
+        from issue_stat_keys(
+            old.status, old.category_id, old.created_at, old.latitude, old.longitude
+        ) k
+        where c.dimension = k.dimension and c.key = k.key;
+    end if;
+
+    if tg_op in ('INSERT', 'UPDATE') then
+        insert into issue_stat_counts (dimension, key, count)
+        select k.dimension, k.key, 1
+        from issue_stat_keys(
+            new.status, new.category_id, new.created_at, new.latitude, new.longitude
+        ) k
+        on conflict (dimension, key)
+        do update set count = issue_stat_counts.count + 1;
+    end if;
+
+    return null;
+end;
+$$;
+
+drop trigger if exists issue_stats_on_issue_write on issues;
+create trigger issue_stats_on_issue_write
+after insert or delete or update of status, category_id, created_at, latitude, longitude
+on issues
+for each row execute function issue_stats_on_issue_write();
+
+create or replace function issue_stats_on_status_log()
+returns trigger
+language plpgsql
+as $$
+declare
+    issue_created_at timestamptz;
+begin
+    if new.status <> 'Resolved' then
+        return null;
+    end if;
+    -- Only the first resolution of an issue counts
+    if (
+        select count(*) from issue_status_logs
+        where issue_id = new.issue_id and status = 'Resolved'
+    ) > 1 then
+        return null;
+    end if;
+
+    select created_at into issue_created_at from issues where id = new.issue_id;
+    if issue_created_at is null then
+        return null;
+    end if;
+
+    insert into issue_resolution_histogram (hours, count)
+    values (
+        least(
+            greatest(
+                floor(extract(epoch from coalesce(new.changed_at, now()) - issue_created_at) / 3600),
+                0
+            ),
+            issue_resolution_max_hours()
+        )::integer,
+        1
+    )
+    on conflict (hours)
+    do update set count = issue_resolution_histogram.count + 1;
+    return null;
+end;
+$$;
+
+drop trigger if exists issue_stats_on_status_log on issue_status_logs;
+create trigger issue_stats_on_status_log
+after insert on issue_status_logs
+for each row execute function issue_stats_on_status_log();
+
+-- One-off backfill from existing rows
+truncate issue_stat_counts, issue_resolution_histogram;
+
+insert into issue_stat_counts (dimension, key, count)
+select k.dimension, k.key, count(*)
+from issues i
+cross join lateral issue_stat_keys(
+    i.status, i.category_id, i.created_at, i.latitude, i.longitude
+) k
+group by k.dimension, k.key;
+
+insert into issue_resolution_histogram (hours, count)
+select
+    least(
+        greatest(floor(extract(epoch from r.resolved_at - i.created_at) / 3600), 0),
+        issue_resolution_max_hours()
+    )::integer,
+    count(*)
+from (
+    select issue_id, min(changed_at) as resolved_at
+    from issue_status_logs
+    where status = 'Resolved'
+    group by issue_id
+) r
+join issues i on i.id = r.issue_id
+group by 1;
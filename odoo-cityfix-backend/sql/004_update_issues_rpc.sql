@@ -0,0 +1,44 @@
+-- Batched admin triage, called by update_issues through PostgREST RPC
+-- (supabase.rpc("update_issues", ...)) or directly over the pool.
+--
+-- p_changes is a JSON array of {"id", "status", "priority"} objects; a null
+-- or missing status/priority leaves that column unchanged, and the last
+-- change wins when an id repeats. All issues are updated by one set-based
+-- UPDATE, a status log is appended for every issue whose status actually
+-- changed, and the updated rows are returned as a JSON array.
+
+alter table issues add column if not exists priority text not null default 'Medium';
+
+create or replace function update_issues(p_changes jsonb)
+returns json
+language plpgsql
+as $$
+declare
+    result json;
+begin
+    with changes as (
+        select distinct on (c.id) c.id, c.status, c.priority
+        from jsonb_populate_recordset(null::issues, p_changes) with ordinality
+             as c
+        order by c.id, c.ordinality desc
+    ),
+    updated as (
+        update issues i
+        set status = coalesce(c.status, i.status),
+            priority = coalesce(c.priority, i.priority),
+            updated_at = now()
+        from changes c, issues old
+        where i.id = c.id and old.id = i.id
+        returning i.*, old.status as old_status
+    ),
+    logs as (
+        insert into issue_status_logs (issue_id, status, changed_at)
+        select id, status, now() from updated
+        where status is distinct from old_status
+        returning issue_id
+    )
+    select coalesce(json_agg(to_jsonb(u) - 'old_status'), '[]'::json) into result
+    from updated u;
+    return result;
+end;
+$$;
@@ -0,0 +1,4 @@
+-- Sequence numbers for issue change events when EVENT_BROKER is
+-- PostgresNotifyBroker, so every worker numbers events the same way.
+
+create sequence if not exists issue_event_seq;
@@ -0,0 +1,68 @@
+-- Delta sync support for /issues/sync/.
+--
+-- Clients hold an (updated_at, id) watermark and ask for what changed after
+-- it, so updated_at must move on every change to an issue, deletions must
+-- leave a tombstone, and both need an index to be read in watermark order.
+
+create index if not exists issues_sync_idx
+    on issues (updated_at, id);
+
+create or replace function issues_touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists issues_touch_updated_at on issues;
+create trigger issues_touch_updated_at
+before update on issues
+for each row execute function issues_touch_updated_at();
+
+-- A new status log changes what a synced client shows for its issue
+create or replace function issues_touch_on_status_log()
+returns trigger
+language plpgsql
+as $$
+begin
+    update issues set updated_at = now()
+    where id = new.issue_id and updated_at < now();
+    return null;
+end;
+$$;
+
+drop trigger if exists issues_touch_on_status_log on issue_status_logs;
+create trigger issues_touch_on_status_log
+after insert on issue_status_logs
+for each row execute function issues_touch_on_status_log();
+
+-- Same column type as issues.id
+create table if not exists issue_tombstones as
+    select id as issue_id, updated_at as deleted_at from issues
+    with no data;
+
+create unique index if not exists issue_tombstones_issue_id_idx
+    on issue_tombstones (issue_id);
+
+create index if not exists issue_tombstones_sync_idx
+    on issue_tombstones (deleted_at);
+
+create or replace function issues_record_tombstone()
+returns trigger
+language plpgsql
+as $$
+begin
+    insert into issue_tombstones (issue_id, deleted_at)
+    values (old.id, now())
+    on conflict (issue_id) do update set deleted_at = excluded.deleted_at;
+    return null;
+end;
+$$;
+
+drop trigger if exists issues_record_tombstone on issues;
+create trigger issues_record_tombstone
+after delete on issues
+for each row execute function issues_record_tombstone();
@@ -0,0 +1,7 @@
+-- Thumbnails generated in the background after an issue is created.
+-- Filled in by the thumbnail worker, which looks photos up by image_url.
+
+alter table issue_photos add column if not exists thumbnail_url text;
+
+create index if not exists issue_photos_image_url_idx
+    on issue_photos (image_url);
@@ -0,0 +1,63 @@
+-- "+1" reports merged into an existing issue by near-duplicate detection.
+--
+-- issues.report_count counts the original report plus every merged one;
+-- issue_reports records who merged, so a citizen counts once per issue.
+
+alter table issues add column if not exists report_count integer not null default 1;
+
+-- Same column types as issues.id and issues.user_id
+create table if not exists issue_reports as
+    select id as issue_id, user_id, created_at as reported_at from issues
+    with no data;
+
+create unique index if not exists issue_reports_issue_user_idx
+    on issue_reports (issue_id, user_id);
+
+create or replace function add_issue_report(
+    p_issue_id issues.id%type,
+    p_user_id issues.user_id%type,
+    p_image_urls text[] default '{}'
+)
+returns json
+language plpgsql
+as $$
+declare
+    result json;
+begin
+    with report as (
+        insert into issue_reports (issue_id, user_id, reported_at)
+        select id, p_user_id, now() from issues
+        where id = p_issue_id and user_id is distinct from p_user_id
+        on conflict (issue_id, user_id) do nothing
+        returning issue_id
+    ),
+    counted as (
+        update issues set report_count = report_count + 1
+        where id in (select issue_id from report)
+        returning id
+    ),
+    photos as (
+        insert into issue_photos (issue_id, image_url, uploaded_at)
+        select issue_id, url, now()
+        from report, unnest(p_image_urls) as url
+        returning image_url
+    )
+    select json_build_object(
+               'id', i.id,
+               'title', i.title,
+               'status', i.status,
+               'category_id', i.category_id,
+               'latitude', i.latitude,
+               'longitude', i.longitude,
+               'report_count', i.report_count + (select count(*) from counted),
+               'counted', exists (select 1 from counted)
+           ) into result
+    from issues i
+    where i.id = p_issue_id;
+
+    if result is null then
+        raise exception 'Issue % not found', p_issue_id;
+    end if;
+    return result;
+end;
+$$;
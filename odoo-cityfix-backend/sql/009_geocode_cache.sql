@@ -0,0 +1,56 @@
+-- Reverse-geocoded issue addresses, resolved once by the backend.
+--
+-- geocode_cache holds one address per coordinate pair rounded to 4 decimal
+-- places (about 11 m); a null address means the geocoder found nothing there.
+-- The rounding must match geocoding.GEOCODE_PRECISION.
+
+alter table issues add column if not exists address text;
+
+create table if not exists geocode_cache (
+    lat_key numeric(7, 4) not null,
+    lng_key numeric(7, 4) not null,
+    address text,
+    resolved_at timestamptz not null default now(),
+    primary key (lat_key, lng_key)
+);
+
+-- report_new_issue resolves the coordinates before calling create_issue, so
+-- new issues pick their address up here without another round-trip
+create or replace function issues_fill_address()
+returns trigger
+language plpgsql
+as $$
+begin
+    if new.address is null then
+        select address into new.address
+        from geocode_cache
+        where lat_key = round(new.latitude::numeric, 4)
+          and lng_key = round(new.longitude::numeric, 4);
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists issues_fill_address on issues;
+create trigger issues_fill_address
+before insert on issues
+for each row execute function issues_fill_address();
+
+-- Used by the backfill_addresses command once it has resolved the
+-- coordinates of existing issues; returns the number of issues filled
+create or replace function fill_issue_addresses()
+returns integer
+language sql
+as $$
+    with filled as (
+        update issues i
+        set address = g.address
+        from geocode_cache g
+        where i.address is null
+          and g.address is not null
+          and g.lat_key = round(i.latitude::numeric, 4)
+          and g.lng_key = round(i.longitude::numeric, 4)
+        returning i.id
+    )
+    select count(*)::integer from filled;
+$$;
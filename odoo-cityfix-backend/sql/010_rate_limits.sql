@@ -0,0 +1,58 @@
+-- Token buckets for rate_limit.PostgresRateLimitStore, shared by every
+-- worker process.
+--
+-- The table is unlogged: losing it on a crash only refills the buckets.
+
+create unlogged table if not exists rate_limit_buckets (
+    key text primary key,
+    tokens double precision not null,
+    updated_at timestamptz not null
+);
+
+-- Takes one token from p_key's bucket (refilled at p_rate tokens per second
+-- up to p_burst). Returns 0 when allowed, otherwise the seconds until the
+-- next token is available.
+create or replace function take_rate_limit_token(
+    p_key text,
+    p_rate double precision,
+    p_burst double precision
+)
+returns double precision
+language plpgsql
+as $$
+declare
+    available double precision;
+    taken_at timestamptz;
+begin
+    insert into rate_limit_buckets (key, tokens, updated_at)
+    values (p_key, p_burst, clock_timestamp())
+    on conflict (key) do nothing;
+
+    -- Concurrent requests for the same key queue here
+    perform 1 from rate_limit_buckets where key = p_key for update;
+    taken_at := clock_timestamp();
+
+    select least(
+               p_burst,
+               tokens + greatest(0, extract(epoch from taken_at - updated_at)) * p_rate
+           )
+    into available
+    from rate_limit_buckets
+    where key = p_key;
+
+    if available >= 1 then
+        update rate_limit_buckets
+        set tokens = available - 1, updated_at = taken_at
+        where key = p_key;
+        return 0;
+    end if;
+
+    update rate_limit_buckets
+    set tokens = available, updated_at = taken_at
+    where key = p_key;
+    return (1 - available) / p_rate;
+end;
+$$;
+
+-- Buckets idle for a day are full again, so they can be dropped at any time:
+-- delete from rate_limit_buckets where updated_at < now() - interval '1 day';
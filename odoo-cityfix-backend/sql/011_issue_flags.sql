@@ -0,0 +1,69 @@
+-- Idempotent spam flags with a maintained counter.
+--
+-- A user flags an issue at most once (unique on issue_id, flagged_by);
+-- issues.flag_count is kept in step by flag_issue(), and an issue reaching
+-- the caller's threshold is hidden from the public feed, nearby results,
+-- search and synced caches until an admin reviews it.
+
+alter table issues add column if not exists flag_count integer not null default 0;
+alter table issues add column if not exists is_hidden boolean not null default false;
+
+-- Repeat clicks used to add a row each time; keep one flag per user
+delete from flags a
+using flags b
+where a.issue_id = b.issue_id
+  and a.flagged_by = b.flagged_by
+  and a.ctid > b.ctid;
+
+create unique index if not exists flags_issue_user_idx
+    on flags (issue_id, flagged_by);
+
+update issues i
+set flag_count = f.count
+from (select issue_id, count(*) as count from flags group by issue_id) f
+where f.issue_id = i.id
+  and i.flag_count <> f.count;
+
+-- Returns the issue's new flag state, with "flagged" false when the user had
+-- already flagged it, or null when there is no such issue
+create or replace function flag_issue(
+    p_issue_id issues.id%type,
+    p_user_id flags.flagged_by%type,
+    p_hide_threshold integer
+)
+returns json
+language plpgsql
+as $$
+declare
+    result json;
+begin
+    with flag as (
+        insert into flags (issue_id, flagged_by, flagged_at)
+        select id, p_user_id, now() from issues where id = p_issue_id
+        on conflict (issue_id, flagged_by) do nothing
+        returning issue_id
+    ),
+    counted as (
+        update issues
+        set flag_count = flag_count + 1,
+            is_hidden = is_hidden or flag_count + 1 >= p_hide_threshold
+        where id in (select issue_id from flag)
+        returning id, flag_count, is_hidden
+    )
+    -- The outer select still sees the issue as it was before the update
+    select json_build_object(
+               'id', i.id,
+               'category_id', i.category_id,
+               'latitude', i.latitude,
+               'longitude', i.longitude,
+               'flag_count', coalesce(c.flag_count, i.flag_count),
+               'is_hidden', coalesce(c.is_hidden, i.is_hidden),
+               'flagged', c.id is not null
+           ) into result
+    from issues i
+    left join counted c on c.id = i.id
+    where i.id = p_issue_id;
+
+    return result;
+end;
+$$;
@@ -0,0 +1,43 @@
+-- Bulk import of issues over PostgREST (ingest.PostgrestWriter).
+--
+-- One call writes a chunk of issues with their status logs and photos in a
+-- single transaction, so a failure leaves nothing behind. Each issue's
+-- children are inserted with the id its own insert returned, rather than
+-- being paired with the returned rows by position.
+--
+-- p_issues is a JSON array of issue objects (the issues columns), each with
+-- "status_logs" ([{status, changed_at}]) and "image_urls" ([text]). Missing
+-- timestamps default to now(). Returns the number of issues written.
+
+create or replace function import_issues(p_issues json)
+returns integer
+language plpgsql
+as $$
+declare
+    item json;
+    new_id issues.id%type;
+begin
+    for item in select value from json_array_elements(p_issues) loop
+        insert into issues (
+            title, description, category_id, user_id, latitude, longitude,
+            is_anonymous, status, created_at, updated_at
+        )
+        select r.title, r.description, r.category_id, r.user_id, r.latitude,
+               r.longitude, r.is_anonymous, r.status, coalesce(r.created_at, now()),
+               coalesce(r.updated_at, r.created_at, now())
+        from json_populate_record(null::issues, item) r
+        returning id into new_id;
+
+        insert into issue_status_logs (issue_id, status, changed_at)
+        select new_id, l.status, coalesce(l.changed_at, now())
+        from json_array_elements(item->'status_logs') as log,
+             json_populate_record(null::issue_status_logs, log) l;
+
+        insert into issue_photos (issue_id, image_url, uploaded_at)
+        select new_id, url, now()
+        from json_array_elements_text(item->'image_urls') as url;
+    end loop;
+
+    return json_array_length(p_issues);
+end;
+$$;
@@ -198,7 +198,6 @@ const MapComponent = ({ lat, lng }) => {
 
 function ReportDetailsPage() {
   const { triggerAlert } = useAlert();
-  const user = JSON.parse(localStorage.getItem("user_data"));
   const location = useLocation();
   const [reportData, setReportData] = useState({});
   const issue = location.state;
@@ -270,7 +269,6 @@ function ReportDetailsPage() {
       method: "POST",
       body: JSON.stringify({
         issue: issue,
-        user: user.id,
         access_token: getCookie("access_token"),
         refresh_token: getCookie("refresh_token"),
       }),
@@ -289,10 +287,10 @@ function ReportDetailsPage() {
             triggerAlert("");
           }, 3000);
         } else {
-          const pro = response.issue;
-          const logs = response.logs;
           triggerAlert(
-            "This issue has been reported as spam. An admin will review it shortly."
+            response.issue?.flagged === false
+              ? "You have already reported this issue as spam."
+              : "This issue has been reported as spam. An admin will review it shortly."
           );
           setTimeout(() => {
             triggerAlert("");
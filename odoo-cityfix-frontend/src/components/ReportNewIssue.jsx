@@ -17,6 +17,7 @@ import {
   Edit2,
 } from "lucide-react";
 import { getCookie, setCookies } from "../utils/cookies";
+import { uploadPhotos } from "../utils/photos";
 
 // --- SUB-COMPONENTS (Moved outside for performance and to fix state issues) ---
 
@@ -495,27 +496,45 @@ export default function ReportIssueModal({ onClose }) {
     setIsSubmitting(true);
     setErrorMessage("");
     const formData = {};
-    const user = JSON.parse(localStorage.getItem("user_data"));
-    images.forEach((img) => (formData["images"] = img.url));
     formData["location"] = location;
     formData["category"] = category;
     formData["description"] = description;
-    console.log(user.id);
-    fetch(`http://127.0.0.1:8000/report-new-issue/`, {
-      method: "POST",
-      body: JSON.stringify({
-        formData: formData,
-        user: user.id,
-        access_token: getCookie("access_token"),
-        refresh_token: getCookie("refresh_token"),
-      }),
-      headers: {
-        "Content-type": "application/json; charset=UTF-8",
-      },
-    })
-      .then((response) => {
+    const postReport = (report) =>
+      fetch(`http://127.0.0.1:8000/report-new-issue/`, {
+        method: "POST",
+        body: JSON.stringify({
+          formData: report,
+          access_token: getCookie("access_token"),
+          refresh_token: getCookie("refresh_token"),
+        }),
+        headers: {
+          "Content-type": "application/json; charset=UTF-8",
+        },
+      }).then((response) => {
         if (!response.ok) throw new Error("Failed to login");
         return response.json();
+      });
+
+    uploadPhotos(images.map((img) => img.file))
+      .then((urls) => {
+        formData["images"] = urls;
+        return postReport(formData);
+      })
+      .then((response) => {
+        if (!response.duplicates) return response;
+        // The server found the same problem reported nearby: add to it, or
+        // file a new issue anyway
+        const match = response.duplicates[0];
+        const addToExisting = window.confirm(
+          `"${match.title}" was already reported ${Math.round(
+            match.distance_km * 1000
+          )} m away. Add your report to it instead of filing a new issue?`
+        );
+        return postReport(
+          addToExisting
+            ? { ...formData, duplicate_of: match.id }
+            : { ...formData, force: true }
+        );
       })
       .then((response) => {
         console.log(response);
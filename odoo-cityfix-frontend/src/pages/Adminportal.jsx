@@ -10,16 +10,20 @@ import {
 } from "recharts";
 import Navbar from "../components/Navbar";
 import Footer from "../components/Footer";
+import {
+  fetchIssuePage,
+  fetchIssueStats,
+  updateIssues,
+} from "../utils/issueFeed";
+
+// Edits made within this window are sent to the server as one batch
+const UPDATE_BATCH_DELAY = 1000;
 
-const issuesByMonth = [
-  { name: "Jan", issues: 12 },
-  { name: "Feb", issues: 19 },
-  { name: "Mar", issues: 15 },
-  { name: "Apr", issues: 25 },
-  { name: "May", issues: 22 },
-  { name: "Jun", issues: 31 },
-  { name: "Jul", issues: 28 },
-];
+const formatWeek = (week) =>
+  new Date(`${week}T00:00:00`).toLocaleDateString("en-US", {
+    month: "short",
+    day: "numeric",
+  });
 
 // --- ICONS (lucide-react inspired) ---
 const Plus = (props) => (
@@ -344,9 +348,8 @@ const IssueDetailModal = ({ issue, onClose, onSave }) => {
                   onChange={(e) => setCurrentStatus(e.target.value)}
                   className="w-full px-3 py-2 border border-slate-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500 outline-none transition bg-white"
                 >
-                  <option>Pending</option>
-                  <option>In Review</option>
-                  <option>Sent to Authority</option>
+                  <option>Reported</option>
+                  <option>In Progress</option>
                   <option>Resolved</option>
                   <option>Rejected</option>
                 </select>
@@ -454,22 +457,18 @@ export default function AdminDashboard() {
     return +(R * c).toFixed(2); // Distance in km with 2 decimal places
   }
 
-  async function reverseGeocode(lat, lon) {
-    try {
-      const res = await fetch(
-        `https://nominatim.openstreetmap.org/reverse?format=json&lat=${lat}&lon=${lon}&accept-language=en`
-      );
-      const data = await res.json();
-      return data.display_name || "Address not found";
-    } catch (error) {
-      console.error("Reverse geocoding error:", error);
-      return "Address not available";
-    }
-  }
+  const [rawIssues, setRawIssues] = useState([]);
+
+  useEffect(() => {
+    // Include issues hidden by spam flags so they can be reviewed
+    fetchIssuePage({ limit: 100, include_hidden: true })
+      .then(({ issues }) => setRawIssues(issues))
+      .catch((error) => {
+        console.error("Error: ", error);
+      });
+  }, []);
 
   useEffect(() => {
-    // Load issues instantly from localStorage
-    const rawIssues = JSON.parse(localStorage.getItem("issues_data")) || [];
     const resolved = rawIssues.map((issue) => {
       const lat = issue.latitude;
       const lon = issue.longitude;
@@ -487,8 +486,8 @@ export default function AdminDashboard() {
         id: issue.id,
         category: issue.categories?.name || "Unknown",
         title: issue.title,
-        reports: 28,
-        priority: "High",
+        reports: issue.report_count || 1,
+        priority: issue.priority || "Medium",
         status,
         createdAt: formatTimestamp(issue.created_at),
         description: issue.description,
@@ -502,19 +501,7 @@ export default function AdminDashboard() {
       };
     });
     setIssuesData(resolved);
-
-    // Optionally, update addresses asynchronously
-    rawIssues.forEach(async (issue, idx) => {
-      const lat = issue.latitude;
-      const lon = issue.longitude;
-      const address = await reverseGeocode(lat, lon);
-      setIssuesData((prev) => {
-        const updated = [...prev];
-        updated[idx].location.address = address;
-        return updated;
-      });
-    });
-  }, [location]);
+  }, [rawIssues, location]);
   console.log(issuesData);
   // Load Google Maps script
   useEffect(() => {
@@ -529,13 +516,28 @@ export default function AdminDashboard() {
     }
   }, []);
 
+  const [issueStats, setIssueStats] = useState(null);
+
+  useEffect(() => {
+    fetchIssueStats()
+      .then(setIssueStats)
+      .catch((error) => {
+        console.error("Error: ", error);
+      });
+  }, []);
+
   const stats = {
-    progress: issuesData?.filter((i) => i.status === "In Progress").length,
-    reported: issuesData?.filter((i) => i.status === "Reported").length,
-    resolved: issuesData?.filter((i) => i.status === "Resolved").length,
-    total: issuesData?.length,
+    progress: issueStats?.by_status["In Progress"] || 0,
+    reported: issueStats?.by_status["Reported"] || 0,
+    resolved: issueStats?.by_status["Resolved"] || 0,
+    total: issueStats?.total || 0,
   };
 
+  const issuesByWeek = (issueStats?.by_week || []).map(({ week, count }) => ({
+    name: formatWeek(week),
+    issues: count,
+  }));
+
   const handleOpenModal = (issue) => {
     setSelectedIssue(issue);
     setIsModalOpen(true);
@@ -546,10 +548,34 @@ export default function AdminDashboard() {
     setIsModalOpen(false);
   };
 
+  const pendingChanges = useRef({});
+  const flushTimer = useRef(null);
+
+  const flushIssueUpdates = () => {
+    const changes = Object.values(pendingChanges.current);
+    pendingChanges.current = {};
+    flushTimer.current = null;
+    if (!changes.length) return;
+    updateIssues(changes)
+      .then(() => fetchIssueStats().then(setIssueStats))
+      .catch((error) => {
+        console.error("Error: ", error);
+      });
+  };
+
+  useEffect(() => () => clearTimeout(flushTimer.current), []);
+
   const handleSaveIssue = (issueToSave) => {
     setIssuesData(
       issuesData?.map((i) => (i.id === issueToSave.id ? issueToSave : i))
     );
+    pendingChanges.current[issueToSave.id] = {
+      issue_id: issueToSave.id,
+      status: issueToSave.status,
+      priority: issueToSave.priority,
+    };
+    clearTimeout(flushTimer.current);
+    flushTimer.current = setTimeout(flushIssueUpdates, UPDATE_BATCH_DELAY);
   };
 
   const handleDeleteIssue = (issueId) => {
@@ -649,12 +675,12 @@ export default function AdminDashboard() {
 
             <div className="bg-white p-6 rounded-xl border border-slate-200">
               <h2 className="text-lg font-semibold text-slate-800 mb-4">
-                Monthly Reports
+                Weekly Reports
               </h2>
               <div style={{ width: "100%", height: 300 }}>
                 <ResponsiveContainer>
                   <BarChart
-                    data={issuesByMonth}
+                    data={issuesByWeek}
                     margin={{ top: 5, right: 20, left: -10, bottom: 5 }}
                   >
                     <CartesianGrid strokeDasharray="3 3" stroke="#e2e8f0" />
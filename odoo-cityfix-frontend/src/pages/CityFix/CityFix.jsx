@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import { motion, AnimatePresence } from "framer-motion";
 import {
@@ -11,6 +11,13 @@ import {
 import Footer from "../../components/Footer";
 import Navbar from "../../components/Navbar";
 import IssuePopup from "../../components/ReportNewIssue";
+import {
+  fetchIssuePage,
+  fetchNearbyIssues,
+  searchIssues,
+  subscribeToIssueEvents,
+} from "../../utils/issueFeed";
+import { loadCachedIssues, syncIssueCache } from "../../utils/issueCache";
 
 function getStatusColor(status) {
   switch (status) {
@@ -31,6 +38,14 @@ function formatDate(dateString) {
   return new Date(dateString).toLocaleDateString("en-US", options);
 }
 
+const FEED_PAGE_SIZE = 60;
+// Wait for a pause in typing before asking the server
+const SEARCH_DELAY = 300;
+const NEARBY_RADIUS = {
+  "< 1 Km": { radius_km: 1 },
+  "1-3 Km": { radius_km: 3, min_radius_km: 1 },
+};
+
 const categoryImageMap = {
   Roads: "/images/Roads.png",
   Lighting: "/images/Lighting.png",
@@ -57,19 +72,6 @@ function calculateSince(dateString) {
   return `${months} month${months !== 1 ? "s" : ""} ago`;
 }
 
-async function reverseGeocode(lat, lon) {
-  try {
-    const res = await fetch(
-      `https://nominatim.openstreetmap.org/reverse?format=json&lat=${lat}&lon=${lon}&accept-language=en`
-    );
-    const data = await res.json();
-    return data.display_name || "Address not found";
-  } catch (error) {
-    console.error("Reverse geocoding error:", error);
-    return "Address not available";
-  }
-}
-
 function calculateDistance(lat1, lon1, lat2, lon2) {
   const toRad = (value) => (value * Math.PI) / 180;
 
@@ -359,11 +361,12 @@ export default function App() {
     distance: "Any",
   });
   const [searchQuery, setSearchQuery] = useState("");
+  const [searchTerm, setSearchTerm] = useState("");
   const [currentPage, setCurrentPage] = useState(1);
   const [location, setLocation] = useState(null);
   const [issuesData, setIssuesData] = useState([]);
   const userData = JSON.parse(localStorage.getItem("user_data")) || {};
-  const userEmail = userData.email || "";
+  const userId = userData.id;
   useEffect(() => {
     navigator.geolocation.getCurrentPosition(
       (position) => {
@@ -378,15 +381,122 @@ export default function App() {
     );
   }, []);
 
+  // Paint from the local cache while the first page loads
+  const [rawIssues, setRawIssues] = useState(() =>
+    loadCachedIssues().slice(0, FEED_PAGE_SIZE)
+  );
+  const [nextCursor, setNextCursor] = useState(null);
+  const isFetchingRef = useRef(false);
+  // Bumped when the event stream says our copy can no longer be patched
+  const [feedVersion, setFeedVersion] = useState(0);
+
+  // Only the nearby filters depend on the user's position
+  const nearbyLocation = NEARBY_RADIUS[filters.distance] ? location : null;
+
+  useEffect(() => {
+    const timer = setTimeout(
+      () => setSearchTerm(searchQuery.trim()),
+      SEARCH_DELAY
+    );
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
+  useEffect(() => {
+    // Search, category, status and nearby distance are handled on the
+    // server, so a change restarts the feed
+    const serverFilters = {
+      category: filters.category !== "All" ? filters.category : undefined,
+      status: filters.status !== "All" ? filters.status : undefined,
+    };
+    const radius = NEARBY_RADIUS[filters.distance];
+    isFetchingRef.current = true;
+    const request = searchTerm
+      ? searchIssues({
+          ...serverFilters,
+          q: searchTerm,
+          limit: FEED_PAGE_SIZE,
+        }).then(({ issues, nextOffset }) => ({
+          issues,
+          nextCursor: nextOffset,
+        }))
+      : nearbyLocation
+        ? fetchNearbyIssues({
+            ...serverFilters,
+            ...radius,
+            lat: nearbyLocation.latitude,
+            lng: nearbyLocation.longitude,
+            limit: 200,
+          }).then((issues) => ({ issues, nextCursor: null }))
+        : fetchIssuePage({ ...serverFilters, limit: FEED_PAGE_SIZE });
+    request
+      .then(({ issues, nextCursor }) => {
+        setRawIssues(issues);
+        setNextCursor(nextCursor);
+      })
+      .catch((error) => {
+        console.error("Error: ", error);
+      })
+      .finally(() => {
+        isFetchingRef.current = false;
+      });
+  }, [
+    filters.category,
+    filters.status,
+    filters.distance,
+    nearbyLocation,
+    searchTerm,
+    feedVersion,
+  ]);
+
+  useEffect(() => {
+    // Refresh the local cache with only what changed since the last visit
+    syncIssueCache().catch((error) => {
+      console.error("Error: ", error);
+    });
+  }, []);
+
+  useEffect(() => {
+    // Keep the loaded list current from pushed deltas instead of re-fetching
+    const category = filters.category !== "All" ? filters.category : undefined;
+    return subscribeToIssueEvents({ category }, (type, delta) => {
+      if (type === "reset") {
+        setFeedVersion((version) => version + 1);
+      } else if (type === "issue.created") {
+        setRawIssues((prev) =>
+          prev.some((issue) => issue.id === delta.id)
+            ? prev
+            : [
+                {
+                  ...delta,
+                  categories: { name: delta.category },
+                  issue_photos: delta.image_url
+                    ? [{ image_url: delta.image_url }]
+                    : [],
+                },
+                ...prev,
+              ]
+        );
+      } else if (type === "issue.flagged" && delta.is_hidden) {
+        setRawIssues((prev) => prev.filter((issue) => issue.id !== delta.id));
+      } else if (type === "issue.status_changed") {
+        setRawIssues((prev) =>
+          prev.map((issue) =>
+            issue.id === delta.id
+              ? { ...issue, status: delta.status, priority: delta.priority }
+              : issue
+          )
+        );
+      }
+    });
+  }, [filters.category]);
+
   useEffect(() => {
-    // Load issues instantly from localStorage
-    const rawIssues = JSON.parse(localStorage.getItem("issues_data")) || [];
     const resolved = rawIssues.map((issue) => {
       const lat = issue.latitude;
       const lon = issue.longitude;
       const status = issue?.status || "Reported";
-      let distance = 0;
-      if (location) {
+      let distance = issue.distance_km ?? 0;
+      if (issue.distance_km === undefined && location) {
         distance = calculateDistance(
           location.latitude,
           location.longitude,
@@ -396,7 +506,7 @@ export default function App() {
       }
       return {
         id: issue.id,
-        email: issue.users_table?.email || "Unknown",
+        userId: issue.user_id,
         category: issue.categories?.name || "Unknown",
         title: issue.title,
         status,
@@ -405,21 +515,23 @@ export default function App() {
         since: calculateSince(issue.created_at),
         distance,
         location: { latitude: lat, longitude: lon },
-        address: issue.address || "Address not available", // Use address from API or fallback
+        // Resolved once by the backend when the issue is reported
+        address: issue.address || "Address not available",
         imageUrl:
+          issue.issue_photos?.[0]?.thumbnail_url ||
           issue.issue_photos?.[0]?.image_url ||
           "https://placehold.co/600x400?text=No+Image",
       };
     });
     setIssuesData(resolved);
-  }, []); // Only run once on mount
+  }, [rawIssues, location]);
 
   useEffect(() => {
     setCurrentPage(1);
   }, [filters, searchQuery, myIssues]);
 
   const filteredIssues = issuesData?.filter((issue) => {
-    if (myIssues && issue.email !== userEmail) return false;
+    if (myIssues && issue.userId !== userId) return false;
     if (filters.category !== "All" && issue.category !== filters.category)
       return false;
     if (filters.status !== "All" && issue.status !== filters.status)
@@ -434,20 +546,6 @@ export default function App() {
       return false;
     if (filters.distance === "> 3 Km" && distanceValue <= 3) return false;
 
-    if (
-      searchQuery &&
-      !issue.title.toLowerCase().includes(searchQuery.toLowerCase()) &&
-      !issue.address.toLowerCase().includes(searchQuery.toLowerCase())
-    )
-      return false;
-
-    if (
-      searchQuery &&
-      !issue.title.toLowerCase().includes(searchQuery.toLowerCase()) &&
-      !issue.address.toLowerCase().includes(searchQuery.toLowerCase())
-    )
-      return false;
-
     return true;
   });
 
@@ -462,6 +560,39 @@ export default function App() {
     (currentPage - 1) * ITEMS_PER_PAGE,
     currentPage * ITEMS_PER_PAGE
   );
+
+  useEffect(() => {
+    // Pull the next page of the feed once the user reaches the last loaded page
+    if (nextCursor == null || isFetchingRef.current || currentPage < totalPages)
+      return;
+    isFetchingRef.current = true;
+    const serverFilters = {
+      limit: FEED_PAGE_SIZE,
+      category: filters.category !== "All" ? filters.category : undefined,
+      status: filters.status !== "All" ? filters.status : undefined,
+    };
+    const request = searchTerm
+      ? searchIssues({
+          ...serverFilters,
+          q: searchTerm,
+          offset: nextCursor,
+        }).then(({ issues, nextOffset }) => ({
+          issues,
+          nextCursor: nextOffset,
+        }))
+      : fetchIssuePage({ ...serverFilters, cursor: nextCursor });
+    request
+      .then(({ issues, nextCursor }) => {
+        setRawIssues((prev) => [...prev, ...issues]);
+        setNextCursor(nextCursor);
+      })
+      .catch((error) => {
+        console.error("Error: ", error);
+      })
+      .finally(() => {
+        isFetchingRef.current = false;
+      });
+  }, [currentPage, totalPages, nextCursor]);
   console.log(filteredIssues);
 
   return (
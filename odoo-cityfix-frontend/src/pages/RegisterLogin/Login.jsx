@@ -169,10 +169,6 @@ const AuthPage = () => {
               triggerAlert("");
             }, 3000);
             localStorage.setItem("user_data", JSON.stringify(response.user));
-            localStorage.setItem(
-              "issues_data",
-              JSON.stringify(response.issues)
-            );
             if (response.access) {
               setCookies(response);
             }
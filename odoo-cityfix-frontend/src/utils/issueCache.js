@@ -0,0 +1,48 @@
+import { syncIssues } from "./issueFeed";
+
+const ISSUES_KEY = "issues_data";
+const WATERMARK_KEY = "issues_watermark";
+
+export function loadCachedIssues() {
+  try {
+    return JSON.parse(localStorage.getItem(ISSUES_KEY)) || [];
+  } catch {
+    return [];
+  }
+}
+
+// Brings localStorage["issues_data"] up to date by pulling only what changed
+// since the stored watermark. Returns the cached issues, newest first.
+export async function syncIssueCache() {
+  const byId = new Map(loadCachedIssues().map((issue) => [issue.id, issue]));
+  let watermark = byId.size ? localStorage.getItem(WATERMARK_KEY) : null;
+  let hasMore = true;
+
+  while (hasMore) {
+    const delta = await syncIssues(watermark);
+    const logsByIssue = {};
+    for (const log of delta.logs) {
+      (logsByIssue[log.issue_id] ||= []).push({
+        status: log.status,
+        changed_at: log.changed_at,
+      });
+    }
+    for (const issue of delta.issues) {
+      const previousLogs = byId.get(issue.id)?.issue_status_logs || [];
+      byId.set(issue.id, {
+        ...issue,
+        issue_status_logs: [...previousLogs, ...(logsByIssue[issue.id] || [])],
+      });
+    }
+    for (const id of delta.deleted) byId.delete(id);
+    watermark = delta.watermark;
+    hasMore = delta.hasMore;
+  }
+
+  const issues = [...byId.values()].sort((a, b) =>
+    a.created_at < b.created_at ? 1 : -1
+  );
+  localStorage.setItem(ISSUES_KEY, JSON.stringify(issues));
+  localStorage.setItem(WATERMARK_KEY, watermark);
+  return issues;
+}
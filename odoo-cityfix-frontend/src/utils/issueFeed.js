@@ -0,0 +1,121 @@
+import { getCookie, setCookies } from "./cookies";
+
+async function postIssues(path, params) {
+  const response = await fetch(`http://127.0.0.1:8000${path}`, {
+    method: "POST",
+    body: JSON.stringify({
+      ...params,
+      access_token: getCookie("access_token"),
+      refresh_token: getCookie("refresh_token"),
+    }),
+    headers: {
+      "Content-type": "application/json; charset=UTF-8",
+    },
+  });
+  if (!response.ok) throw new Error("Failed to fetch issues");
+  const data = await response.json();
+  if (data.error) throw new Error(data.error);
+  if (data.access) {
+    setCookies(data);
+  }
+  return data;
+}
+
+export async function fetchIssuePage(params = {}) {
+  const data = await postIssues("/issues/", params);
+  return { issues: data.issues || [], nextCursor: data.next_cursor };
+}
+
+export async function fetchNearbyIssues(params) {
+  const data = await postIssues("/issues/nearby/", params);
+  return data.issues || [];
+}
+
+// Ranked full-text search; pages are addressed by offset rather than cursor
+export async function searchIssues(params) {
+  const data = await postIssues("/issues/search/", params);
+  return {
+    issues: data.issues || [],
+    total: data.total || 0,
+    nextOffset: data.next_offset ?? null,
+  };
+}
+
+export async function fetchIssueStats() {
+  const data = await postIssues("/issues/stats/", {});
+  return data.stats;
+}
+
+export async function updateIssues(changes) {
+  const data = await postIssues("/issues/update/", { changes });
+  return data.issues || [];
+}
+
+// Opens the issue change stream; EventSource resumes from the last event id
+// on its own after a dropped connection. The server refuses an expired access
+// token, which closes the source: the session is then refreshed and the
+// stream reopened from the last event. Returns a function that closes it.
+export function subscribeToIssueEvents({ category, bbox } = {}, onEvent) {
+  let source = null;
+  let lastEventId = null;
+  let retry = null;
+  let closed = false;
+
+  const open = () => {
+    const params = new URLSearchParams({
+      access_token: getCookie("access_token") || "",
+    });
+    if (category) params.set("category", category);
+    if (bbox) {
+      params.set(
+        "bbox",
+        [bbox.south, bbox.west, bbox.north, bbox.east].join(",")
+      );
+    }
+    if (lastEventId) params.set("after", lastEventId);
+    source = new EventSource(
+      `http://127.0.0.1:8000/issues/events/?${params}`
+    );
+    for (const type of [
+      "issue.created",
+      "issue.status_changed",
+      "issue.flagged",
+      "reset",
+    ]) {
+      source.addEventListener(type, (event) => {
+        lastEventId = event.lastEventId || lastEventId;
+        onEvent(type, JSON.parse(event.data));
+      });
+    }
+    source.onerror = () => {
+      if (closed || source.readyState !== EventSource.CLOSED) return;
+      retry = setTimeout(async () => {
+        try {
+          // Refreshes the cookies if the access token has expired
+          await postIssues("/check_auth/", {});
+        } catch {
+          // Reopen anyway; a signed-out user just gets refused again
+        }
+        if (!closed) open();
+      }, 3000);
+    };
+  };
+
+  open();
+  return () => {
+    closed = true;
+    clearTimeout(retry);
+    source.close();
+  };
+}
+
+export async function syncIssues(watermark) {
+  const data = await postIssues("/issues/sync/", { watermark });
+  return {
+    issues: data.issues || [],
+    deleted: data.deleted || [],
+    logs: data.logs || [],
+    watermark: data.watermark,
+    hasMore: data.has_more,
+  };
+}
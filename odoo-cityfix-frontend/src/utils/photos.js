@@ -0,0 +1,23 @@
+import { getCookie, setCookies } from "./cookies";
+
+// Uploads the selected files as multipart and returns their stored URLs.
+// The tokens travel as headers so the server can stream the body to storage.
+export async function uploadPhotos(files) {
+  const body = new FormData();
+  files.forEach((file) => body.append("photos", file));
+  const response = await fetch("http://127.0.0.1:8000/photos/upload/", {
+    method: "POST",
+    body,
+    headers: {
+      Authorization: `Bearer ${getCookie("access_token")}`,
+      "X-Refresh-Token": getCookie("refresh_token") || "",
+    },
+  });
+  if (!response.ok) throw new Error("Failed to upload photos");
+  const data = await response.json();
+  if (data.error) throw new Error(data.error);
+  if (data.access) {
+    setCookies(data);
+  }
+  return data.urls;
+}